@@ -0,0 +1,397 @@
+#! /usr/bin/python3
+
+# What the practice history says: accuracy and response times now, last
+# session and over all time, how they've trended day by day, which strings and
+# frets go wrong, and how long has gone into each exercise and level.
+#
+# Years of notes are too many to rescan every time the report opens, so notes
+# are boiled down, as they come in, to one row per day, exercise, level,
+# string and fret, kept in the history database alongside the notes.  Each
+# update only reads the notes added since the last one.  Everything after that
+# works on those rows as numpy columns.
+#
+#   ./analytics.py
+#   ./analytics.py -e frets --heatmap
+#   ./analytics.py --history station3.db --user sam
+
+import argparse
+import math
+
+import numpy as num
+
+from notes import STRING_LIST, STRING_FRET_LIST
+from sessionStore import DEFAULT_PATH, connect, defaultUser
+
+# Response times are kept as counts over log spaced bins from RESPONSE_MIN_MS
+# to RESPONSE_MAX_MS, each about 12% wider than the last, so percentiles of
+# any number of notes can be had from a few hundred bytes.  Times outside the
+# range are counted in the end bins.
+RESPONSE_BINS = 80
+RESPONSE_MIN_MS = 10.0
+RESPONSE_MAX_MS = 100000.0
+RESPONSE_EDGES_MS = num.geomspace(RESPONSE_MIN_MS, RESPONSE_MAX_MS,
+    RESPONSE_BINS + 1)
+# Days shown in the report's trend
+TREND_DAYS = 14
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS noteStats (
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    string INTEGER NOT NULL,
+    fret INTEGER NOT NULL,
+    notes INTEGER NOT NULL,
+    numRight INTEGER NOT NULL,
+    responseMs REAL NOT NULL,
+    histogram BLOB NOT NULL,
+    PRIMARY KEY (user, exercise, level, day, string, fret)
+);
+CREATE TABLE IF NOT EXISTS statsScanned (
+    user TEXT PRIMARY KEY,
+    lastNote INTEGER NOT NULL
+);
+"""
+# The grouping each noteStats row stands for, and all its columns
+GROUP_COLUMNS = ('exercise', 'level', 'day', 'string', 'fret')
+STATS_COLUMNS = GROUP_COLUMNS + ('notes', 'numRight', 'responseMs',
+    'histogram')
+
+def columns(rows, names):
+    """rows (tuples, as sqlite returns them) as a dict of numpy arrays, one
+    per name"""
+    if not rows:
+        return {name: num.array([]) for name in names}
+    return {name: num.array(column) for name, column in zip(names, zip(*rows))}
+
+def responseBins(responseMs):
+    bins = num.searchsorted(RESPONSE_EDGES_MS, responseMs, side='right') - 1
+    return num.clip(bins, 0, RESPONSE_BINS - 1)
+
+def histogramPercentiles(counts, points):
+    """Percentiles of the response times counted in counts, interpolated
+    geometrically within a bin, NaN where there are none.  Given a 2D counts,
+    one row of percentiles per row of counts."""
+    counts = num.asarray(counts)
+    rows = num.atleast_2d(counts).astype(num.int64)
+    cumulative = num.cumsum(rows, axis=1)
+    total = cumulative[:, -1:]
+    targets = total * (num.asarray(points) / 100.0)
+    # The first bin each percentile is reached in
+    bins = (cumulative[:, None, :] < targets[:, :, None]).sum(axis=2)
+    bins = num.minimum(bins, RESPONSE_BINS - 1)
+    inBin = num.take_along_axis(rows, bins, axis=1)
+    below = num.take_along_axis(cumulative, bins, axis=1) - inBin
+    fraction = num.clip((targets - below) / num.maximum(inBin, 1), 0, 1)
+    low = RESPONSE_EDGES_MS[bins]
+    high = RESPONSE_EDGES_MS[bins + 1]
+    result = num.where(total > 0, low * (high / low) ** fraction, num.nan)
+    return result if counts.ndim == 2 else result[0]
+
+def groupBy(keys):
+    """The distinct rows of keys (integer columns, one per grouping), and
+    which of them each row is"""
+    # One number per row, every column in places of its own, so a 1D unique
+    # does the grouping
+    code = num.zeros(len(keys[0]), dtype=num.int64)
+    for key in keys:
+        key = key.astype(num.int64)
+        low = key.min() if len(key) else 0
+        code = code * (key.max() - low + 1 if len(key) else 1) + key - low
+    codes, first, which = num.unique(code, return_index=True,
+        return_inverse=True)
+    return num.column_stack([key[first] for key in keys]), which.reshape(-1)
+
+def sumRows(which, count, rows):
+    """Each group's sum of rows (a 2D array, one row per which)"""
+    if len(which) == 0:
+        return num.zeros((count, rows.shape[1]), dtype=num.int64)
+    order = num.argsort(which, kind='stable')
+    starts = num.searchsorted(which[order], num.arange(count))
+    sums = num.zeros((count, rows.shape[1]), dtype=num.int64)
+    present = num.bincount(which, minlength=count) > 0
+    sums[present] = num.add.reduceat(rows[order].astype(num.int64),
+        starts[present], axis=0)
+    return sums
+
+class PracticeStats:
+    """One user's practice history, summed up.
+
+    update() folds in whatever notes have been added since it last ran.  The
+    queries then only look at the summed rows, held in memory as columns:
+    exercise, level, day, string, fret, notes, numRight, responseMs (their
+    total) and histogram (a row of RESPONSE_BINS counts each).
+    """
+
+    def __init__(self, path = DEFAULT_PATH, user = None):
+        self.path = path
+        self.user = user if user is not None else defaultUser()
+        self.db = connect(path)
+        self.db.executescript(STATS_SCHEMA)
+        self.load()
+
+    def close(self):
+        self.db.close()
+
+    def load(self):
+        rows = self.db.execute("SELECT %s, notes, numRight, responseMs, "
+            "histogram FROM noteStats WHERE user = ?" % ", ".join(GROUP_COLUMNS),
+            (self.user,)).fetchall()
+        self.stats = columns([row[:-1] for row in rows], STATS_COLUMNS[:-1])
+        self.stats['histogram'] = num.frombuffer(b"".join(row[-1]
+            for row in rows), dtype=num.int32).reshape(-1, RESPONSE_BINS)
+
+    def update(self):
+        """Fold the notes added since the last update into the summed rows.
+        Returns how many there were."""
+        scanned = self.db.execute("SELECT lastNote FROM statsScanned "
+            "WHERE user = ?", (self.user,)).fetchone()
+        lastNote = scanned[0] if scanned else 0
+        rows = self.db.execute("SELECT id, %s, correct, responseMs FROM notes "
+            "WHERE user = ? AND id > ? ORDER BY id" % ", ".join(GROUP_COLUMNS),
+            (self.user, lastNote)).fetchall()
+        if not rows:
+            return 0
+        new = columns(rows, ('id',) + GROUP_COLUMNS + ('correct', 'responseMs'))
+
+        # The new notes and the rows already summed for the same days, summed
+        # together by group
+        old = self.stats
+        touched = num.isin(old['day'], new['day'])
+        # Left to concatenate to promote the string columns, so neither
+        # side's names are cut down to the other's width.  With nothing
+        # summed yet, the empty columns have no type to promote from.
+        if touched.any():
+            keys = [num.concatenate((old[name][touched], new[name]))
+                for name in GROUP_COLUMNS]
+        else:
+            keys = [new[name] for name in GROUP_COLUMNS]
+        exercises, exercise = num.unique(keys[0], return_inverse=True)
+        days, day = num.unique(keys[2], return_inverse=True)
+        groups, which = groupBy([exercise, keys[1], day, keys[3], keys[4]])
+        count = len(groups)
+        notes = num.bincount(which, num.concatenate((old['notes'][touched],
+            num.ones(len(rows)))), count)
+        numRight = num.bincount(which, num.concatenate((
+            old['numRight'][touched], new['correct'])), count)
+        responseMs = num.bincount(which, num.concatenate((
+            old['responseMs'][touched], new['responseMs'])), count)
+        # Each new note adds one to a single bin
+        oldRows = num.count_nonzero(touched)
+        histograms = num.bincount(which[oldRows:] * RESPONSE_BINS
+            + responseBins(new['responseMs']), minlength=count
+            * RESPONSE_BINS).reshape(count, RESPONSE_BINS)
+        histograms += sumRows(which[:oldRows], count,
+            old['histogram'][touched])
+        summed = {'exercise': exercises[groups[:, 0]], 'level': groups[:, 1],
+            'day': days[groups[:, 2]], 'string': groups[:, 3],
+            'fret': groups[:, 4], 'notes': notes.astype(num.int64),
+            'numRight': numRight.astype(num.int64), 'responseMs': responseMs,
+            'histogram': histograms.astype(num.int32)}
+
+        # Every group of the touched days is in summed, so their old rows
+        # go and summed's replace them
+        with self.db:
+            self.db.executemany("DELETE FROM noteStats WHERE user = ? AND "
+                "day = ?", [(self.user, str(d)) for d in days])
+            self.db.executemany("INSERT INTO noteStats (user, %s, "
+                "notes, numRight, responseMs, histogram) VALUES (?, ?, ?, ?, "
+                "?, ?, ?, ?, ?, ?)" % ", ".join(GROUP_COLUMNS),
+                [(self.user, str(e), int(l), str(d), int(st), int(f), int(n),
+                    int(r), float(t), h.tobytes())
+                for e, l, d, st, f, n, r, t, h in zip(*(summed[name]
+                    for name in STATS_COLUMNS))])
+            self.db.execute("INSERT OR REPLACE INTO statsScanned (user, "
+                "lastNote) VALUES (?, ?)", (self.user, int(new['id'][-1])))
+
+        # The days not touched stay as they were
+        if len(old['notes']) == 0:
+            self.stats = summed
+        else:
+            self.stats = {name: num.concatenate((old[name][~touched],
+                summed[name])) for name in STATS_COLUMNS}
+        return len(rows)
+
+    def select(self, exercise = None, level = None, since = None):
+        """Which summed rows are for exercise and level, from day since (an
+        ISO date) on.  None for any."""
+        chosen = num.ones(len(self.stats['notes']), dtype=bool)
+        if exercise is not None:
+            chosen &= self.stats['exercise'] == exercise
+        if level is not None:
+            chosen &= self.stats['level'] == level
+        if since is not None:
+            chosen &= self.stats['day'] >= since
+        return chosen
+
+    def totals(self, chosen):
+        """Notes, accuracy, and the median and 90th percentile response time
+        over the chosen rows"""
+        notes = int(self.stats['notes'][chosen].sum())
+        if notes == 0:
+            return 0, num.nan, num.nan, num.nan
+        p50, p90 = histogramPercentiles(
+            self.stats['histogram'][chosen].sum(axis=0), (50, 90))
+        return notes, self.stats['numRight'][chosen].sum() / notes, p50, p90
+
+    def heatmap(self, chosen):
+        """Notes asked for and accuracy at each string and fret, as arrays
+        of len(STRING_LIST) by frets.  Notes the exercise didn't ask for in
+        any particular place are left out."""
+        shape = (len(STRING_LIST), len(STRING_FRET_LIST[0]))
+        string = self.stats['string']
+        fret = self.stats['fret']
+        chosen = chosen & (string >= 0) & (string < shape[0]) & (fret >= 0) \
+            & (fret < shape[1])
+        cells = (string[chosen] * shape[1] + fret[chosen]).astype(num.int64)
+        size = shape[0] * shape[1]
+        notes = num.bincount(cells, self.stats['notes'][chosen], size)
+        numRight = num.bincount(cells, self.stats['numRight'][chosen], size)
+        with num.errstate(invalid='ignore', divide='ignore'):
+            accuracy = numRight / notes
+        return notes.reshape(shape), accuracy.reshape(shape)
+
+    def trend(self, chosen):
+        """Each day's notes, accuracy and median response time, and the
+        straight line through the accuracy (weighted by notes), as its change
+        per week"""
+        days, which = num.unique(self.stats['day'][chosen], return_inverse=True)
+        notes = num.bincount(which, self.stats['notes'][chosen], len(days))
+        numRight = num.bincount(which, self.stats['numRight'][chosen],
+            len(days))
+        accuracy = numRight / num.maximum(notes, 1)
+        medians = histogramPercentiles(sumRows(which, len(days),
+            self.stats['histogram'][chosen]), (50,))[:, 0]
+        slope = num.nan
+        if len(days) > 1:
+            dayNumbers = days.astype('datetime64[D]').astype(num.int64)
+            slope = num.polyfit(dayNumbers, accuracy, 1, w=num.sqrt(notes))[0] * 7
+        return days, notes, accuracy, medians, slope
+
+    def sessions(self, exercise = None, level = None):
+        """Sessions oldest first, as columns: id, exercise, level, started and
+        seconds (how long they ran; a session that never ended ran until its
+        last note)"""
+        conditions = ["user = ?"]
+        values = [self.user]
+        if exercise is not None:
+            conditions.append("exercise = ?")
+            values.append(exercise)
+        if level is not None:
+            conditions.append("level = ?")
+            values.append(level)
+        rows = self.db.execute("SELECT id, exercise, level, started, "
+            "COALESCE(ended, (SELECT MAX(time) FROM notes WHERE session = "
+            "sessions.id), started) - started FROM sessions WHERE "
+            + " AND ".join(conditions) + " ORDER BY started", values).fetchall()
+        return columns(rows, ('id', 'exercise', 'level', 'started', 'seconds'))
+
+    def sessionTotals(self, session):
+        """The same as totals(), for one session's notes"""
+        rows = self.db.execute("SELECT correct, responseMs FROM notes WHERE "
+            "session = ?", (session,)).fetchall()
+        if not rows:
+            return 0, num.nan, num.nan, num.nan
+        notes = columns(rows, ('correct', 'responseMs'))
+        p50, p90 = num.percentile(notes['responseMs'], (50, 90))
+        return len(rows), notes['correct'].mean(), p50, p90
+
+    def timePerLevel(self):
+        """Total seconds spent on each exercise and level, as the distinct
+        (exercise, level) pairs and their seconds"""
+        sessions = self.sessions()
+        if len(sessions['id']) == 0:
+            return [], num.array([])
+        names, exercise = num.unique(sessions['exercise'], return_inverse=True)
+        groups, which = groupBy([exercise, sessions['level']])
+        seconds = num.bincount(which, sessions['seconds'].astype(float),
+            len(groups))
+        return [(names[e], int(l)) for e, l in groups], seconds
+
+def formatTotals(name, totals):
+    notes, accuracy, p50, p90 = totals
+    if notes == 0:
+        return "  %-13s %6d notes" % (name, 0)
+    return "  %-13s %6d notes  %5.1f%% right  response median %6.0f ms, " \
+        "p90 %6.0f ms" % (name, notes, 100 * accuracy, p50, p90)
+
+def formatDuration(seconds):
+    minutes = int(round(seconds / 60.0))
+    return "%dh %02dm" % (minutes // 60, minutes % 60)
+
+def heatmapLines(notes, accuracy):
+    """Accuracy at every string and fret, highest string at the top as in
+    tab, . where nothing has been asked"""
+    lines = ["    " + "".join("%4d" % fret for fret in range(notes.shape[1]))]
+    for string in reversed(range(notes.shape[0])):
+        cells = ["%4.0f" % (100 * accuracy[string, fret])
+            if notes[string, fret] else "   ." for fret in range(notes.shape[1])]
+        lines.append("%-4s" % STRING_LIST[string] + "".join(cells))
+    lines.append("% right at each fret")
+    return lines
+
+def report(stats, exercise = None, level = None, session = None,
+        heatmap = False):
+    """The practice report for one exercise (and level), or everything.
+    session is the one to call "now", by default the latest."""
+    chosen = stats.select(exercise, level)
+    title = "all exercises" if exercise is None else exercise
+    if level is not None:
+        title += ", level %d" % level
+    lines = [stats.user + ": " + title]
+    sessions = stats.sessions(exercise, level)
+    ids = list(sessions['id'])
+    if session is None and ids:
+        session = ids[-1]
+    if session is not None:
+        lines.append(formatTotals("this session", stats.sessionTotals(session)))
+        if session in ids and ids.index(session) > 0:
+            lines.append(formatTotals("last session",
+                stats.sessionTotals(ids[ids.index(session) - 1])))
+    lines.append(formatTotals("all time", stats.totals(chosen)))
+
+    days, notes, accuracy, medians, slope = stats.trend(chosen)
+    if len(days):
+        lines.append("")
+        lines.append("by day (last %d practised):" % min(len(days), TREND_DAYS))
+        for i in range(max(0, len(days) - TREND_DAYS), len(days)):
+            lines.append("  %s %6d notes  %5.1f%% %s  median %6.0f ms" % (
+                days[i], notes[i], 100 * accuracy[i],
+                "#" * int(round(20 * accuracy[i])) + "." * (20 - int(round(
+                20 * accuracy[i]))), medians[i]))
+        if not math.isnan(slope):
+            lines.append("  trend %+.1f%% right per week" % (100 * slope))
+
+    if heatmap:
+        lines.append("")
+        lines += heatmapLines(*stats.heatmap(chosen))
+
+    levels, seconds = stats.timePerLevel()
+    if levels:
+        lines.append("")
+        lines.append("time practised:")
+        for (name, number), spent in zip(levels, seconds):
+            lines.append("  %-10s level %d  %s" % (name, number,
+                formatDuration(spent)))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on a bassBot "
+        "practice history")
+    parser.add_argument('--history', default=DEFAULT_PATH, metavar='FILE',
+        help="the practice history (default " + DEFAULT_PATH + ")")
+    parser.add_argument('--user', default=None,
+        help="whose practice to report on (default: the login name)")
+    parser.add_argument('-e', '--exercise', default=None,
+        help="only this exercise (frets, chords, nashville or freeplay)")
+    parser.add_argument('-l', '--level', type=int, default=None,
+        help="only this level")
+    parser.add_argument('--heatmap', action='store_true',
+        help="show accuracy at every string and fret")
+    args = parser.parse_args()
+
+    stats = PracticeStats(args.history, args.user)
+    stats.update()
+    print(report(stats, args.exercise, args.level, heatmap=args.heatmap))
+    stats.close()
@@ -0,0 +1,334 @@
+import numpy as num
+import time
+
+from ringBuffer import RingBuffer
+
+# pyaudio is only needed for live capture.  File and synthesised sources work
+# without it, which is what lets the pipeline run on headless build boxes.  It
+# is imported the first time live input is asked for, not with this module.
+def importPyaudio():
+    try:
+        import pyaudio
+    except ImportError:
+        return None
+    return pyaudio
+
+SAMPLE_TYPE = num.float32
+# Hop size used when decoding a whole file into memory
+FILE_READ_SIZE = 4096
+# Longest a live read() waits for input before checking whether it has been
+# interrupted
+READ_TIMEOUT = 0.1
+
+class AudioSource:
+    """Hands the analysis loop fixed size hops of mono float32 samples.
+
+    read() returns the next hop as an array that is only valid until the
+    following read() (sources reuse their buffers), or None once the source
+    has run dry.  Live sources never run dry, but interrupt() makes any
+    source's read() return None from then on, so whoever is reading can be
+    stopped from another thread within a hop or so.
+    """
+
+    def __init__(self, hopSize, sampleRate):
+        self.hopSize = hopSize
+        self.sampleRate = sampleRate
+        self.interrupted = False
+
+    # Sources allocate everything they hand out up front, so nothing is
+    # allocated per hop (AudioHandler.steadyStateAllocs() checks)
+    def allocBuffer(self, size):
+        return num.zeros(size, dtype=SAMPLE_TYPE)
+
+    def read(self):
+        raise NotImplementedError
+
+    def interrupt(self):
+        self.interrupted = True
+
+    # When the last sample of the hop read() last returned was captured, in
+    # time.monotonic() seconds.  Sources that can't tell say now.
+    def hopTime(self):
+        return time.monotonic()
+
+    # Hops that are ready but haven't been read yet
+    def hopsBehind(self):
+        return 0
+
+    # Frames that were produced but never made it to read()
+    def droppedFrames(self):
+        return 0
+
+    def close(self):
+        pass
+
+class PyAudioSource(AudioSource):
+    """Live input from a PortAudio device.
+
+    Given an output (an outputEngine.OutputEngine), the stream is opened
+    duplex, and the output side is filled by the engine on the same callback
+    as capture.  The callback then comes every output.framesPerBuffer frames
+    rather than every hop, and the ring puts the hops together.
+    """
+
+    def __init__(self, hopSize, sampleRate, useCallback = True, ringHops = 16,
+            deviceIndex = None, output = None):
+        AudioSource.__init__(self, hopSize, sampleRate)
+        pyaudio = importPyaudio()
+        if pyaudio is None:
+            raise RuntimeError("pyaudio is needed for live audio input")
+        self.pyaudio = pyaudio
+        # A duplex stream always works through the ring
+        self.useCallback = useCallback or output is not None
+        self.deviceIndex = deviceIndex
+        self.output = output
+        self.inputOverflows = 0
+        self.closed = False
+        # (ring.writeCount, capture time of the frame just before it) as of
+        # the latest callback, set in one go so read() always sees a pair
+        self.captured = None
+        self.lastHopTime = None
+        self.clockOffset = None
+        self.pA = pyaudio.PyAudio()
+        if output is not None:
+            self.ring = RingBuffer(hopSize, ringHops, SAMPLE_TYPE)
+            self.samples = self.allocBuffer(hopSize)
+            self.mic = self.pA.open(format=pyaudio.paFloat32, channels=1,
+                    rate=sampleRate, input=True, output=True,
+                    input_device_index=deviceIndex,
+                    output_device_index=output.deviceIndex,
+                    frames_per_buffer=output.framesPerBuffer,
+                    stream_callback=self.duplexCallback)
+        elif self.useCallback:
+            # PortAudio pushes frames into the ring from its own thread, and
+            # read() consumes them at whatever pace analysis manages
+            self.ring = RingBuffer(hopSize, ringHops, SAMPLE_TYPE)
+            self.samples = self.allocBuffer(hopSize)
+            self.mic = self.pA.open(format=pyaudio.paFloat32, channels=1,
+                    rate=sampleRate, input=True,
+                    input_device_index=deviceIndex,
+                    frames_per_buffer=hopSize,
+                    stream_callback=self.captureCallback)
+        else:
+            self.mic = self.pA.open(format=pyaudio.paFloat32, channels=1,
+                    rate=sampleRate, input=True,
+                    input_device_index=deviceIndex,
+                    frames_per_buffer=hopSize)
+        # The callbacks' timestamps are on the stream's clock, this turns them
+        # into time.monotonic()
+        self.clockOffset = time.monotonic() - self.mic.get_time()
+
+    # Runs on the PortAudio thread, so keep it to a copy into the ring
+    def captureCallback(self, inData, frameCount, timeInfo, statusFlags):
+        if statusFlags & self.pyaudio.paInputOverflow:
+            self.inputOverflows += 1
+        self.ring.write(num.frombuffer(inData, dtype=SAMPLE_TYPE))
+        self.markCaptured(frameCount, timeInfo)
+        return (None, self.pyaudio.paContinue)
+
+    def duplexCallback(self, inData, frameCount, timeInfo, statusFlags):
+        if statusFlags & self.pyaudio.paInputOverflow:
+            self.inputOverflows += 1
+        self.ring.write(num.frombuffer(inData, dtype=SAMPLE_TYPE))
+        self.markCaptured(frameCount, timeInfo)
+        return (self.output.render(frameCount), self.pyaudio.paContinue)
+
+    # PortAudio stamps the buffer with when its first frame hit the ADC.  Not
+    # every host API fills that in, and the clock offset isn't known until
+    # the stream is open, so fall back to now without them.
+    def markCaptured(self, frameCount, timeInfo):
+        adcTime = timeInfo.get('input_buffer_adc_time', 0) if timeInfo else 0
+        now = time.monotonic()
+        captured = now
+        if adcTime and self.clockOffset is not None:
+            # Some drivers' stamps run a little ahead, but the frames can't
+            # have been captured after they arrived
+            captured = min(now,
+                adcTime + self.clockOffset + frameCount / self.sampleRate)
+        self.captured = (self.ring.writeCount, captured)
+
+    def read(self):
+        if self.useCallback:
+            # Wait for the callback to deliver the next hop
+            while not self.interrupted:
+                if self.ring.waitFor(self.hopSize, READ_TIMEOUT):
+                    break
+            if self.interrupted:
+                return None
+            self.ring.read(self.samples)
+            self.lastHopTime = None
+            return self.samples
+        if self.interrupted:
+            return None
+        # View the bytes as the floats Aubio understands, without copying
+        data = self.mic.read(self.hopSize)
+        self.lastHopTime = time.monotonic()
+        return num.frombuffer(data, dtype=SAMPLE_TYPE)
+
+    def hopTime(self):
+        if self.lastHopTime is not None:
+            return self.lastHopTime
+        if self.captured is None:
+            return time.monotonic()
+        # Count back from the newest frame to the end of the hop just read
+        writeCount, captured = self.captured
+        return captured - (writeCount - self.ring.readCount) / self.sampleRate
+
+    def interrupt(self):
+        AudioSource.interrupt(self)
+        if self.useCallback:
+            # Wake a read() that's waiting on the ring
+            self.ring.dataReady.set()
+
+    def hopsBehind(self):
+        if self.useCallback:
+            return self.ring.hopsBehind()
+        return 0
+
+    def droppedFrames(self):
+        if self.useCallback:
+            return self.ring.overrunFrames
+        return 0
+
+    # Only call once nothing is reading any more.  Safe to call twice.
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.mic.stop_stream()
+        self.mic.close()
+        self.pA.terminate()
+
+def listInputDevices(pA = None):
+    """Returns (index, name) for every PortAudio device that can record.
+    Asks pA, a PyAudio already running, if given.  Otherwise PortAudio is
+    started up and shut down again just for this, which mustn't happen while
+    another thread is doing the same."""
+    owned = pA is None
+    if owned:
+        pyaudio = importPyaudio()
+        if pyaudio is None:
+            return []
+        pA = pyaudio.PyAudio()
+    devices = []
+    for i in range(pA.get_device_count()):
+        info = pA.get_device_info_by_index(i)
+        if info.get('maxInputChannels', 0) > 0:
+            devices.append((i, info.get('name', str(i))))
+    if owned:
+        pA.terminate()
+    return devices
+
+class ArraySource(AudioSource):
+    """Serve hops out of a signal already held in memory.
+
+    The signal is padded out to a whole number of hops once, then viewed as
+    a (hops, hopSize) array with stride tricks, so serving a hop never
+    copies.  With realtime set, each hop is held back until the moment it
+    would have finished arriving from a live input.  Otherwise hops are
+    served as fast as they are asked for.
+    """
+
+    def __init__(self, signal, hopSize, sampleRate, realtime = False):
+        AudioSource.__init__(self, hopSize, sampleRate)
+        signal = num.asarray(signal, dtype=SAMPLE_TYPE)
+        self.length = len(signal)
+        numHops = -(-self.length // hopSize)
+        if numHops * hopSize != self.length:
+            padded = self.allocBuffer(numHops * hopSize)
+            padded[:self.length] = signal
+            signal = padded
+        self.signal = num.ascontiguousarray(signal)
+        self.frames = num.lib.stride_tricks.as_strided(self.signal,
+            shape=(numHops, hopSize),
+            strides=(hopSize * self.signal.itemsize, self.signal.itemsize),
+            writeable=False)
+        self.realtime = realtime
+        self.hopIdx = 0
+        self.startTime = None
+
+    def read(self):
+        if self.interrupted or self.hopIdx >= len(self.frames):
+            return None
+        if self.realtime:
+            if self.startTime is None:
+                self.startTime = time.monotonic()
+            due = self.startTime + (self.hopIdx + 1) * self.hopSize / self.sampleRate
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        samples = self.frames[self.hopIdx]
+        self.hopIdx += 1
+        return samples
+
+    # In real time a hop is "captured" when it falls due
+    def hopTime(self):
+        if self.realtime and self.startTime is not None:
+            return self.startTime + self.hopIdx * self.hopSize / self.sampleRate
+        return time.monotonic()
+
+    def hopsBehind(self):
+        if not self.realtime or self.startTime is None:
+            return 0
+        ready = int((time.monotonic() - self.startTime) * self.sampleRate
+            / self.hopSize)
+        return max(0, ready - self.hopIdx)
+
+    # Seconds of audio served so far
+    def currentTime(self):
+        return min(self.hopIdx * self.hopSize, self.length) / self.sampleRate
+
+def loadAudioFile(path, sampleRate):
+    """Decode a WAV/OGG/etc file to a mono float32 array at sampleRate"""
+    import aubio
+    src = aubio.source(path, sampleRate, FILE_READ_SIZE)
+    chunks = []
+    while True:
+        samples, read = src()
+        chunks.append(num.array(samples[:read], dtype=SAMPLE_TYPE))
+        if read < FILE_READ_SIZE:
+            break
+    src.close()
+    return num.concatenate(chunks)
+
+class FileSource(ArraySource):
+    """Play back a recorded file, in real time or as fast as possible"""
+
+    def __init__(self, path, hopSize, sampleRate, realtime = True):
+        ArraySource.__init__(self, loadAudioFile(path, sampleRate), hopSize,
+            sampleRate, realtime)
+        self.path = path
+
+def synthNotes(notes, sampleRate, harmonics = (1.0, 0.5, 0.25),
+        amplitude = 0.3, noise = 0.0, seed = 0, decay = None):
+    """Render a list of (frequency, seconds) notes into one signal.
+
+    A frequency of 0 gives silence (plus any noise).  harmonics are the
+    relative amplitudes of the fundamental and its overtones.  With decay
+    set, each note is plucked: it starts at full amplitude and dies away with
+    that time constant in seconds, so repeated notes have audible attacks.
+    """
+    rng = num.random.default_rng(seed)
+    parts = []
+    for freq, seconds in notes:
+        t = num.arange(int(round(seconds * sampleRate))) / sampleRate
+        part = num.zeros(len(t))
+        if freq > 0:
+            for h, level in enumerate(harmonics):
+                part += level * num.sin(2 * num.pi * freq * (h + 1) * t)
+            part *= amplitude / sum(harmonics)
+            if decay:
+                part *= num.exp(-t / decay)
+        parts.append(part)
+    signal = num.concatenate(parts) if parts else num.zeros(0)
+    if noise > 0:
+        signal += rng.normal(0, noise, len(signal))
+    return signal.astype(SAMPLE_TYPE)
+
+class SignalSource(ArraySource):
+    """Synthesised test signal, see synthNotes for the parameters"""
+
+    def __init__(self, notes, hopSize, sampleRate, realtime = False, **synthArgs):
+        ArraySource.__init__(self, synthNotes(notes, sampleRate, **synthArgs),
+            hopSize, sampleRate, realtime)
+        self.notes = notes
@@ -14,894 +14,217 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import QTimer, Qt, QObject, QThread, pyqtSignal
 from PyQt5.QtGui import QPalette, QColor
 
-from pygame import mixer
-
-import aubio
-import numpy as num
-import pyaudio
 import sys
-from threading import Thread, Event
+from threading import Event
 import argparse
-import random
-import datetime
 import time
 
-NOTE_NAMES = 'C C# D D# E F F# G G# A A# B'.split()
-NUM_NOTES = 12
-
-# Track all the notes on a per-fret basis. <n>_NOTES will give you the note by
-# fret.  0 is open, 1 is first fret, etc.
-# ok, so there are more than 18 frets, but who's actually meedly meedlying up
-# in the stratosphere with the 24th fret?
-NUM_FRETS = 18
-G_NOTES = 'G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3 E3 F3 F#3 G3 G#3 A3 A#3 B3 C4 C#4'.split()
-D_NOTES = 'D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3 E3 F3 F#3 G3 G#3'.split()
-A_NOTES = 'A1 A#1 B1 C2 C#2 D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3'.split()
-E_NOTES = 'E1 F1 F#1 G1 G#1 A1 A#1 B1 C2 C#2 D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2'.split()
-B_NOTES = 'B0 C1 C#1 D1 D#1 E1 F1 F#1 G1 G#1 A1 A#1 B1 C2 C#2 D2 D#2 E2 E#2'.split()
-# String is mostly used to convert string number to name
-STRING_LIST = 'E A D G'.split()
-# String fret list is used to generate a random note on a random fret.
-# so [0][3] will give you the E string, fret 3, or an G1
-STRING_FRET_LIST = [E_NOTES, A_NOTES, D_NOTES, G_NOTES]
-SHAPE_NAMES = ['major 7', 'dom 7', 'minor 7', 'm7 flat 5']
-
-# The chord shape will give an offset from the root chord in [string][fret]
-# format.  For example, a C major 7 will contain the root note (C), then a note
-# one string up and one fret down (E) [1][-1], then a note one string up and
-# two strings down from the root (G): [1][2], then a note two strings up and
-# one string down (B): [2][1], and ending on a note two strings up and two
-# strings down (C): [2][2]
-
-MAJOR7_SHAPE = [[1,-1], [1,2], [2,1], [2,2]]
-DOM7_SHAPE = [[1,-1], [1,2], [2,0], [2,2]]
-MINOR7_SHAPE = [[1,-2], [1,2], [2,0], [2,2]]
-MINOR7FLAT5_SHAPE = [[1,-2], [1,1], [2,0], [2,2]]
-SHAPE_LIST = [MAJOR7_SHAPE, DOM7_SHAPE, MINOR7_SHAPE, MINOR7FLAT5_SHAPE]
-#I hate the way I did the above, so trying something new for Nashville
-
-# For major: 2 2 1 2 2 2 1
-#     minor: 2 1 2 2 1 2 2
-#     dim:   1 2 1 2 1 2 1
-MAJOR_SCALE_IDX = [2, 2, 1, 2, 2, 2, 1]
-MINOR_SCALE_IDX = [2, 1, 2, 2, 1, 2, 2]
-DIM_SCALE_IDX = [1, 2, 1, 2, 1, 2, 1]
-
-#whole whole half whole whole whole half
-SCALE_IDX = [2, 2, 1, 2, 2, 2, 1]
-#major, minor, minor, major, major, minor, dimninished, major
-NASH_SHAPE_IDX = ['major 7',
-                  'minor 7',
-                  'minor 7',
-                  'major 7',
-                  'major 7',
-                  'minor 7',
-                  'dom 7',
-                  'major 7']
-
-WRONG_SOUND = 'custWrong.ogg'
-RIGHT_SOUND = 'custRight.ogg'
-CLICK_SOUND = 'click.wav'
-HI_CLICK_SOUND = 'hiClick.ogg'
-LO_CLICK_SOUND = 'loClick.ogg'
-
-ROBOT = """
-~~~~~~~~~~BASSBOT~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-++-----------------------------|---------------------(x)-------+--------------++
-||  ,-.         \\.===./        |                     |         |     ( )      ||
-||--o  |:---|---| n n |--------|------------#(x)-----|---------|--------------||
-||    /     |)   \\_`_/         |    (x)      |       |         |              ||
-||---/---------.=(+++)=.-----(x)----|--------|-----------------|--------------||
-||  /    |  o="  (___)  "=o         |        |                 |              ||
-||-------|)------|_|_|--------------|--------------------------|--------------||
-||               /_|_\\                                         |              ||
-++-------------------------------------------------------------+--------------++
-~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-"""
-
-# some functions I found from a ukelele tuner app, all of which are based on
-# https://newt.phys.unsw.edu.au/jw/notes.html
-# These are used to convert frequencies to midi numbers and note names
-def freq_to_number(f): return 69 + 12*num.log2(f/440.0)
-def number_to_freq(n): return 440 * 2.0**((n-69)/12.0)
-def note_name(n): return NOTE_NAMES[n % 12] + str(int(n/12 - 1))
-
-# Some constants for setting the PyAudio capture and aubio note detection
-# parameters
-BUFFER_SIZE             = 4096
-CHANNELS                = 1
-FORMAT                  = pyaudio.paFloat32
-METHOD                  = "default"
-SAMPLE_RATE             = 44100
-HOP_SIZE                = BUFFER_SIZE//2
-PERIOD_SIZE_IN_FRAME    = HOP_SIZE
-
-# Given a note, ex "C", return its idx in NOTE_NAMES
-def getNoteIdx(note):
-    return NOTE_NAMES.index(note)
-
-# Takes in note index from NOTE_NAME, adds toAdd, and wraps around if
-# result is more than 11
-def addNotes(note, toAdd):
-    return (note + toAdd) % 12
-
-# Given a root, ex "C", a note, ex 3, and a scale list, ex MAJOR_SCALE_IDX,
-# return the note, ex "E" found at position <note> of that scale
-def getNoteOfScale(root, note, scaleList):
-    rootIdx = getNoteIdx(root)
-    offset = sum(scaleList[0:(note - 1)])
-    offset = addNotes(rootIdx, offset)
-    return NOTE_NAMES[offset]
-
-# Given a root, ex "C", and a scale list, ex MAJOR_SCALE_IDX, return a list of
-# strings representing the 1-3-5 arpeggio
-def getArpeggio(note, scaleList, arpList):
-    noteIdx = getNoteIdx(note)
-    retVal = []
-    for index in arpList:
-        retVal.append(getNoteOfScale(note, index, scaleList))
-    return retVal
-
-# Given a key, ex "C", and a Nashville number, get the arpeggio
-def getArpeggioFromScale(key, number, arpList = [1,3,5,3,1]):
-    chordType = NASH_SHAPE_IDX[number - 1]
-    root = getNoteOfScale(key, number, MAJOR_SCALE_IDX)
-    print("  " + root + " " + chordType)
-    if chordType == 'major 7':
-        return getArpeggio(root, MAJOR_SCALE_IDX, arpList)
-    elif chordType == 'minor 7':
-        return getArpeggio(root, MINOR_SCALE_IDX, arpList)
-    elif chordType == 'dom 7':
-        return getArpeggio(root, DIM_SCALE_IDX, arpList)
-    else:
-        print("unknown chord type: " + chordType)
-        return ['']
-
-class sessionInfo:
-    """Track performance statics through playing"""
-    numRight = 0
-    numWrong = 0
-    timeList = ''
-    level = 0
-
-    def __init__(self, level):
-        self.numRight = 0
-        self.numWrong = 0
-        self.timeList = ''
-        self.level = level
-
-class AudioHandler:
-    """Set up mic input, take samples when tick is called, provide freq and vol"""
-
-    def __init__(self):
-        print("1")
-         # Initiating PyAudio object.14
-        pA = pyaudio.PyAudio()
-        # Open the microphone stream.
-        print("2")
-        self.mic = pA.open(format=FORMAT, channels=CHANNELS,
-                rate=SAMPLE_RATE, input=True,
-                frames_per_buffer=PERIOD_SIZE_IN_FRAME)
-
-        print("3")
-        # Initiating Aubio's pitch detection object.
-        self.pDetection = aubio.pitch(METHOD, BUFFER_SIZE,
-            HOP_SIZE, SAMPLE_RATE)
-        # Set unit.
-        self.pDetection.set_unit("Hz")
-        # Frequency under -40 dB will considered
-        # as a silence.
-        self.pDetection.set_silence(-50)
-
-    def processAudio(self):
-        # Always listening to the microphone.
-        data = self.mic.read(PERIOD_SIZE_IN_FRAME)
-        # Convert into number that Aubio understand.
-        samples = num.fromstring(data,
-            dtype=aubio.float_type)
-        # Finally get the pitch.
-        pitch = self.pDetection(samples)[0]
-        # Compute the energy (volume)
-        # of the current frame.
-        volume = num.sum(samples**2)/len(samples)
-        return pitch, volume
-
-class levelConfig():
-    evaluateFxn = 0
-
-class freePlay():
-    """Exercise for playing in the right key for the right amount of time"""
-    def getInstructions(self):
-        if self.level == 1:
-            ret = "Level 1\n"
-            ret += "\tPlay any notes in the listed chord's arepggio for 2 bars,\n"
-            ret += "\tthen move to the next chord.\n\n"
-            ret += "Start the metronome to begin."
-            return ret
-        elif self.level == 2:
-            ret = "Level 2\n"
-            ret += "\tPlay any notes in the listed chord's scale for 2 bars,\n"
-            ret += "\tthen move to the next chord.\n\n"
-            ret += "Start the metronome to begin."
-            return ret
-        else:
-            return "There is no cow level"
-
-    def __init__(self, level = 1, lastNote = ''):
-        self.level = level
-        self.currentChord = ''
-        self.chordString = ''
-        self.chordList = []
-        self.chordIndex = -1
-        self.currentValid = []
-        self.ignoreNote = ''
-        self.rightSound = mixer.Sound(RIGHT_SOUND)
-        self.wrongSound = mixer.Sound(WRONG_SOUND)
-
-        self.setNewGoal()
-        self.status = ''
-
-    def advanceChord(self):
-        self.chordIndex += 1
-        if self.chordIndex >= len(self.chordList):
-            self.chordIndex = 0
-        self.updateSecondaryGoal()
-        self.currentChord = self.chordList[self.chordIndex]
-        if self.level == 1:
-            self.getArpeggios(self.currentChord)
-        else:
-            self.getScales(self.currentChord)
-
-    def set_volume(self, volume):
-        self.rightSound.set_volume(volume)
-        self.wrongSound.set_volume(volume)
-
-    def getStatus(self):
-        return self.status
-
-    def getGoal(self):
-        return self.goal
-
-    def getSecondaryGoal(self):
-        return self.secondaryGoal
-
-################################################################################
-# M = Major 7th, print "^7" snince we have no triangle
-# D = Dominant 7th, print 7
-# m = minor 7th, print m7
-# b = minor 7th flat 5, print m7b5
-#
-# When chord is listed, all octaves of chord are acceptable (no hi/mid/lo)
-################################################################################
-
-    def updateSecondaryGoal(self):
-        if (self.chordIndex >= 0):
-            self.secondaryGoal = "................."
-            for i in range(self.chordIndex):
-                self.secondaryGoal += "............."
-        else:
-            self.secondaryGoal = "......"
-        self.secondaryGoal += "*"
-
-
-    def setNewGoal(self):
-        #hard coding for now... eventually, we figure out how to random
-        self.chordList = ["CM", "Em", "FM", "GD"]
-        self.chordIndex = -1
-        self.currentChord = self.chordList[0]
-        if self.level == 1:
-            self.getArpeggios(self.currentChord)
-        else:
-            self.getScales(self.currentChord)
-
-        self.chordString = ''
-        for chord in self.chordList:
-            # first grab the note
-            self.chordString += chord[0]
-
-            #then get the human readable symbol
-            self.chordString += self.readableKey(chord[1]) + str("......")
-
-        self.goal = "Play:......" + self.chordString
-        self.updateSecondaryGoal()
-
-    def readableKey(self, keyCode):
-        if keyCode == "M":
-            return "^7"
-        elif keyCode == "D":
-            return " 7"
-        elif keyCode == "m":
-            return "m7"
-        elif keyCode == "b":
-            return "m7b5"
-        else:
-            return "ERRRRROR!"
-
-    # Set the current Valid list based on the current root chord.
-    # Root chord will be in the format CM, CD, Cm, Cb
-    def getArpeggios(self, root):
-        #Major:
-        # start with NOTE_NAMES, determine where root is.
-        # marjor arpeggio is 1 3 5 7 8
-        # indeces for scale: 0 2 4 5 7 9 11 12
-        #   whole whole half whole whole whole half
-        #   scale list will be rootIdx, rootIdx + 2, +4, +5, +7, +9, +11
-        #   arpeggio list will be rootIdx, +4, +7, +11
-        noteName = root[:-1]
-        keyCode = root[-1]
-        rootIdx = getNoteIdx(noteName)
-
-        print("rootidx: " + str(rootIdx))
-
-        self.currentValid = [noteName]
-        if keyCode == "M":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 11)]
-        elif keyCode == "D":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        elif keyCode == "m":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        elif keyCode == "b":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 6)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        else:
-            print("Error in getting arpeggios!!")
-
-    # Set the current Valid list based on the current root chord.
-    # Root chord will be in the format CM, CD, Cm, Cb
-    def getScales(self, root):
-        # Need to figure out all the options for this fella
-        noteName = root[:-1]
-        keyCode = root[-1]
-        rootIdx = getNoteIdx(noteName)
-
-        self.currentValid = [noteName]
-        if keyCode == "M":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 11)]
-        elif keyCode == "D":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        elif keyCode == "m":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        elif keyCode == "b":
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 6)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
-            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
-        else:
-            print("Error in getting scale notes!")
-
-    # return True if display needs to be updated based on evaluation
-    def evaluateNote(self, playedNote):
-        # if this is a note we're ignoring, do nothing
-        if (playedNote == self.ignoreNote):
-            return False
-
-        # if this is a mute note, clear the ignore list and do nothing
-        if playedNote == 'none':
-            self.ignoreNote = playedNote
-            return False
-
-        self.ignoreNote = playedNote
-        playedNote = playedNote[:-1]
-        root = playedNote[:-1]
-        goodNote = False
-        for note in self.currentValid:
-            if note == playedNote:
-                self.status = "Correct!"
-                return True
-
-        # If we are here, then a note is played that is not in the valid list
-        self.status = "Out of key!  heard " + str(playedNote) + "\n"
-        self.status += "expected one of: " + str(self.currentValid)
-        self.wrongSound.play()
-        return True
-
-class nashville():
-    """Handle instructions, goals, and evaluations for Nashville exercises"""
-    def getInstructions(self):
-        if self.level == 1:
-            return "Level 1: Play 1-3-5 of each chord in the key of Cmaj"
-        elif self.level == 2:
-            return "Level 2: Play the 1-3-5 on a random chord in the key of Cmaj"
-        elif self.level == 3:
-            return "Level 3: Play 1-3-5 of each chord in a random major key"
-        elif self.level == 4:
-            return "Level 4: Play 1-3-5 of a random chord in a random major key"
-        elif self.level == 5:
-            return "Level 5: Pizza time!"
-        else:
-            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
-            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
-
-    def __init__(self, level = 1, lastNote = ''):
-        self.level = level
-        self.toPlay = lastNote
-        self.ignoreNote = lastNote
-        self.numRight = 0
-        self.numWrong = 0
-        self.rightSound = mixer.Sound(RIGHT_SOUND)
-        self.wrongSound = mixer.Sound(WRONG_SOUND)
-
-        self.chordTones = []
-        for i in range(5):
-            self.chordTones.append('')
-        self.noteIdx = 0
-        self.numberIdx = 0
-
-        self.setNewGoal()
-        self.status = ''
-
-    def set_volume(self, volume):
-        self.rightSound.set_volume(volume)
-        self.wrongSound.set_volume(volume)
-
-    def getStatus(self):
-        return self.status
-
-    def getSecondaryGoal(self):
-        return self.secondaryGoal
-
-    def getGoal(self):
-        print("curr goal: " + self.goal)
-        return self.goal
-
-    def setNewGoal(self):
-        self.key = ''
-        self.secondaryGoal = ''
-        self.order = [1, 3, 5, 3, 1]
-        if self.level == 1:
-            self.key = 'C'
-            self.numbers = [1, 2, 3, 4, 5, 6, 7, 8]
-        elif self.level == 2:
-            self.key = 'C'
-            self.numbers = [1 + random.randrange(7)]
-        elif self.level == 3:
-            self.key = NOTE_NAMES[random.randrange(12)]
-            self.numbers = [1, 2, 3, 4, 5, 6, 7, 8]
-        elif self.level == 4:
-            self.key = NOTE_NAMES[random.randrange(12)]
-            self.numbers = [1 + random.randrange(7)]
-        elif self.level == 5:
-            print("PIZZA PIZZA")
-
-        self.goal = "Key of: " + self.key + "\n"
-        self.goal += "Play the " + str(self.numbers[0])
-
-        self.secondaryGoal += "Order: "
-        self.secondaryGoal += str(self.order[0]) + " "
-        self.noteIdx = 0;
-
-        self.numIdx = 0
-        currentChordType = NASH_SHAPE_IDX[self.numbers[self.numIdx]-1]
-        self.currentNumber = self.numbers[self.numIdx]
-        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber)
-        self.arpIdx = 0
-
-    def getArpFromIdx(self, arpIdx):
-        if arpIdx == 0:
-            return 1
-        elif arpIdx == 1:
-            return 3
-        elif arpIdx == 2:
-            return 5
-        elif arpIdx == 3:
-            return 3
-        elif arpIdx == 4:
-            return 1
-        return 9999
-
-    def evaluateNote(self, playedNote):
-        # if this is a note we're ignoring, do nothing
-        if (playedNote == self.ignoreNote):
-            return False
-
-        # if this is a mute note, clear the ignore list and do nothing
-        if playedNote == 'none':
-            self.ignoreNote = playedNote
-            return False
-
-        self.ignoreNote = playedNote
-        # Strip the number from the end of the ntoe
-        playedNote = playedNote[:-1]
-
-        self.toPlay = self.currentArp[self.arpIdx]
-        print("toPlay: " + str(self.toPlay))
-
-        if playedNote == self.toPlay:
-            self.numRight += 1
-            print("correct on idx" + str(self.arpIdx))
-            self.arpIdx += 1
-
-            if self.arpIdx >= len(self.currentArp):
-                # If that was the last note in the arpeggio, move to the next
-                # number
-                print("arp for note " + str(self.currentNumber) + " complete")
-                self.numIdx += 1
-                if self.numIdx >= len(self.numbers):
-                    # If that was the last number, exercise is done
-                    print("exercise complete!")
-                    self.setNewGoal()
-                    self.status = ""
-                    self.rightSound.play()
-                    return True
-                else:
-                    # Otherwise, reset arp idx and move to the next number
-                    self.rightSound.play()
-                    self.arpIdx = 0
-                    currentChordType = NASH_SHAPE_IDX[self.numbers[self.numIdx]-1]
-                    self.currentNumber = self.numbers[self.numIdx]
-                    if self.numIdx == 7:
-                        self.order = [1, 3, 5, 7, 8]
-                        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber, self.order)
-                    else:
-                        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber)
-                    self.arpIdx = 0
-                    self.goal += " " + str(self.currentNumber)
-                    self.secondaryGoal = "Order: 1"
-                    return True
-            else:
-                # If that was not the last note in the arpeggio, move to next
-                self.secondaryGoal += str(self.order[self.arpIdx]) + " "
-                print("update secondary goal?")
-                return True
-        else:
-            print("wrongzo!")
-            print("   expected " + str(self.toPlay))
-            print("   heard " + str(playedNote))
-
-            self.numWrong += 1
-            #self.status = str(self.getArpFromIdx(self.order[self.noteIdx])) + " WRONG!\n"
-            #self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
-            self.wrongSound.play()
-            return True
-
-class chordFinder():
-    """Handle instructions, goals, and evaluations for chordFinder exercises"""
-    def getInstructions(self):
-        if self.level == 1:
-            return "Level 1: Play a random chord shape arpeggio for a middle C"
-        elif self.level == 2:
-            return "Level 2: Play a random chord shape for a random root"
-        elif self.level == 3:
-            return "Level 3: Play a major 7 arpeggio for a middle C in a random order"
-        elif self.level == 4:
-            return "Level 4: Play a random chord shape for a middle C in a random order"
-        elif self.level == 5:
-            return "Level 5: Play a random chord shape for a random root in a random order"
-        else:
-            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
-            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
-
-    def __init__(self, level = 1, lastNote = ''):
-        self.level = level
-        self.toPlay = lastNote
-        self.ignoreNote = lastNote
-        self.numRight = 0
-        self.numWrong = 0
-        self.rightSound = mixer.Sound(RIGHT_SOUND)
-        self.wrongSound = mixer.Sound(WRONG_SOUND)
-
-        self.chordTones = []
-        for i in range(5):
-            self.chordTones.append('')
-        self.order = []
-        self.noteIdx = 0
-
-        self.setNewGoal()
-        self.status = ''
-
-    def set_volume(self, volume):
-        self.rightSound.set_volume(volume)
-        self.wrongSound.set_volume(volume)
-
-    def getStatus(self):
-        return self.status
-
-    def getSecondaryGoal(self):
-        return self.secondaryGoal
-
-    def getGoal(self):
-        return self.goal
-
-    def getArpFromIdx(self, arpNum):
-        if arpNum == 0:
-            return 1
-        elif arpNum == 1:
-            return 3
-        elif arpNum == 2:
-            return 5
-        elif arpNum == 3:
-            return 7
-        elif arpNum == 4:
-            return 8
-        else:
-            return 0
-
-    def setNewGoal(self):
-        string = 0
-        fret = 0
-        self.secondaryGoal = ''
-        if self.level == 1:
-            string = 0
-            fret = 8
-            self.order = [0, 1, 2, 3, 4, 3, 2, 1, 0]
-        elif self.level == 2:
-            # Must be string 0:1
-            # Must be fret 2:12, though 12th fret limit is a bit artificial
-            string = random.randrange(2)
-            fret = 2 + random.randrange(11)
-            self.order = [0, 1, 2, 3, 4, 3, 2, 1, 0]
-        elif self.level == 3:
-            string = 0
-            fret = 8
-            self.order = [0, 1, 2, 3, 4]
-            random.shuffle(self.order)
-        elif self.level == 4:
-            string = 0
-            fret = 8
-            self.order = [0, 1, 2, 3, 4]
-            random.shuffle(self.order)
-        elif self.level == 5:
-            string = random.randrange(2)
-            fret = 2 + random.randrange(11)
-            order = [0, 1, 2, 3, 4]
-            random.shuffle(self.order)
-
-        orderString = ''
-        for i in self.order:
-            orderString += str(self.getArpFromIdx(i)) + " "
-
-        # hi/lo/mid convention:
-        # low is anything from C1 to B1.  Mid is anything from C2 to B2.  High is
-        # anything from C3 to B3.  C4 and C#4 are the devil and don't exist.
-        # I'm not super happy with this, but... I can't think of a better way to do
-        # it, especially when we expand to support 5 string basses later
-        # While we're at it, lets strip the number off the chord name as well.
-        chordRoot = STRING_FRET_LIST[string][fret]
-        if chordRoot[-1] == '1':
-            prefix = 'low '
-            chordRoot = chordRoot[:-1]
-        elif chordRoot[-1] == '2':
-            prefix = 'mid '
-            chordRoot = chordRoot[:-1]
-        else:
-            prefix = 'high '
-            chordRoot = chordRoot[:-1]
-
-        # shape selection
-        if self.level == 3:
-            shape_num = 0
-        else:
-            shape_num = random.randrange(4)
-        shape = SHAPE_LIST[shape_num]
-
-        self.chordTones[0] = STRING_FRET_LIST[string][fret]
-        for i in range(1,5):
-            self.chordTones[i] = STRING_FRET_LIST[string+shape[i-1][0]][fret+shape[i-1][1]]
-
-        print(SHAPE_NAMES[shape_num] + " " + prefix + chordRoot)
-        self.goal = prefix + chordRoot + " " + SHAPE_NAMES[shape_num]
-        if (self.level >= 3):
-            print("order: " + orderString)
-            self.goal += "\norder: " + orderString
-
-        self.secondaryGoal += "play: "
-        self.secondaryGoal += str(self.getArpFromIdx(self.order[0])) + " "
-        self.noteIdx = 0;
-
-    def evaluateNote(self, playedNote):
-        # if this is a note we're ignoring, do nothing
-        if (playedNote == self.ignoreNote):
-            return False
-
-        # if this is a mute note, clear the ignore list and do nothing
-        if playedNote == 'none':
-            self.ignoreNote = playedNote
-            return False
-
-        self.toPlay = self.chordTones[self.order[self.noteIdx]]
-        self.ignoreNote = playedNote
-
-        if playedNote == self.toPlay:
-            self.numRight += 1
-            print("correct on " + str(self.getArpFromIdx(self.order[self.noteIdx])))
-
-            if self.noteIdx >= len(self.order) -1:
-                self.setNewGoal()
-                self.status = ""
-                print("Exercise complete!  Next note!")
-                self.rightSound.play()
-                return True
-            else:
-                self.noteIdx += 1
-                self.secondaryGoal += str(self.getArpFromIdx(self.order[self.noteIdx])) + " "
-                return True
-        else:
-            print("wrongzo!")
-            print("   expected " + str(self.toPlay))
-            print("   heard " + str(playedNote))
-
-            self.numWrong += 1
-            self.status = str(self.getArpFromIdx(self.order[self.noteIdx])) + " WRONG!\n"
-            self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
-            self.wrongSound.play()
-            return True
-
-class fretFinder():
-    """Handle instructions, goals, and evaluations for fretFinder exercises"""
-    def getInstructions(self):
-        if self.level == 1:
-            return "Level 1: Play the string listed!"
-        elif self.level == 2:
-            retVal = "Level 2: Play the note listed!\n"
-            return retVal + "  The answer will always be on one of the first 4 frets"
-        elif self.level == 3:
-            retVal = "Level 3: Play the note listed!"
-            return retVal + "  ... but we're sticking below 12 frets"
-        elif self.level == 4:
-            retVal = "Level 4: Play the note listed!"
-            return retVal + "  ... but we're sticking below " + str(NUM_FRETS) + " frets"
-        else:
-            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
-            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
-
-    def setNewGoal(self):
-        while self.toPlay == self.ignoreNote:
-            # Select a random string, 1-4
-            string = random.randrange(4)
-
-            # Select the fret for that string
-            if (self.level == 1):
-                fret = 0
-                prefix = ''
-            elif (self.level == 2):
-                fret = random.randrange(5)
-                prefix = ''
-            elif (self.level == 3):
-                fret = random.randrange(13)
-                # Any mode with fret 12 or higher in play needs a high/low prefix to
-                # differentiate between open string and the 12th+ fret
-                if fret >= 12:
-                    prefix = 'high '
-                else:
-                    prefix = 'low '
-            elif (self.level == 4):
-                fret = random.randrange(NUM_FRETS)
-                if fret >= 12:
-                    prefix = 'high '
-                else:
-                    prefix = 'low '
-            else:
-                print("dev made an oops- unknown level:" + str(self.level))
-                return 0
-
-            self.toPlay = STRING_FRET_LIST[string][fret]
-
-        self.goal = STRING_LIST[string] + " string: " + prefix + self.toPlay
-
-    def __init__(self, level = 1, lastNote = ''):
-        self.level = level
-        self.toPlay = lastNote
-        self.ignoreNote = lastNote
-        self.numRight = 0
-        self.numWrong = 0
-        self.rightSound = mixer.Sound(RIGHT_SOUND)
-        self.wrongSound = mixer.Sound(WRONG_SOUND)
-
-        self.secondaryGoal = ''
-        self.setNewGoal()
-        self.status = ''
-
-    def set_volume(self, volume):
-        self.rightSound.set_volume(volume)
-        self.wrongSound.set_volume(volume)
-
-    def getSecondaryGoal(self):
-        return self.secondaryGoal
-
-    def getStatus(self):
-        return self.status
-
-    def getGoal(self):
-        return self.goal
-
-    def evaluateNote(self, playedNote):
-        # if this is a note we're ignoring, do nothing
-        if (playedNote == self.ignoreNote):
-            return False
-
-        # if this is a mute note, clear the ignore list and do nothing
-        if playedNote == 'none':
-            self.ignoreNote = playedNote
-            return False
-
-        if playedNote == self.toPlay:
-            self.numRight += 1
-            print("correct!  played " + str(playedNote))
-            self.ignoreNote = playedNote
-            self.setNewGoal()
-            self.status = ''
-            self.rightSound.play()
-            return True
-        else:
-            print("wrongzo!")
-            print("   expected " + str(self.toPlay))
-            print("   heard " + str(playedNote))
-            self.ignoreNote = playedNote
-            self.numWrong += 1
-
-            self.status = "WRONG!\n"
-            self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
-            self.wrongSound.play()
-            return True
+from noteDetector import AudioHandler, NoteDetector, REFERENCE_A4, METHOD, \
+    SAMPLE_RATE, openInput
+from audioSource import listInputDevices
+from pitchEngine import engineNames
+from publisher import Publisher
+from latency import NoteTiming, LatencyStats
+from profiler import Profiler, TRACE_FILE, EMIT, DRAIN, EVALUATE, LABELS, TUNER
+from diagnostics import DiagnosticStream, viewLines
+from startup import StartupProfile
+from sessionStore import SessionStore, DEFAULT_PATH
+from analytics import PracticeStats, report
+from transport import Transport, TransportClock, ACCENT, BEAT, CHORD
+from exercises import freePlay, nashville, chordFinder, fretFinder, ROBOT
+from soundBank import soundBank, startSoundOutput, WRONG_SOUND, RIGHT_SOUND, \
+    CLICK_SOUND, HI_CLICK_SOUND, LO_CLICK_SOUND
+from outputEngine import OutputEngine
+
+# Sounds and clicks go out through an OutputEngine's own low latency stream,
+# or, if that can't be had, pygame's mixer
+USE_OUTPUT_ENGINE = True
+# How often the Diagnostics > Latency window updates
+LATENCY_REFRESH_MS = 500
+# and the Diagnostics > Input signal one
+SIGNAL_REFRESH_MS = 100
+
+# Open the output and decode every sound into the bank.  Slow enough (an output
+# device is opened, the sounds are decoded) that it runs off the GUI thread.
+# Returns the OutputEngine, or None if pygame's mixer is playing instead.
+def loadSounds():
+    engine = None
+    if USE_OUTPUT_ENGINE:
+        engine = OutputEngine()
+    return startSoundOutput(soundBank, engine)
+
+class StartupSignals (QObject):
+    # Name of a background startup job that has just finished
+    ready = pyqtSignal(str)
+
+class MetronomeSignals (QObject):
+    # Transport events the output engine doesn't play itself (chord changes),
+    # sent from the audio thread
+    event = pyqtSignal(str)
 
 class Worker (QObject):
     finished = pyqtSignal()
-    progress = pyqtSignal(str)
-    tuning = pyqtSignal(float)
+    # Tuner readings and note events wait in self.publisher, this just tells
+    # the GUI there's something to collect
+    updated = pyqtSignal()
+    # Calibration stage ("noise", "pluck", "done"), then what it found
+    calibrating = pyqtSignal(str)
+    calibrated = pyqtSignal(object)
+    # The input devices, as listInputDevices() gives them, once the input is
+    # open
+    devicesFound = pyqtSignal(object)
     confidenceLevel = 2
+    # Hz of the A4 everything is tuned to
+    referencePitch = REFERENCE_A4
+    # A StartupProfile to mark "audio ready", "calibrated", "first hop" and
+    # "first note" on
+    startup = None
+    # A profiler.Profiler to time every hop into, when profiling
+    profiler = None
+    # File to record every hop's diagnostics to, if any
+    recordPath = None
+
+    # source is any audioSource.AudioSource.  Left as None, the worker listens
+    # to the system input given by deviceIndex (or the default one).  A file
+    # or synthesised source lets the whole sampleNote -> reportNote path run
+    # without a microphone, and as fast as the machine allows when the source
+    # isn't real time.
+    def __init__(self, source = None, deviceIndex = None):
+        QObject.__init__(self)
+        self.source = source
+        self.deviceIndex = deviceIndex
+        self.publisher = Publisher(self.updated.emit)
+        self.aHandler = None
+        self.trace = None
+        # Every hop's readings, for Diagnostics > Input signal.  Made once
+        # the input is open.
+        self.stream = None
+        # Checked every hop.  Set by stop() to finish, or by restart() to move
+        # on to the settings it left in pendingRestart.
+        self.stopEvent = Event()
+        self.pendingRestart = None
+        # Live input gets calibrated before anything else.  Files and
+        # synthesised sources have no noise floor worth measuring.
+        self.calibrationRequested = source is None
 
     def run(self):
-        print("testing")
-        self.aHandler = AudioHandler()
-        self.resultList = []
+        self.stopEvent.clear()
+        if self.aHandler is None:
+            if self.profiler is not None:
+                self.trace = self.profiler.ring("worker")
+            self.aHandler = AudioHandler(self.source, deviceIndex=self.deviceIndex)
+            self.aHandler.trace = self.trace
+            self.detector = NoteDetector(self.confidenceLevel, self.referencePitch)
+            self.detector.trace = self.trace
+            self.stream = DiagnosticStream(self.aHandler.source.hopSize,
+                SAMPLE_RATE, self.recordPath)
+            if self.startup is not None:
+                self.startup.mark("audio ready")
+            # Asked of the input's own PortAudio where there is one, so
+            # PortAudio isn't started up again alongside the output's
+            self.devicesFound.emit(listInputDevices(
+                getattr(self.aHandler.source, 'pA', None)))
         while True:
-            self.sampleNote()
+            while not self.stopEvent.is_set() and self.sampleNote():
+                pass
+            settings = self.pendingRestart
+            self.pendingRestart = None
+            if settings is None:
+                break
+            self.stopEvent.clear()
+            self.switchStream(**settings)
+        # Only this thread ever reads the source, so it's the one to close it
+        self.aHandler.source.close()
+        self.stream.close()
         self.finished.emit()
 
+    # stop() and restart() are safe to call from the GUI thread.  Either one
+    # interrupts the source, so the worker notices within a hop even if it's
+    # waiting on input.
+    def stop(self):
+        self.pendingRestart = None
+        self.stopEvent.set()
+        if self.aHandler is not None:
+            self.aHandler.source.interrupt()
+
+    def restart(self, source = None, deviceIndex = None, method = None,
+            multiResolution = None):
+        """Switch to a new source, input device or pitch settings without
+        stopping the thread.  Anything left as None stays as it is, except
+        that with no source given the live input is reopened."""
+        self.pendingRestart = {'source': source, 'deviceIndex': deviceIndex,
+            'method': method, 'multiResolution': multiResolution}
+        self.stopEvent.set()
+        if self.aHandler is not None:
+            self.aHandler.source.interrupt()
+
+    # Runs on the worker thread, between streams.  The pitch engines are kept
+    # unless the new settings need different ones.
+    def switchStream(self, source, deviceIndex, method, multiResolution):
+        self.aHandler.source.close()
+        self.aHandler.configure(method, multiResolution)
+        if source is None:
+            if deviceIndex is not None:
+                self.deviceIndex = deviceIndex
+            source = openInput(self.aHandler.multiResolution, self.deviceIndex)
+            # A new device, or the same one after a settings change, gets
+            # measured again
+            self.calibrationRequested = True
+        self.source = source
+        self.aHandler.setSource(source)
+        self.detector = NoteDetector(self.confidenceLevel, self.referencePitch)
+        self.detector.trace = self.trace
+        self.stream.hopSize = source.hopSize
+        self.publisher.publishNote("none")
+
+    # Safe to call from the GUI thread, the worker picks it up between hops
+    def requestCalibration(self):
+        self.calibrationRequested = True
+
+    def calibrate(self):
+        self.calibrationRequested = False
+        calibration = self.aHandler.calibrate(self.calibrating.emit)
+        if calibration is not None:
+            if self.startup is not None:
+                self.startup.mark("calibrated")
+            self.calibrated.emit(calibration)
+
+    # Returns False once the audio source has run dry
     def sampleNote(self):
+        if self.calibrationRequested:
+            self.calibrate()
         result = self.aHandler.processAudio()
+        if result is None:
+            return False
         pitch = result[0]
         volume = result[1]
-        # Get note number and nearest note
-        if (pitch == 0.0):
-            name = "none"
-        else:
-            n = freq_to_number(pitch)
-            n0 = int(round(n))
-            name = note_name(n0)
-            tune = n - n0
-            self.tuning.emit(n-n0)
-
-        # Format the volume output so it only
-        # displays at most six numbers behind 0.
-        volume = "{:6f}".format(volume)
-        # Finally print the pitch and the volume.
-        # print(name + " " + str(pitch) + " " + str(volume))
-        # if we have confidenceLevel matches in a row, return this result
-        self.resultList.insert(0, name)
-        if len(self.resultList) >= self.confidenceLevel:
-            # Count the number of entires in the list.  If same as length, then
-            # the list all matches and we have hit enough confidence to return
-            # a note value. Otherwise, pop the last entry and continue
-            if (self.resultList.count(name) == len(self.resultList)):
-                self.progress.emit(name)
-                self.resultList = []
-            else:
-                self.resultList.pop()
+        onset = result[2]
+        name, tune, confirmed, attack = self.detector.addPitch(pitch, onset,
+            self.aHandler.tunePitch)
+        self.stream.addHop(self.aHandler, self.detector, pitch, volume, onset,
+            tune, confirmed, attack)
+        if self.trace is not None:
+            start = self.trace.clock()
+        if tune is not None:
+            self.publisher.publishTuning(tune)
+        if self.startup is not None and self.aHandler.hopCount == 1:
+            self.startup.mark("first hop")
+
+        if confirmed:
+            timing = None
+            if name != "none":
+                if self.startup is not None:
+                    self.startup.mark("first note")
+                # From the first hop that heard the note to now
+                handler = self.aHandler
+                timing = NoteTiming(
+                    handler.hopCaptureTime(self.detector.runLength() - 1),
+                    handler.hopCaptureTime(), handler.readTime,
+                    time.monotonic())
+            self.publisher.publishNote(name, attack, timing)
+        if self.trace is not None:
+            self.trace.record(EMIT, start)
+        return True
 
 ################################################################################
 # THIS IS AUTOGENERATED BY PYUIC5!!!
@@ -912,6 +235,18 @@ class Worker (QObject):
 # END PYUIC5 SECTION section.
 ################################################################################
 class Ui_BassBot(object):
+    # Set these before setupUi to time startup, and to print the report once
+    # the first note has been heard
+    startup = None
+    printStartupProfile = False
+    # Set profiler to a profiler.Profiler before setupUi to time the worker's
+    # and the GUI's handling of every hop, written to traceFile on exit
+    profiler = None
+    traceFile = TRACE_FILE
+    # Set sessionStore to a sessionStore.SessionStore before setupUi to keep
+    # every exercise's notes in the practice history
+    sessionStore = None
+
     def setupUi(self, BassBot):
         BassBot.setObjectName("BassBot")
         BassBot.resize(987, 417)
@@ -1144,53 +479,116 @@ class Ui_BassBot(object):
 ################################################################################
 #END PYUIC5 SECTION
 ################################################################################
+        # Everything slow happens in the background, so the window can show
+        # straight away: the worker opens the device and sets up the pitch
+        # engines on its own thread while the mixer starts and the sounds load
+        # on another.  Whatever needs a job's result waits for its ready
+        # signal.
+        if self.startup is None:
+            self.startup = StartupProfile()
+        self.startupSignals = StartupSignals()
+        self.startupSignals.ready.connect(self.startupJobReady)
+        # Handles play nothing until the bank has started, so they can be
+        # made, and the exercises built, without waiting for it
+        self.clickSound = soundBank.handle(CLICK_SOUND)
+        self.hiClickSound = soundBank.handle(HI_CLICK_SOUND)
+        self.loClickSound = soundBank.handle(LO_CLICK_SOUND)
+        self.rightSound = soundBank.handle(RIGHT_SOUND)
+        self.wrongSound = soundBank.handle(WRONG_SOUND)
+        self.outputEngine = None
+        self.startup.runInBackground("sounds", loadSounds,
+            self.startupSignals.ready.emit)
+
         # Set up the worker thread for note handling
         self.thread = QThread()
         self.worker = Worker()
+        self.worker.startup = self.startup
+        self.worker.profiler = self.profiler
+        self.trace = None
+        if self.profiler is not None:
+            self.trace = self.profiler.ring("gui")
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
         self.worker.finished.connect(self.thread.quit)
         self.worker.finished.connect(self.worker.deleteLater)
         self.worker.finished.connect(self.thread.deleteLater)
-        self.worker.progress.connect(self.reportNote)
-        self.worker.tuning.connect(self.reportTuning)
+        self.worker.updated.connect(self.deliverUpdates)
+        self.worker.calibrating.connect(self.reportCalibrating)
+        self.worker.calibrated.connect(self.reportCalibration)
+        self.worker.devicesFound.connect(self.fillDeviceMenu)
+
+        # Input calibration results live in the status bar, and can be rerun
+        # from the menu when the rig changes
+        self.calibrationLabel = QtWidgets.QLabel("Input not calibrated")
+        self.statusbar.addPermanentWidget(self.calibrationLabel)
+        self.inputMenu = self.menubar.addMenu("Input")
+        self.recalibrateAction = self.inputMenu.addAction("Recalibrate")
+        self.recalibrateAction.triggered.connect(self.worker.requestCalibration)
+        self.restartAction = self.inputMenu.addAction("Restart audio")
+        self.restartAction.triggered.connect(lambda: self.worker.restart())
+
+        # Switching device or pitch engine restarts the worker's stream, not
+        # the app.  The devices are filled in by the worker once the input is
+        # open.
+        self.deviceMenu = self.inputMenu.addMenu("Device")
+        self.deviceGroup = QtWidgets.QActionGroup(self.deviceMenu)
+        self.deviceMenu.addAction("Looking for devices...").setEnabled(False)
+        self.engineMenu = self.inputMenu.addMenu("Pitch engine")
+        self.engineGroup = QtWidgets.QActionGroup(self.engineMenu)
+        for name in engineNames():
+            action = self.engineMenu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(name == METHOD)
+            self.engineGroup.addAction(action)
+            action.triggered.connect(
+                lambda checked, m=name: self.worker.restart(method=m))
+        # How long notes take from the string to the screen, and a window to
+        # watch that in
+        self.latency = LatencyStats()
+        self.latencyDialog = None
+        self.diagnosticsMenu = self.menubar.addMenu("Diagnostics")
+        self.latencyAction = self.diagnosticsMenu.addAction("Latency")
+        self.latencyAction.triggered.connect(self.showLatency)
+        self.signalDialog = None
+        self.signalAction = self.diagnosticsMenu.addAction("Input signal")
+        self.signalAction.triggered.connect(self.showSignal)
+        # The practice history's report
+        self.practiceStats = None
+        self.historyDialog = None
+        if self.sessionStore is not None:
+            self.historyMenu = self.menubar.addMenu("History")
+            self.historyAction = self.historyMenu.addAction("Practice report")
+            self.historyAction.triggered.connect(self.showHistory)
         self.thread.start()
         print(ROBOT)
 
-        # Set up sounds
-        time.sleep(1)
-        mixer.init()
-        self.clickSound = mixer.Sound(CLICK_SOUND)
-        self.hiClickSound = mixer.Sound(HI_CLICK_SOUND)
-        self.loClickSound = mixer.Sound(LO_CLICK_SOUND)
-        self.rightSound = mixer.Sound(RIGHT_SOUND)
-        self.wrongSound = mixer.Sound(WRONG_SOUND)
-
-        # Set up the metronome
-        self.beatCount = 0
+        # Set up the metronome.  One transport places the clicks and, in free
+        # play, the chord changes, so they can't drift apart.  The timer is
+        # one shot, set each time for whenever the next beat is due.
+        # When the output engine is running, it advances the transport by the
+        # frames it plays and places the clicks itself.  Otherwise the
+        # transport clock and timer stand in for it.
+        self.transport = Transport(bpm=self.metroBpmDial.value())
+        self.transportClock = TransportClock(self.transport)
+        # The engine the metronome is running on, None when it's on the timer
+        self.metroEngine = None
+        self.metronomeSignals = MetronomeSignals()
+        self.metronomeSignals.event.connect(self.transportEvent)
         self.metroButton.clicked.connect(self.metroClicked)
         self.metroTimer = QTimer(timerType=Qt.PreciseTimer)
+        self.metroTimer.setSingleShot(True)
         self.metroTimer.timeout.connect(self.metroTimeout)
         self.metroIsPlaying = False
         self.metroBpmDial.valueChanged.connect(self.metroDialChanged)
 
-        # If we're in chord mode, then the metronome will also key off the
-        # chord transitions
-        self.chordTimer = QTimer(timerType=Qt.PreciseTimer)
-        self.chordTimer.timeout.connect(self.chordTimeout)
-
         # Handle the volume bar
         self.volumeSlider.valueChanged.connect(self.volumeChanged)
         self.volumeSlider.sliderReleased.connect(self.volumeReleased)
-        vol = self.volumeSlider.value() / 100.0
-        self.clickSound.set_volume(vol)
-        self.hiClickSound.set_volume(vol)
-        self.loClickSound.set_volume(vol)
-        self.rightSound.set_volume(vol)
-        self.wrongSound.set_volume(vol)
 
         # Set up the level configuration
         self.currentExercise = 0
+        # The exercise whose session the history has open
+        self.storedExercise = 0
         self.exerciseRadioTuner.clicked.connect(self.exerciseClicked)
         self.exerciseRadioFrets.clicked.connect(self.exerciseClicked)
         self.exerciseRadioChords.clicked.connect(self.exerciseClicked)
@@ -1203,6 +601,7 @@ class Ui_BassBot(object):
         self.levelRadio4.clicked.connect(lambda: self.levelClicked(4))
         self.levelRadio1.setChecked(True)
         self.exerciseClicked()
+        self.volumeChanged()
 
     def retranslateUi(self, BassBot):
         _translate = QtCore.QCoreApplication.translate
@@ -1235,6 +634,7 @@ class Ui_BassBot(object):
         #The tuner has no levels, do nothing
         if self.exerciseRadioTuner.isChecked():
             self.currentExercise = 0
+            self.exerciseChanged()
             return
 
         if self.exerciseRadioFrets.isChecked():
@@ -1251,6 +651,7 @@ class Ui_BassBot(object):
         self.secondaryGoalLabel.setText(self.currentExercise.getSecondaryGoal())
         self.currentStatusLabel.setText(self.currentExercise.getStatus())
         self.currentExercise.set_volume(self.volumeSlider.value() / 100.0)
+        self.exerciseChanged()
 
     def exerciseClicked(self):
         if self.levelRadio1.isChecked():
@@ -1272,11 +673,9 @@ class Ui_BassBot(object):
         else:
             if self.exerciseRadioFrets.isChecked():
                 self.currentExercise = fretFinder(level)
-                self.chordTimer.stop()
             elif self.exerciseRadioChords.isChecked():
                 self.currentExercise = chordFinder(level)
-                self.chordTimer.stop()
-                self.metroTimer.stop()
+                self.stopTransport()
                 self.metroIsPlaying = False
                 self.metroLabel.setText("metronome off")
             elif self.exerciseRadioNash.isChecked():
@@ -1289,6 +688,18 @@ class Ui_BassBot(object):
             self.currentGoalLabel.setText(self.currentExercise.getGoal())
             self.secondaryGoalLabel.setText(self.currentExercise.getSecondaryGoal())
             self.currentStatusLabel.setText("")
+        self.exerciseChanged()
+
+    # End the history's session for the exercise just left, and start one for
+    # the new exercise
+    def exerciseChanged(self):
+        if self.sessionStore is None:
+            return
+        if self.storedExercise != 0:
+            self.sessionStore.endSession(self.storedExercise.session)
+        self.storedExercise = self.currentExercise
+        if self.currentExercise != 0:
+            self.sessionStore.startSession(self.currentExercise.session)
 
     def volumeReleased(self):
         self.volumeChanged()
@@ -1300,6 +711,8 @@ class Ui_BassBot(object):
         self.clickSound.set_volume(vol)
         self.rightSound.set_volume(vol)
         self.wrongSound.set_volume(vol)
+        if self.outputEngine is not None:
+            self.outputEngine.clickVolume = vol
         if self.currentExercise != 0:
             self.currentExercise.set_volume(vol)
 
@@ -1310,48 +723,223 @@ class Ui_BassBot(object):
 
     def metroDialChanged(self):
         self.metroBpmLabel.setText("BPM: " + str(self.metroBpmDial.value()))
+        if self.metroEngine is not None:
+            self.metroEngine.setBpm(self.transport, self.metroBpmDial.value())
+            return
+        self.transport.setBpm(self.metroBpmDial.value())
+        if self.metroIsPlaying:
+            self.metroTimer.start(max(1, self.transportClock.msUntilNext()))
 
     def metroClicked(self):
         self.metroLabel.setText("button pressed!")
-        msDelay = int(60000.0/self.metroBpmDial.value())
 
         if self.metroIsPlaying == True:
             self.metroIsPlaying = False
-            self.metroTimer.stop()
-            self.chordTimer.stop()
+            self.stopTransport()
             if self.exerciseRadioFreePlay.isChecked():
                 self.currentExercise.setNewGoal()
                 self.secondaryGoalLabel.setText(self.currentExercise.getSecondaryGoal())
             self.metroLabel.setText("metronome off")
         else:
             self.metroIsPlaying = True
-            self.beatCount = 1
-            self.metroTimer.start(msDelay)
-            if self.exerciseRadioFreePlay.isChecked():
-                # Eventually, this will be based on time signature and num bars
-                # The first time, subtract one to count the init click
-                self.chordTimer.start((msDelay * 4) - 1)
-            self.hiClickSound.play()
+            self.metroEngine = self.outputEngine
+            if self.metroEngine is not None:
+                self.metroEngine.startTransport(self.transport, {
+                    ACCENT: soundBank.sound(HI_CLICK_SOUND),
+                    BEAT: soundBank.sound(LO_CLICK_SOUND)},
+                    self.metronomeSignals.event.emit)
+            else:
+                self.transportClock.start()
+                # Plays the first click straight away
+                self.metroTimeout()
             self.metroLabel.setText("metronome on")
 
+    def stopTransport(self):
+        if self.metroEngine is not None:
+            self.metroEngine.stopTransport()
+            self.metroEngine = None
+        self.metroTimer.stop()
+        self.transportClock.stop()
+
+    # A transport event from the output engine, on the GUI thread
+    def transportEvent(self, kind):
+        if kind == CHORD and self.metroIsPlaying:
+            self.chordTimeout()
+
+    # Play whatever the transport says is due, then sleep until the next beat
     def metroTimeout(self):
-        msDelay = int(60000.0/self.metroBpmDial.value())
-        self.beatCount += 1
-        if self.beatCount == 5:
-            self.beatCount = 1
-            self.hiClickSound.play()
-        else:
-            self.loClickSound.play()
-        self.metroTimer.start(msDelay)
+        for sample, kind in self.transportClock.poll():
+            if kind == ACCENT:
+                self.hiClickSound.play()
+            elif kind == BEAT:
+                self.loClickSound.play()
+            elif kind == CHORD:
+                self.chordTimeout()
+        if self.metroIsPlaying:
+            self.metroTimer.start(max(1, self.transportClock.msUntilNext()))
 
     def chordTimeout(self):
-        msDelay = int(60000.0/self.metroBpmDial.value())
-        self.chordTimer.start((msDelay * 4 * 2) - 1)
         if self.exerciseRadioFreePlay.isChecked():
             self.currentExercise.advanceChord()
             self.secondaryGoalLabel.setText(self.currentExercise.getSecondaryGoal())
 
+    # Runs on the GUI thread when a background startup job is done
+    def startupJobReady(self, name):
+        if name == "sounds":
+            if "sounds" in self.startup.errors:
+                print("Couldn't load sounds: " + str(self.startup.errors["sounds"]))
+                return
+            self.outputEngine = self.startup.results["sounds"]
+            self.volumeChanged()
+
+    # Stop the worker and wait for it to close the stream, so quitting never
+    # leaves PortAudio running
+    def shutdown(self):
+        self.worker.stop()
+        self.thread.quit()
+        self.thread.wait(2000)
+        if self.outputEngine is not None:
+            self.outputEngine.close()
+        if self.sessionStore is not None:
+            self.currentExercise = 0
+            self.exerciseChanged()
+            self.sessionStore.close()
+        if self.practiceStats is not None:
+            self.practiceStats.close()
+        if self.printStartupProfile:
+            print(self.startup.report())
+        if self.latency.count > 0:
+            print(self.latency.report())
+            print(self.worker.publisher.report())
+        if self.profiler is not None:
+            self.profiler.writeTrace(self.traceFile)
+            print(self.profiler.summary())
+            print("Trace written to " + self.traceFile)
+
+    # The latency report, refreshed while the window is open
+    def showLatency(self):
+        if self.latencyDialog is None:
+            self.latencyDialog = QtWidgets.QDialog(self.centralwidget.window())
+            self.latencyDialog.setWindowTitle("Note latency")
+            layout = QtWidgets.QVBoxLayout(self.latencyDialog)
+            self.latencyText = QtWidgets.QPlainTextEdit(self.latencyDialog)
+            self.latencyText.setReadOnly(True)
+            self.latencyText.setFont(
+                QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+            self.latencyText.setMinimumSize(520, 360)
+            layout.addWidget(self.latencyText)
+            self.latencyTimer = QTimer(self.latencyDialog)
+            self.latencyTimer.timeout.connect(self.refreshLatency)
+            self.latencyDialog.finished.connect(self.latencyTimer.stop)
+        self.refreshLatency()
+        self.latencyTimer.start(LATENCY_REFRESH_MS)
+        self.latencyDialog.show()
+        self.latencyDialog.raise_()
+
+    def refreshLatency(self):
+        self.latencyText.setPlainText(self.latency.report() + "\n\n"
+            + self.worker.publisher.report())
+
+    # What the detection is hearing, hop by hop, for checking a station's
+    # input without a debugger
+    def showSignal(self):
+        if self.signalDialog is None:
+            self.signalDialog = QtWidgets.QDialog(self.centralwidget.window())
+            self.signalDialog.setWindowTitle("Input signal")
+            layout = QtWidgets.QVBoxLayout(self.signalDialog)
+            self.signalText = QtWidgets.QPlainTextEdit(self.signalDialog)
+            self.signalText.setReadOnly(True)
+            self.signalText.setFont(
+                QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+            self.signalText.setMinimumSize(640, 120)
+            layout.addWidget(self.signalText)
+            self.signalTimer = QTimer(self.signalDialog)
+            self.signalTimer.timeout.connect(self.refreshSignal)
+            self.signalDialog.finished.connect(self.signalTimer.stop)
+        self.refreshSignal()
+        self.signalTimer.start(SIGNAL_REFRESH_MS)
+        self.signalDialog.show()
+        self.signalDialog.raise_()
+
+    def refreshSignal(self):
+        if self.worker.stream is None:
+            self.signalText.setPlainText("waiting for input...")
+            return
+        handler = self.worker.aHandler
+        self.signalText.setPlainText("\n".join(viewLines(self.worker.stream,
+            self.worker.confidenceLevel, handler.droppedFrames(),
+            handler.hopsBehind())))
+
+    # How practice is going: now against last session and all time, the
+    # trend, the fretboard, and time per level.  Brought up to date with the
+    # history each time it's shown.
+    def showHistory(self):
+        if self.historyDialog is None:
+            self.historyDialog = QtWidgets.QDialog(self.centralwidget.window())
+            self.historyDialog.setWindowTitle("Practice report")
+            layout = QtWidgets.QVBoxLayout(self.historyDialog)
+            self.historyText = QtWidgets.QPlainTextEdit(self.historyDialog)
+            self.historyText.setReadOnly(True)
+            self.historyText.setFont(
+                QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+            self.historyText.setMinimumSize(640, 480)
+            layout.addWidget(self.historyText)
+        if self.practiceStats is None:
+            self.practiceStats = PracticeStats(self.sessionStore.path,
+                self.sessionStore.user)
+        self.practiceStats.update()
+        exercise = None
+        session = None
+        if self.currentExercise != 0:
+            exercise = self.currentExercise.name
+            session = self.currentExercise.session.id
+        self.historyText.setPlainText(report(self.practiceStats, exercise,
+            session=session, heatmap=True))
+        self.historyDialog.show()
+        self.historyDialog.raise_()
+
+    def fillDeviceMenu(self, devices):
+        self.deviceMenu.clear()
+        for index, name in devices:
+            action = self.deviceMenu.addAction(name)
+            action.setCheckable(True)
+            self.deviceGroup.addAction(action)
+            action.triggered.connect(
+                lambda checked, i=index: self.worker.restart(deviceIndex=i))
+        if not devices:
+            self.deviceMenu.addAction("No input devices").setEnabled(False)
+
+    def reportCalibrating(self, stage):
+        if stage == "noise":
+            self.statusbar.showMessage("Calibrating: keep the strings quiet...")
+        elif stage == "pluck":
+            self.statusbar.showMessage("Calibrating: pluck any open string")
+        else:
+            self.statusbar.clearMessage()
+
+    def reportCalibration(self, calibration):
+        self.calibrationLabel.setText(calibration.describe())
+
+    # Catch up with everything the worker has published since last time.
+    # Notes go first, as the tuner reading is newer than any of them.
+    def deliverUpdates(self):
+        trace = self.trace
+        if trace is not None:
+            start = trace.clock()
+        tune, notes = self.worker.publisher.drain()
+        if trace is not None:
+            trace.record(DRAIN, start)
+        for note, attack, timing in notes:
+            self.reportNote(note, attack, timing)
+            if self.printStartupProfile and note != "none":
+                self.printStartupProfile = False
+                print(self.startup.report())
+        if tune is not None:
+            self.reportTuning(tune)
+
     def reportTuning(self, offby):
+        if self.trace is not None:
+            start = self.trace.clock()
         tuneString = '%+.1f'%(offby*100)
         self.TunerOffBy.setText(tuneString + " cents")
 
@@ -1364,9 +952,26 @@ class Ui_BassBot(object):
             tuneVal = 100
         self.tunerScrollBar.setProperty("value", int(tuneVal))
         self.tunerScrollBar.setSliderPosition(int(tuneVal))
+        if self.trace is not None:
+            self.trace.record(TUNER, start)
+
+
+    # timing, if given, is stamped as the note is handled and then added to
+    # the latency figures
+    def reportNote(self, note, attack = False, timing = None):
+        trace = self.trace
+        if trace is not None:
+            start = trace.clock()
+        if timing is not None:
+            timing.delivered = time.monotonic()
+        changed = False
+        if self.currentExercise != 0:
+            changed = self.currentExercise.evaluateNote(note, attack)
+        if timing is not None:
+            timing.evaluated = time.monotonic()
+        if trace is not None:
+            start = trace.record(EVALUATE, start)
 
-
-    def reportNote(self, note):
         self.TunerNote.setText("Note: " + str(note))
 
         if note == 'none':
@@ -1375,19 +980,44 @@ class Ui_BassBot(object):
             self.tunerScrollBar.setSliderPosition(50)
 
         if self.currentExercise != 0:
-            if self.currentExercise.evaluateNote(note):
+            if changed:
                 self.instructionsLabel.setText(self.currentExercise.getInstructions())
                 self.currentGoalLabel.setText(self.currentExercise.getGoal())
                 self.secondaryGoalLabel.setText(self.currentExercise.getSecondaryGoal())
             self.currentStatusLabel.setText(self.currentExercise.getStatus())
+        if trace is not None:
+            trace.record(LABELS, start)
+        if timing is not None:
+            timing.displayed = time.monotonic()
+            self.latency.add(timing)
 
 if __name__ == "__main__":
-    import sys
+    # Start the clock before Qt is even loaded up
+    startup = StartupProfile()
+    parser = argparse.ArgumentParser(description="bassBot")
+    parser.add_argument('--startup-profile', action='store_true',
+        help="print how long startup took, up to the first note heard")
+    parser.add_argument('--record', default=None, metavar='FILE',
+        help="record every hop's pitch, confidence, level and debounce state "
+        "to FILE, to look at with diagnostics.py")
+    parser.add_argument('--profile', nargs='?', const=TRACE_FILE,
+        metavar='TRACE', help="time every stage of the worker and the GUI, "
+        "and write a Chrome trace of it on exit (default " + TRACE_FILE + ")")
+    parser.add_argument('--history', default=DEFAULT_PATH, metavar='FILE',
+        help="keep every note the exercises judge in this practice history "
+        "(default " + DEFAULT_PATH + ")")
+    parser.add_argument('--no-history', action='store_true',
+        help="don't keep a practice history")
+    parser.add_argument('--user', default=None,
+        help="whose practice this is, in the history (default: the login "
+        "name)")
+    args, qtArgs = parser.parse_known_args()
 
     #pygame.init()
     #mixer.init()
 
-    app = QtWidgets.QApplication(sys.argv)
+    app = QtWidgets.QApplication(sys.argv[:1] + qtArgs)
+    startup.mark("qt ready")
 
     app.setStyle('Fusion') #Style needed for palette to work
     # Dark Palette (found on github, couldn't track the original author)
@@ -1410,6 +1040,19 @@ if __name__ == "__main__":
 
     BassBot = QtWidgets.QMainWindow()
     ui = Ui_BassBot()
+    ui.startup = startup
+    ui.printStartupProfile = args.startup_profile
+    if args.profile is not None:
+        ui.profiler = Profiler()
+        ui.traceFile = args.profile
+    Worker.recordPath = args.record
+    if not args.no_history:
+        ui.sessionStore = SessionStore(args.history, args.user)
     ui.setupUi(BassBot)
+    startup.mark("window built")
     BassBot.show()
-    sys.exit(app.exec_())
+    # The first thing the event loop does is paint the window
+    QTimer.singleShot(0, lambda: startup.mark("first frame"))
+    ret = app.exec_()
+    ui.shutdown()
+    sys.exit(ret)
@@ -0,0 +1,245 @@
+#! /usr/bin/python3
+
+# Score note detection over the whole fretboard.  Every fret of every string is
+# synthesised as a plucked bass note (a soft attack, overtones that die away
+# faster than the fundamental, a few cents out of tune, over a noise floor)
+# and run through the same AudioHandler and NoteDetector the worker uses, as
+# fast as the CPU allows.  For each note it reports whether it was detected,
+# whether a wrong note or the wrong octave was confirmed along the way, and
+# how long after the pluck the right note was first confirmed.
+#
+# Results can be saved as JSON, and a saved run compared against, so a DSP
+# change can be judged on numbers rather than by ear:
+#
+#   ./benchFretboard.py -o before.json
+#   ./benchFretboard.py --compare before.json
+#   ./benchFretboard.py -s E B --noise 0.01 --detune 20 -v
+
+import argparse
+import json
+import math
+import subprocess
+import time
+
+import numpy as num
+
+from audioSource import ArraySource, SAMPLE_TYPE
+from noteDetector import AudioHandler, NoteDetector, SAMPLE_RATE, METHOD, \
+    REFERENCE_A4, inputHopSize
+from notes import E_NOTES, A_NOTES, D_NOTES, G_NOTES, B_NOTES, name_to_number, \
+    number_to_freq
+from pitchEngine import engineNames
+
+STRINGS = {'B': B_NOTES, 'E': E_NOTES, 'A': A_NOTES, 'D': D_NOTES,
+    'G': G_NOTES}
+CONFIDENCE_LEVEL = 2
+
+# Relative levels of a bass string's fundamental and first overtones
+HARMONICS = (1.0, 0.7, 0.45, 0.3, 0.2, 0.1)
+# How stiff the string is.  Overtone h lands at h * f * sqrt(1 + B h^2)
+# rather than exactly h * f.
+INHARMONICITY = 0.0002
+# Seconds for the pluck to reach full level, and for a note to be damped
+ATTACK = 0.005
+RELEASE = 0.01
+
+def pluck(freq, seconds, sampleRate, rng, decay = 1.0, detuneCents = 0.0,
+        amplitude = 0.3):
+    """One plucked note, detuned by up to detuneCents either way.  Each
+    overtone starts at a random phase and dies away faster than the one
+    below it, so the tone darkens as it rings, as a real string's does."""
+    freq *= 2 ** (rng.uniform(-detuneCents, detuneCents) / 1200.0)
+    t = num.arange(int(round(seconds * sampleRate))) / sampleRate
+    signal = num.zeros(len(t))
+    for h, level in enumerate(HARMONICS, 1):
+        overtone = freq * h * math.sqrt(1 + INHARMONICITY * h * h)
+        if overtone >= sampleRate / 2:
+            break
+        signal += level * num.sin(2 * num.pi * overtone * t
+            + rng.uniform(0, 2 * num.pi)) * num.exp(-t * h / decay)
+    envelope = num.minimum(1.0, t / ATTACK)
+    envelope = num.minimum(envelope, (t[-1] - t) / RELEASE)
+    return signal * envelope * amplitude / sum(HARMONICS)
+
+def stringSignal(frets, args, rng):
+    """Every fret of one string in turn, each after a gap of silence.
+    Returns the signal and when each note starts, in seconds."""
+    gap = num.zeros(int(round(args.gap * SAMPLE_RATE)))
+    parts = []
+    starts = []
+    position = 0.0
+    for note in frets:
+        parts.append(gap)
+        position += args.gap
+        starts.append(position)
+        parts.append(pluck(number_to_freq(name_to_number(note), args.a4),
+            args.seconds, SAMPLE_RATE, rng, args.decay, args.detune))
+        position += args.seconds
+    signal = num.concatenate(parts)
+    signal += rng.normal(0, args.noise, len(signal))
+    return signal.astype(SAMPLE_TYPE), starts
+
+def detectNotes(signal, args):
+    """Every note confirmed, as (seconds into the signal, MIDI number, or
+    None for silence), using a fresh handler and detector"""
+    hopSize = inputHopSize(not args.single_resolution)
+    source = ArraySource(signal, hopSize, SAMPLE_RATE)
+    handler = AudioHandler(source, not args.single_resolution, args.engine)
+    detector = NoteDetector(CONFIDENCE_LEVEL, args.a4)
+    events = []
+    while True:
+        result = handler.processAudio()
+        if result is None:
+            break
+        pitch, volume, onset = result
+        name, tune, confirmed, attack = detector.addPitch(pitch, onset,
+            handler.tunePitch)
+        if confirmed:
+            # Confirmed once the whole hop is in
+            events.append((handler.hopCount * hopSize / SAMPLE_RATE,
+                None if name == "none" else name.number))
+    return events
+
+def scoreString(string, frets, args, rng):
+    signal, starts = stringSignal(frets, args, rng)
+    events = detectNotes(signal, args)
+    results = []
+    for fret, (note, start) in enumerate(zip(frets, starts)):
+        expected = name_to_number(note)
+        # A note has until the next one is plucked to be heard
+        end = start + args.seconds + args.gap
+        heard = [(t, n) for t, n in events if start <= t < end
+            and n is not None]
+        correct = [t for t, n in heard if n == expected]
+        results.append({
+            'string': string,
+            'fret': fret,
+            'note': str(note),
+            'detected': bool(correct),
+            'wrong': any(n != expected and (n - expected) % 12 != 0
+                for t, n in heard),
+            'octave': any(n != expected and (n - expected) % 12 == 0
+                for t, n in heard),
+            'firstCorrectMs': round((correct[0] - start) * 1000, 1)
+                if correct else None,
+        })
+    return results
+
+def summarise(results):
+    count = len(results)
+    times = [r['firstCorrectMs'] for r in results if r['detected']]
+    summary = {
+        'notes': count,
+        'detectionRate': sum(r['detected'] for r in results) / count,
+        'wrongRate': sum(r['wrong'] for r in results) / count,
+        'octaveRate': sum(r['octave'] for r in results) / count,
+    }
+    if times:
+        summary['firstCorrectMedianMs'] = float(num.median(times))
+        summary['firstCorrectP95Ms'] = float(num.percentile(times, 95))
+    return summary
+
+def gitCommit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short',
+            'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def printGrid(results, strings):
+    """One row per string: milliseconds to the first right note at each
+    fret, or what went wrong"""
+    print("%-3s" % "" + "".join("%6d" % fret for fret in range(len(B_NOTES))))
+    for string in strings:
+        cells = []
+        for r in results:
+            if r['string'] != string:
+                continue
+            if not r['detected']:
+                cells.append("oct" if r['octave'] else "miss")
+            elif r['wrong'] or r['octave']:
+                cells.append("%.0f*" % r['firstCorrectMs'])
+            else:
+                cells.append("%.0f" % r['firstCorrectMs'])
+        print("%-3s" % string + "".join("%6s" % cell for cell in cells))
+    print("ms from pluck to the right note, * a wrong note came first or "
+        "after, oct only the wrong octave heard")
+
+def printSummary(name, summary, previous = None):
+    print("%-10s detected %5.1f%%  wrong %5.1f%%  octave %5.1f%%  first "
+        "correct median %5.1f ms, p95 %5.1f ms" % (name,
+        100 * summary['detectionRate'], 100 * summary['wrongRate'],
+        100 * summary['octaveRate'], summary.get('firstCorrectMedianMs', 0),
+        summary.get('firstCorrectP95Ms', 0)))
+    if previous is None:
+        return
+    print("%-10s detected %+5.1f    wrong %+5.1f    octave %+5.1f    first "
+        "correct median %+5.1f ms, p95 %+5.1f ms" % ("  change",
+        100 * (summary['detectionRate'] - previous['detectionRate']),
+        100 * (summary['wrongRate'] - previous['wrongRate']),
+        100 * (summary['octaveRate'] - previous['octaveRate']),
+        summary.get('firstCorrectMedianMs', 0)
+            - previous.get('firstCorrectMedianMs', 0),
+        summary.get('firstCorrectP95Ms', 0)
+            - previous.get('firstCorrectP95Ms', 0)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score note detection on "
+        "synthesised notes over the whole fretboard")
+    parser.add_argument('-s', '--strings', nargs='+', default=list(STRINGS),
+        choices=list(STRINGS), help="strings to play (default: all five)")
+    parser.add_argument('-e', '--engine', default=METHOD,
+        choices=engineNames(), help="pitch engine")
+    parser.add_argument('--single-resolution', action='store_true',
+        help="use only the long window, as with MULTI_RESOLUTION off")
+    parser.add_argument('--a4', type=float, default=REFERENCE_A4)
+    parser.add_argument('--seconds', type=float, default=0.8,
+        help="how long each note rings before it is damped")
+    parser.add_argument('--gap', type=float, default=0.3,
+        help="silence before each note")
+    parser.add_argument('--decay', type=float, default=1.0,
+        help="time constant of the fundamental's decay, in seconds")
+    parser.add_argument('--detune', type=float, default=8.0,
+        help="notes are up to this many cents out of tune either way")
+    parser.add_argument('--noise', type=float, default=0.002,
+        help="standard deviation of the added white noise")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None,
+        help="save the results here as JSON")
+    parser.add_argument('--compare', default=None,
+        help="a saved run to show the change from")
+    parser.add_argument('-v', action='store_true',
+        help="show every fret of every string")
+    args = parser.parse_args()
+
+    rng = num.random.default_rng(args.seed)
+    start = time.perf_counter()
+    results = []
+    for string in args.strings:
+        results += scoreString(string, STRINGS[string], args, rng)
+    elapsed = time.perf_counter() - start
+    audioSeconds = len(results) * (args.seconds + args.gap)
+
+    previous = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    summaries = {'all': summarise(results)}
+    for string in args.strings:
+        summaries[string] = summarise([r for r in results
+            if r['string'] == string])
+    for name, summary in summaries.items():
+        printSummary(name, summary, previous.get('summary', {}).get(name))
+    if args.v:
+        printGrid(results, args.strings)
+    print("%.1f s of audio in %.1f s (%.0fx real time)" % (audioSeconds,
+        elapsed, audioSeconds / elapsed))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': gitCommit(),
+                'settings': vars(args),
+                'summary': summaries,
+                'notes': results,
+            }, f, indent=1)
@@ -0,0 +1,114 @@
+import numpy as num
+
+# Seconds of input, with the strings muted, the noise floor is measured over
+NOISE_SECONDS       = 1.0
+# Seconds to wait for a string to be plucked before giving up on it
+PLUCK_TIMEOUT       = 8.0
+# A hop this far above the noise floor is taken as the start of the pluck, and
+# the loudest hop over the following PLUCK_SECONDS is the pluck's level
+PLUCK_MARGIN_DB     = 20
+PLUCK_SECONDS       = 0.5
+# Silence sits this far above the noise floor, but never closer than
+# DECAY_RANGE_DB below the pluck, so a note can ring out that far before it's
+# cut off
+NOISE_MARGIN_DB     = 6
+DECAY_RANGE_DB      = 40
+# The quietest noise floor believed.  A digitally silent input measures as
+# -200 dB, which would put silence so low that nothing is ever gated.
+MIN_NOISE_DB        = -90
+# Input is scaled so a pluck comes out at this level (RMS, dB full scale),
+# within the gain limits
+TARGET_PLUCK_DB     = -20
+MIN_GAIN            = 0.1
+MAX_GAIN            = 30.0
+
+def energyDb(samples):
+    energy = num.dot(samples, samples) / len(samples)
+    if energy <= 0:
+        return -200.0
+    return 10 * num.log10(energy)
+
+class Calibration:
+    """What a Calibrator found, and the settings that follow from it.
+
+    silenceDb is the threshold after gain has been applied, which is the
+    level the detector sees.  pluckDb is None if nothing was plucked in
+    time, in which case the gain is left at 1.
+    """
+
+    def __init__(self, noiseDb, pluckDb):
+        noiseDb = max(noiseDb, MIN_NOISE_DB)
+        self.noiseDb = noiseDb
+        self.pluckDb = pluckDb
+        rawSilence = noiseDb + NOISE_MARGIN_DB
+        if pluckDb is None:
+            self.gain = 1.0
+        else:
+            rawSilence = min(rawSilence, pluckDb - DECAY_RANGE_DB)
+            self.gain = float(num.clip(10 ** ((TARGET_PLUCK_DB - pluckDb) / 20.0),
+                MIN_GAIN, MAX_GAIN))
+        self.silenceDb = rawSilence + 20 * num.log10(self.gain)
+
+    def describe(self):
+        text = "Noise %.0f dB" % self.noiseDb
+        if self.pluckDb is not None:
+            text += ", pluck %.0f dB" % self.pluckDb
+        else:
+            text += ", no pluck heard"
+        text += ", gain x%.2g, silence below %.0f dB" % (self.gain, self.silenceDb)
+        return text
+
+class Calibrator:
+    """Work out the noise floor and a plucked string's level from live input.
+
+    Feed it hops with addHop() until it returns True.  It spends
+    NOISE_SECONDS in the "noise" stage, where the strings should be quiet,
+    then waits in the "pluck" stage for a string to be plucked.
+    """
+
+    def __init__(self, hopSize, sampleRate):
+        self.hopSeconds = hopSize / float(sampleRate)
+        self.noiseHops = max(1, int(NOISE_SECONDS / self.hopSeconds))
+        self.pluckHops = max(1, int(PLUCK_SECONDS / self.hopSeconds))
+        self.timeoutHops = int(PLUCK_TIMEOUT / self.hopSeconds)
+        self.noiseLevels = num.zeros(self.noiseHops)
+        self.stage = "noise"
+        self.hopCount = 0
+        self.noiseDb = None
+        self.pluckDb = None
+        self.pluckStart = None
+
+    def addHop(self, samples):
+        level = energyDb(samples)
+        if self.stage == "noise":
+            self.noiseLevels[self.hopCount] = level
+            self.hopCount += 1
+            if self.hopCount == self.noiseHops:
+                # Near the top of the range, so the odd loud hop of hum
+                # doesn't count as music later
+                self.noiseDb = max(MIN_NOISE_DB,
+                    float(num.percentile(self.noiseLevels, 95)))
+                self.stage = "pluck"
+                self.hopCount = 0
+            return False
+
+        if self.stage == "pluck":
+            self.hopCount += 1
+            if self.pluckStart is None:
+                if level > self.noiseDb + PLUCK_MARGIN_DB:
+                    self.pluckStart = self.hopCount
+                    self.pluckDb = level
+                elif self.hopCount >= self.timeoutHops:
+                    self.stage = "done"
+            else:
+                self.pluckDb = max(self.pluckDb, level)
+                if self.hopCount - self.pluckStart >= self.pluckHops:
+                    self.stage = "done"
+        return self.stage == "done"
+
+    def result(self):
+        noiseDb = self.noiseDb
+        if noiseDb is None:
+            # Ran out of input before the noise stage finished
+            noiseDb = float(num.percentile(self.noiseLevels[:max(1, self.hopCount)], 95))
+        return Calibration(noiseDb, self.pluckDb)
@@ -0,0 +1,89 @@
+#! /usr/bin/python3
+
+# Race the pitch engines against each other.  Every note a four string bass can
+# fret (E1 to C#4) is synthesised and run through each engine, and the CPU time
+# per hop and the fraction of hops that name the right note are reported, so
+# the cheapest engine that is accurate enough can be picked for a station.
+#
+#   ./compareEngines.py
+#   ./compareEngines.py -e yin numpy-yin --noise 0.01 -v
+
+import argparse
+import time
+
+from audioSource import synthNotes
+from noteDetector import BUFFER_SIZE, MULTI_RESOLUTION, SAMPLE_RATE, \
+    inputHopSize
+from notes import BASS_NOTES, name_to_number, number_to_freq, freq_to_number
+from pitchEngine import makeEngine, engineNames
+
+def runEngine(name, notes, args):
+    cpuTime = 0.0
+    numHops = 0
+    counted = 0
+    right = 0
+    octave = 0
+    misses = []
+    # Hops before the engine's window has filled with the note aren't scored
+    warmup = args.buffer // args.hop
+    for note in notes:
+        expected = name_to_number(note)
+        signal = synthNotes([(number_to_freq(expected), args.seconds)],
+            args.rate, noise=args.noise, seed=expected)
+        engine = makeEngine(name, args.buffer, args.hop, args.rate)
+        noteRight = 0
+        noteCounted = 0
+        for i in range(len(signal) // args.hop):
+            hop = signal[i * args.hop:(i + 1) * args.hop]
+            start = time.process_time()
+            pitch = engine.getPitch(hop)
+            cpuTime += time.process_time() - start
+            numHops += 1
+            if i < warmup:
+                continue
+            noteCounted += 1
+            if pitch <= 0:
+                continue
+            heard = int(round(freq_to_number(pitch)))
+            if heard == expected:
+                noteRight += 1
+            elif (heard - expected) % 12 == 0:
+                octave += 1
+        counted += noteCounted
+        right += noteRight
+        if noteRight < noteCounted:
+            misses.append(note + " " + str(noteRight) + "/" + str(noteCounted))
+    return {
+        'engine': name,
+        'usPerHop': 1e6 * cpuTime / numHops,
+        'accuracy': right / counted,
+        'octaveErrors': octave / counted,
+        'misses': misses,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare pitch engines on "
+        "synthesised bass notes")
+    parser.add_argument('-e', '--engines', nargs='+', default=engineNames(),
+        choices=engineNames())
+    # The long window and the hop the live input is analysed with
+    parser.add_argument('--buffer', type=int, default=BUFFER_SIZE)
+    parser.add_argument('--hop', type=int,
+        default=inputHopSize(MULTI_RESOLUTION))
+    parser.add_argument('--rate', type=int, default=SAMPLE_RATE)
+    parser.add_argument('--seconds', type=float, default=0.5,
+        help="length of each test note")
+    parser.add_argument('--noise', type=float, default=0.002,
+        help="standard deviation of the added white noise")
+    parser.add_argument('-v', action='store_true',
+        help="list the notes each engine got wrong")
+    args = parser.parse_args()
+
+    results = [runEngine(name, BASS_NOTES, args) for name in args.engines]
+    results.sort(key=lambda r: r['usPerHop'])
+    print("%-10s %10s %9s %9s" % ("engine", "us/hop", "accuracy", "octave"))
+    for r in results:
+        print("%-10s %10.1f %8.1f%% %8.1f%%" % (r['engine'], r['usPerHop'],
+            100 * r['accuracy'], 100 * r['octaveErrors']))
+        if args.v and r['misses']:
+            print("    " + ", ".join(r['misses']))
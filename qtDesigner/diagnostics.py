@@ -0,0 +1,234 @@
+#! /usr/bin/python3
+
+# Hop by hop view of what the detection is hearing, for checking an input
+# (a bad cable, a pickup turned down, a noisy interface) without a debugger.
+#
+# A DiagnosticStream keeps every hop's pitch, confidence, cents, level and
+# debounce state in a ring, and can record them all to a file.  The live view
+# redraws a few lines in place from the ring, a few times a second, however
+# fast the hops come.  Run this module on a recording to summarise it:
+#
+#   ./diagnostics.py station3.diag
+
+import json
+import math
+import struct
+import sys
+
+import numpy as num
+
+# One hop.  note and held are MIDI numbers, -1 for none.
+HOP_RECORD = num.dtype([
+    ('time', '<f8'),        # when the hop was captured, time.monotonic()
+    ('pitch', '<f4'),       # Hz, 0 if there wasn't one
+    ('confidence', '<f4'),  # the pitch engine's, 0 to 1
+    ('note', '<i1'),        # the note the debounce is counting
+    ('cents', '<f4'),       # how far the pitch is off that note
+    ('rms', '<f4'),
+    ('db', '<f4'),
+    ('run', '<u1'),         # hops in a row that have agreed on note
+    ('held', '<i1'),        # the last note confirmed
+    ('flags', '<u1'),       # CONFIRMED | ATTACK | ONSET | GATED
+])
+CONFIRMED = 1
+ATTACK = 2
+ONSET = 4
+GATED = 8
+
+# Hops kept for the view, about 6 s of 1024 sample hops.  A multiple of
+# BLOCK_HOPS.
+RING_HOPS = 256
+# Hops written to a recording at a time
+BLOCK_HOPS = 64
+# Recordings start with MAGIC, then the length of a JSON header describing
+# them, then that header, then the raw HOP_RECORDs
+MAGIC = b"BASSDIAG"
+# Level meter range, dB
+METER_FLOOR_DB = -80.0
+METER_WIDTH = 32
+# Seconds of hops the view's statistics cover
+VIEW_SECONDS = 1.0
+
+class DiagnosticStream:
+    """Every hop's readings, the last RING_HOPS of them in memory and,
+    given a path, all of them on disk.  addHop() is called on the analysis
+    thread; a view can read the ring from any thread, it only ever looks at
+    finished rows."""
+
+    def __init__(self, hopSize, sampleRate, recordPath = None):
+        self.hopSize = hopSize
+        self.sampleRate = sampleRate
+        self.hops = num.zeros(RING_HOPS, dtype=HOP_RECORD)
+        self.count = 0
+        self.record = None
+        if recordPath is not None:
+            self.record = open(recordPath, 'wb')
+            header = json.dumps({'version': 1, 'hopSize': hopSize,
+                'sampleRate': sampleRate,
+                'dtype': HOP_RECORD.descr}).encode()
+            self.record.write(MAGIC + struct.pack('<I', len(header)) + header)
+            self.written = 0
+
+    def addHop(self, handler, detector, pitch, volume, onset, tune,
+            confirmed, attack):
+        tracker = detector.tracker
+        note = tracker.candidate
+        if note is None:
+            note = -1
+        held = tracker.held
+        if held is None:
+            held = -1
+        flags = 0
+        if confirmed:
+            flags |= CONFIRMED
+        if attack:
+            flags |= ATTACK
+        if onset:
+            flags |= ONSET
+        if handler.gated():
+            flags |= GATED
+        db = 10 * math.log10(volume) if volume > 0 else -200.0
+        self.hops[self.count % RING_HOPS] = (handler.hopCaptureTime(), pitch,
+            handler.confidence(), note, num.nan if tune is None else tune * 100,
+            math.sqrt(volume), db, min(tracker.runLength, 255), held, flags)
+        self.count += 1
+        if self.record is not None and self.count % BLOCK_HOPS == 0:
+            self.flushBlock(self.count)
+
+    def flushBlock(self, end):
+        # Anything older has been overwritten, but it's flushed long before
+        start = max(self.written, end - RING_HOPS)
+        first = start % RING_HOPS
+        last = first + end - start
+        if last <= RING_HOPS:
+            self.record.write(self.hops[first:last].tobytes())
+        else:
+            self.record.write(self.hops[first:].tobytes())
+            self.record.write(self.hops[:last - RING_HOPS].tobytes())
+        self.written = end
+
+    def close(self):
+        if self.record is None:
+            return
+        self.flushBlock(self.count)
+        self.record.close()
+        self.record = None
+
+    def recent(self, hops):
+        """The last hops hops (or fewer, if that many haven't happened yet),
+        oldest first"""
+        hops = min(hops, self.count, RING_HOPS)
+        end = self.count % RING_HOPS
+        if hops <= end:
+            return self.hops[end - hops:end]
+        return num.concatenate((self.hops[RING_HOPS - (hops - end):],
+            self.hops[:end]))
+
+def noteName(number):
+    from notes import note_name
+    return note_name(int(number)) if number >= 0 else "-"
+
+def meter(value, low, high, width):
+    filled = int(round(width * (value - low) / (high - low)))
+    filled = max(0, min(width, filled))
+    return "[" + "#" * filled + "." * (width - filled) + "]"
+
+def tuneMeter(cents, width):
+    """Where cents (-50 to 50) sits between the neighbouring notes"""
+    bar = ["-"] * width
+    bar[width // 2] = "|"
+    if not math.isnan(cents):
+        bar[int(round((cents + 50) / 100.0 * (width - 1)))] = "*"
+    return "[" + "".join(bar) + "]"
+
+def viewLines(stream, depth, dropped = 0, behind = 0):
+    """The live view, a few lines of text summing up the latest hop and the
+    last VIEW_SECONDS of them.  depth is the debounce's confidence level."""
+    seconds = stream.hopSize / float(stream.sampleRate)
+    window = stream.recent(max(1, int(VIEW_SECONDS / seconds)))
+    if len(window) == 0:
+        return ["waiting for input..."]
+    hop = window[-1]
+    voiced = window[window['pitch'] > 0]
+    lines = []
+    lines.append("%-4s %8.2f Hz  %+6.1f cents  %s" % (noteName(hop['note']),
+        hop['pitch'], 0.0 if num.isnan(hop['cents']) else hop['cents'],
+        tuneMeter(float(hop['cents']), 21)))
+    lines.append("level %6.1f dB %s  peak %6.1f  floor %6.1f dB" % (hop['db'],
+        meter(hop['db'], METER_FLOOR_DB, 0, METER_WIDTH), window['db'].max(),
+        window['db'].min()))
+    lines.append("confidence %.2f (mean %.2f voiced)  pitched %3.0f%%  "
+        "gated %3.0f%%" % (hop['confidence'],
+        voiced['confidence'].mean() if len(voiced) else 0.0,
+        100.0 * len(voiced) / len(window),
+        100.0 * num.count_nonzero(window['flags'] & GATED) / len(window)))
+    lines.append("debounce %-4s %d/%d  held %-4s  notes %d/s  hop %d  "
+        "behind %d  dropped %d" % (noteName(hop['note']), hop['run'], depth,
+        noteName(hop['held']),
+        num.count_nonzero(((window['flags'] & CONFIRMED) != 0)
+            & (window['note'] >= 0)) / VIEW_SECONDS,
+        stream.count, behind, dropped))
+    return lines
+
+class TerminalView:
+    """Draws viewLines() in place on a terminal, moving the cursor back up
+    over the previous drawing instead of scrolling"""
+
+    def __init__(self, stream, depth, out = sys.stdout):
+        self.stream = stream
+        self.depth = depth
+        self.out = out
+        self.drawn = 0
+
+    def draw(self, dropped = 0, behind = 0):
+        lines = viewLines(self.stream, self.depth, dropped, behind)
+        text = ""
+        if self.drawn:
+            text += "\x1b[%dF" % self.drawn
+        text += "".join(line + "\x1b[K\n" for line in lines)
+        self.out.write(text)
+        self.out.flush()
+        self.drawn = len(lines)
+
+def loadRecording(path):
+    """Returns the header and the HOP_RECORD array of a recording"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(path + " isn't a diagnostic recording")
+        length = struct.unpack('<I', f.read(4))[0]
+        header = json.loads(f.read(length).decode())
+        dtype = num.dtype([tuple(field) for field in header['dtype']])
+        hops = num.frombuffer(f.read(), dtype=dtype)
+    return header, hops
+
+def summarise(hops):
+    voiced = hops[hops['pitch'] > 0]
+    confirmed = hops[(hops['flags'] & CONFIRMED) != 0]
+    lines = ["%d hops over %.1f s" % (len(hops),
+        hops['time'][-1] - hops['time'][0] if len(hops) else 0.0)]
+    if len(hops) == 0:
+        return "\n".join(lines)
+    lines.append("level dB: floor (p5) %.1f, median %.1f, peak %.1f" % (
+        num.percentile(hops['db'], 5), num.median(hops['db']),
+        hops['db'].max()))
+    lines.append("pitched %.0f%% of hops, gated %.0f%%" % (
+        100.0 * len(voiced) / len(hops),
+        100.0 * num.count_nonzero(hops['flags'] & GATED) / len(hops)))
+    if len(voiced):
+        lines.append("confidence when pitched: median %.2f, p10 %.2f" % (
+            num.median(voiced['confidence']),
+            num.percentile(voiced['confidence'], 10)))
+        cents = voiced['cents'][~num.isnan(voiced['cents'])]
+        if len(cents):
+            lines.append("cents off: median %+.1f, spread (p90 - p10) %.1f" % (
+                num.median(cents),
+                num.percentile(cents, 90) - num.percentile(cents, 10)))
+    played = confirmed[confirmed['note'] >= 0]
+    lines.append("notes confirmed: %d (%d attacks)" % (len(played),
+        num.count_nonzero(played['flags'] & ATTACK)))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        header, hops = loadRecording(path)
+        print(path + ": " + summarise(hops))
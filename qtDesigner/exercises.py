@@ -0,0 +1,720 @@
+import random
+import time
+
+from notes import NOTE_NAMES, NUM_FRETS, STRING_LIST, STRING_FRET_LIST
+from theory import SHAPE_NAMES, SHAPE_LIST, getNoteIdx, addNotes, \
+    getArpeggioFromScale
+from soundBank import soundBank, RIGHT_SOUND, WRONG_SOUND
+
+# The exercises.  Nothing in here needs Qt, so the GUI (bassBui.py) and the
+# terminal front end (headless.py) share them.  Their sounds are handles on
+# the shared sound bank, so making an exercise never touches the disk.
+
+ROBOT = """
+~~~~~~~~~~BASSBOT~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+++-----------------------------|---------------------(x)-------+--------------++
+||  ,-.         \\.===./        |                     |         |     ( )      ||
+||--o  |:---|---| n n |--------|------------#(x)-----|---------|--------------||
+||    /     |)   \\_`_/         |    (x)      |       |         |              ||
+||---/---------.=(+++)=.-----(x)----|--------|-----------------|--------------||
+||  /    |  o="  (___)  "=o         |        |                 |              ||
+||-------|)------|_|_|--------------|--------------------------|--------------||
+||               /_|_\\                                         |              ||
+++-------------------------------------------------------------+--------------++
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+class sessionInfo:
+    """Track performance statics through playing.
+
+    Every exercise has one, and tells it about each note it judges.  The
+    response time is counted from the note judged before it, or from the
+    start of the session for the first.  Given a store (see
+    sessionStore.SessionStore.startSession) every note is saved there too.
+    """
+    numRight = 0
+    numWrong = 0
+    timeList = []
+    level = 0
+
+    def __init__(self, level, exercise = ''):
+        self.numRight = 0
+        self.numWrong = 0
+        # Response times, in ms
+        self.timeList = []
+        self.level = level
+        self.exercise = exercise
+        self.store = None
+        self.lastTime = time.monotonic()
+
+    # string and fret say where target is, if the exercise asked for it in a
+    # particular place
+    def addNote(self, target, played, correct, string = -1, fret = -1):
+        now = time.monotonic()
+        responseMs = (now - self.lastTime) * 1000
+        self.lastTime = now
+        self.timeList.append(responseMs)
+        if correct:
+            self.numRight += 1
+        else:
+            self.numWrong += 1
+        if self.store is not None:
+            self.store.logNote(self, target, played, correct, responseMs,
+                string, fret)
+
+class levelConfig():
+    evaluateFxn = 0
+
+class freePlay():
+    """Exercise for playing in the right key for the right amount of time"""
+    name = 'freeplay'
+
+    def getInstructions(self):
+        if self.level == 1:
+            ret = "Level 1\n"
+            ret += "\tPlay any notes in the listed chord's arepggio for 2 bars,\n"
+            ret += "\tthen move to the next chord.\n\n"
+            ret += "Start the metronome to begin."
+            return ret
+        elif self.level == 2:
+            ret = "Level 2\n"
+            ret += "\tPlay any notes in the listed chord's scale for 2 bars,\n"
+            ret += "\tthen move to the next chord.\n\n"
+            ret += "Start the metronome to begin."
+            return ret
+        else:
+            return "There is no cow level"
+
+    def __init__(self, level = 1, lastNote = ''):
+        self.level = level
+        self.currentChord = ''
+        self.chordString = ''
+        self.chordList = []
+        self.chordIndex = -1
+        self.currentValid = []
+        self.ignoreNote = ''
+        self.rightSound = soundBank.handle(RIGHT_SOUND)
+        self.wrongSound = soundBank.handle(WRONG_SOUND)
+        self.session = sessionInfo(level, self.name)
+
+        self.setNewGoal()
+        self.status = ''
+
+    def advanceChord(self):
+        self.chordIndex += 1
+        if self.chordIndex >= len(self.chordList):
+            self.chordIndex = 0
+        self.updateSecondaryGoal()
+        self.currentChord = self.chordList[self.chordIndex]
+        if self.level == 1:
+            self.getArpeggios(self.currentChord)
+        else:
+            self.getScales(self.currentChord)
+
+    def set_volume(self, volume):
+        self.rightSound.set_volume(volume)
+        self.wrongSound.set_volume(volume)
+
+    def getStatus(self):
+        return self.status
+
+    def getGoal(self):
+        return self.goal
+
+    def getSecondaryGoal(self):
+        return self.secondaryGoal
+
+################################################################################
+# M = Major 7th, print "^7" snince we have no triangle
+# D = Dominant 7th, print 7
+# m = minor 7th, print m7
+# b = minor 7th flat 5, print m7b5
+#
+# When chord is listed, all octaves of chord are acceptable (no hi/mid/lo)
+################################################################################
+
+    def updateSecondaryGoal(self):
+        if (self.chordIndex >= 0):
+            self.secondaryGoal = "................."
+            for i in range(self.chordIndex):
+                self.secondaryGoal += "............."
+        else:
+            self.secondaryGoal = "......"
+        self.secondaryGoal += "*"
+
+
+    def setNewGoal(self):
+        #hard coding for now... eventually, we figure out how to random
+        self.chordList = ["CM", "Em", "FM", "GD"]
+        self.chordIndex = -1
+        self.currentChord = self.chordList[0]
+        if self.level == 1:
+            self.getArpeggios(self.currentChord)
+        else:
+            self.getScales(self.currentChord)
+
+        self.chordString = ''
+        for chord in self.chordList:
+            # first grab the note
+            self.chordString += chord[0]
+
+            #then get the human readable symbol
+            self.chordString += self.readableKey(chord[1]) + str("......")
+
+        self.goal = "Play:......" + self.chordString
+        self.updateSecondaryGoal()
+
+    def readableKey(self, keyCode):
+        if keyCode == "M":
+            return "^7"
+        elif keyCode == "D":
+            return " 7"
+        elif keyCode == "m":
+            return "m7"
+        elif keyCode == "b":
+            return "m7b5"
+        else:
+            return "ERRRRROR!"
+
+    # Set the current Valid list based on the current root chord.
+    # Root chord will be in the format CM, CD, Cm, Cb
+    def getArpeggios(self, root):
+        #Major:
+        # start with NOTE_NAMES, determine where root is.
+        # marjor arpeggio is 1 3 5 7 8
+        # indeces for scale: 0 2 4 5 7 9 11 12
+        #   whole whole half whole whole whole half
+        #   scale list will be rootIdx, rootIdx + 2, +4, +5, +7, +9, +11
+        #   arpeggio list will be rootIdx, +4, +7, +11
+        noteName = root[:-1]
+        keyCode = root[-1]
+        rootIdx = getNoteIdx(noteName)
+
+        self.currentValid = [noteName]
+        if keyCode == "M":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 11)]
+        elif keyCode == "D":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        elif keyCode == "m":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        elif keyCode == "b":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 6)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        else:
+            print("Error in getting arpeggios!!")
+
+    # Set the current Valid list based on the current root chord.
+    # Root chord will be in the format CM, CD, Cm, Cb
+    def getScales(self, root):
+        # Need to figure out all the options for this fella
+        noteName = root[:-1]
+        keyCode = root[-1]
+        rootIdx = getNoteIdx(noteName)
+
+        self.currentValid = [noteName]
+        if keyCode == "M":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 11)]
+        elif keyCode == "D":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 4)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        elif keyCode == "m":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 7)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        elif keyCode == "b":
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 2)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 3)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 5)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 6)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 9)]
+            self.currentValid += NOTE_NAMES[addNotes(rootIdx, 10)]
+        else:
+            print("Error in getting scale notes!")
+
+    # return True if display needs to be updated based on evaluation
+    def evaluateNote(self, playedNote, attack = False):
+        # if this is a note we're ignoring, do nothing.  A fresh attack of the
+        # same note is a new note though.
+        if (playedNote == self.ignoreNote) and not attack:
+            return False
+
+        # if this is a mute note, clear the ignore list and do nothing
+        if playedNote == 'none':
+            self.ignoreNote = playedNote
+            return False
+
+        self.ignoreNote = playedNote
+        heard = playedNote
+        playedNote = playedNote[:-1]
+        for note in self.currentValid:
+            if note == playedNote:
+                self.status = "Correct!"
+                self.session.addNote(self.currentChord, heard, True)
+                return True
+
+        # If we are here, then a note is played that is not in the valid list
+        self.session.addNote(self.currentChord, heard, False)
+        self.status = "Out of key!  heard " + str(playedNote) + "\n"
+        self.status += "expected one of: " + str(self.currentValid)
+        self.wrongSound.play()
+        return True
+
+class nashville():
+    """Handle instructions, goals, and evaluations for Nashville exercises"""
+    name = 'nashville'
+
+    def getInstructions(self):
+        if self.level == 1:
+            return "Level 1: Play 1-3-5 of each chord in the key of Cmaj"
+        elif self.level == 2:
+            return "Level 2: Play the 1-3-5 on a random chord in the key of Cmaj"
+        elif self.level == 3:
+            return "Level 3: Play 1-3-5 of each chord in a random major key"
+        elif self.level == 4:
+            return "Level 4: Play 1-3-5 of a random chord in a random major key"
+        elif self.level == 5:
+            return "Level 5: Pizza time!"
+        else:
+            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
+            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
+
+    def __init__(self, level = 1, lastNote = ''):
+        self.level = level
+        self.toPlay = lastNote
+        self.ignoreNote = lastNote
+        self.numRight = 0
+        self.numWrong = 0
+        self.rightSound = soundBank.handle(RIGHT_SOUND)
+        self.wrongSound = soundBank.handle(WRONG_SOUND)
+        self.session = sessionInfo(level, self.name)
+
+        self.chordTones = []
+        for i in range(5):
+            self.chordTones.append('')
+        self.noteIdx = 0
+        self.numberIdx = 0
+
+        self.setNewGoal()
+        self.status = ''
+
+    def set_volume(self, volume):
+        self.rightSound.set_volume(volume)
+        self.wrongSound.set_volume(volume)
+
+    def getStatus(self):
+        return self.status
+
+    def getSecondaryGoal(self):
+        return self.secondaryGoal
+
+    def getGoal(self):
+        return self.goal
+
+    def setNewGoal(self):
+        self.key = ''
+        self.secondaryGoal = ''
+        self.order = [1, 3, 5, 3, 1]
+        if self.level == 1:
+            self.key = 'C'
+            self.numbers = [1, 2, 3, 4, 5, 6, 7, 8]
+        elif self.level == 2:
+            self.key = 'C'
+            self.numbers = [1 + random.randrange(7)]
+        elif self.level == 3:
+            self.key = NOTE_NAMES[random.randrange(12)]
+            self.numbers = [1, 2, 3, 4, 5, 6, 7, 8]
+        elif self.level == 4:
+            self.key = NOTE_NAMES[random.randrange(12)]
+            self.numbers = [1 + random.randrange(7)]
+
+        self.goal = "Key of: " + self.key + "\n"
+        self.goal += "Play the " + str(self.numbers[0])
+
+        self.secondaryGoal += "Order: "
+        self.secondaryGoal += str(self.order[0]) + " "
+        self.noteIdx = 0;
+
+        self.numIdx = 0
+        self.currentNumber = self.numbers[self.numIdx]
+        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber)
+        self.arpIdx = 0
+
+    def getArpFromIdx(self, arpIdx):
+        if arpIdx == 0:
+            return 1
+        elif arpIdx == 1:
+            return 3
+        elif arpIdx == 2:
+            return 5
+        elif arpIdx == 3:
+            return 3
+        elif arpIdx == 4:
+            return 1
+        return 9999
+
+    def evaluateNote(self, playedNote, attack = False):
+        # if this is a note we're ignoring, do nothing.  A fresh attack of the
+        # same note is a new note though.
+        if (playedNote == self.ignoreNote) and not attack:
+            return False
+
+        # if this is a mute note, clear the ignore list and do nothing
+        if playedNote == 'none':
+            self.ignoreNote = playedNote
+            return False
+
+        self.ignoreNote = playedNote
+        heard = playedNote
+        # Strip the number from the end of the ntoe
+        playedNote = playedNote[:-1]
+
+        self.toPlay = self.currentArp[self.arpIdx]
+        self.session.addNote(self.toPlay, heard, playedNote == self.toPlay)
+
+        if playedNote == self.toPlay:
+            self.numRight += 1
+            self.arpIdx += 1
+
+            if self.arpIdx >= len(self.currentArp):
+                # If that was the last note in the arpeggio, move to the next
+                # number
+                self.numIdx += 1
+                if self.numIdx >= len(self.numbers):
+                    # If that was the last number, exercise is done
+                    self.setNewGoal()
+                    self.status = ""
+                    self.rightSound.play()
+                    return True
+                else:
+                    # Otherwise, reset arp idx and move to the next number
+                    self.rightSound.play()
+                    self.arpIdx = 0
+                    self.currentNumber = self.numbers[self.numIdx]
+                    if self.numIdx == 7:
+                        self.order = [1, 3, 5, 7, 8]
+                        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber, self.order)
+                    else:
+                        self.currentArp = getArpeggioFromScale(self.key, self.currentNumber)
+                    self.arpIdx = 0
+                    self.goal += " " + str(self.currentNumber)
+                    self.secondaryGoal = "Order: 1"
+                    return True
+            else:
+                # If that was not the last note in the arpeggio, move to next
+                self.secondaryGoal += str(self.order[self.arpIdx]) + " "
+                return True
+        else:
+            self.numWrong += 1
+            #self.status = str(self.getArpFromIdx(self.order[self.noteIdx])) + " WRONG!\n"
+            #self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
+            self.wrongSound.play()
+            return True
+
+class chordFinder():
+    """Handle instructions, goals, and evaluations for chordFinder exercises"""
+    name = 'chords'
+
+    def getInstructions(self):
+        if self.level == 1:
+            return "Level 1: Play a random chord shape arpeggio for a middle C"
+        elif self.level == 2:
+            return "Level 2: Play a random chord shape for a random root"
+        elif self.level == 3:
+            return "Level 3: Play a major 7 arpeggio for a middle C in a random order"
+        elif self.level == 4:
+            return "Level 4: Play a random chord shape for a middle C in a random order"
+        elif self.level == 5:
+            return "Level 5: Play a random chord shape for a random root in a random order"
+        else:
+            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
+            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
+
+    def __init__(self, level = 1, lastNote = ''):
+        self.level = level
+        self.toPlay = lastNote
+        self.ignoreNote = lastNote
+        self.numRight = 0
+        self.numWrong = 0
+        self.rightSound = soundBank.handle(RIGHT_SOUND)
+        self.wrongSound = soundBank.handle(WRONG_SOUND)
+        self.session = sessionInfo(level, self.name)
+
+        self.chordTones = []
+        # (string, fret) of each chord tone
+        self.tonePositions = []
+        for i in range(5):
+            self.chordTones.append('')
+            self.tonePositions.append((-1, -1))
+        self.order = []
+        self.noteIdx = 0
+
+        self.setNewGoal()
+        self.status = ''
+
+    def set_volume(self, volume):
+        self.rightSound.set_volume(volume)
+        self.wrongSound.set_volume(volume)
+
+    def getStatus(self):
+        return self.status
+
+    def getSecondaryGoal(self):
+        return self.secondaryGoal
+
+    def getGoal(self):
+        return self.goal
+
+    def getArpFromIdx(self, arpNum):
+        if arpNum == 0:
+            return 1
+        elif arpNum == 1:
+            return 3
+        elif arpNum == 2:
+            return 5
+        elif arpNum == 3:
+            return 7
+        elif arpNum == 4:
+            return 8
+        else:
+            return 0
+
+    def setNewGoal(self):
+        string = 0
+        fret = 0
+        self.secondaryGoal = ''
+        if self.level == 1:
+            string = 0
+            fret = 8
+            self.order = [0, 1, 2, 3, 4, 3, 2, 1, 0]
+        elif self.level == 2:
+            # Must be string 0:1
+            # Must be fret 2:12, though 12th fret limit is a bit artificial
+            string = random.randrange(2)
+            fret = 2 + random.randrange(11)
+            self.order = [0, 1, 2, 3, 4, 3, 2, 1, 0]
+        elif self.level == 3:
+            string = 0
+            fret = 8
+            self.order = [0, 1, 2, 3, 4]
+            random.shuffle(self.order)
+        elif self.level == 4:
+            string = 0
+            fret = 8
+            self.order = [0, 1, 2, 3, 4]
+            random.shuffle(self.order)
+        elif self.level == 5:
+            string = random.randrange(2)
+            fret = 2 + random.randrange(11)
+            self.order = [0, 1, 2, 3, 4]
+            random.shuffle(self.order)
+
+        orderString = ''
+        for i in self.order:
+            orderString += str(self.getArpFromIdx(i)) + " "
+
+        # hi/lo/mid convention:
+        # low is anything from C1 to B1.  Mid is anything from C2 to B2.  High is
+        # anything from C3 to B3.  C4 and C#4 are the devil and don't exist.
+        # I'm not super happy with this, but... I can't think of a better way to do
+        # it, especially when we expand to support 5 string basses later
+        # While we're at it, lets strip the number off the chord name as well.
+        chordRoot = STRING_FRET_LIST[string][fret]
+        if chordRoot[-1] == '1':
+            prefix = 'low '
+            chordRoot = chordRoot[:-1]
+        elif chordRoot[-1] == '2':
+            prefix = 'mid '
+            chordRoot = chordRoot[:-1]
+        else:
+            prefix = 'high '
+            chordRoot = chordRoot[:-1]
+
+        # shape selection
+        if self.level == 3:
+            shape_num = 0
+        else:
+            shape_num = random.randrange(4)
+        shape = SHAPE_LIST[shape_num]
+
+        self.chordTones[0] = STRING_FRET_LIST[string][fret]
+        self.tonePositions[0] = (string, fret)
+        for i in range(1,5):
+            self.chordTones[i] = STRING_FRET_LIST[string+shape[i-1][0]][fret+shape[i-1][1]]
+            self.tonePositions[i] = (string+shape[i-1][0], fret+shape[i-1][1])
+
+        self.goal = prefix + chordRoot + " " + SHAPE_NAMES[shape_num]
+        if (self.level >= 3):
+            self.goal += "\norder: " + orderString
+
+        self.secondaryGoal += "play: "
+        self.secondaryGoal += str(self.getArpFromIdx(self.order[0])) + " "
+        self.noteIdx = 0;
+
+    def evaluateNote(self, playedNote, attack = False):
+        # if this is a note we're ignoring, do nothing.  A fresh attack of the
+        # same note is a new note though.
+        if (playedNote == self.ignoreNote) and not attack:
+            return False
+
+        # if this is a mute note, clear the ignore list and do nothing
+        if playedNote == 'none':
+            self.ignoreNote = playedNote
+            return False
+
+        self.toPlay = self.chordTones[self.order[self.noteIdx]]
+        self.ignoreNote = playedNote
+        string, fret = self.tonePositions[self.order[self.noteIdx]]
+        self.session.addNote(self.toPlay, playedNote,
+            playedNote == self.toPlay, string, fret)
+
+        if playedNote == self.toPlay:
+            self.numRight += 1
+
+            if self.noteIdx >= len(self.order) -1:
+                self.setNewGoal()
+                self.status = ""
+                self.rightSound.play()
+                return True
+            else:
+                self.noteIdx += 1
+                self.secondaryGoal += str(self.getArpFromIdx(self.order[self.noteIdx])) + " "
+                return True
+        else:
+            self.numWrong += 1
+            self.status = str(self.getArpFromIdx(self.order[self.noteIdx])) + " WRONG!\n"
+            self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
+            self.wrongSound.play()
+            return True
+
+class fretFinder():
+    """Handle instructions, goals, and evaluations for fretFinder exercises"""
+    name = 'frets'
+
+    def getInstructions(self):
+        if self.level == 1:
+            return "Level 1: Play the string listed!"
+        elif self.level == 2:
+            retVal = "Level 2: Play the note listed!\n"
+            return retVal + "  The answer will always be on one of the first 4 frets"
+        elif self.level == 3:
+            retVal = "Level 3: Play the note listed!"
+            return retVal + "  ... but we're sticking below 12 frets"
+        elif self.level == 4:
+            retVal = "Level 4: Play the note listed!"
+            return retVal + "  ... but we're sticking below " + str(NUM_FRETS) + " frets"
+        else:
+            print("DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!")
+            return "DEV MADE AN OOPS IN FRETFINDER, GETINSTRUCTIONS!!!!"
+
+    def setNewGoal(self):
+        while self.toPlay == self.ignoreNote:
+            # Select a random string, 1-4
+            string = random.randrange(4)
+
+            # Select the fret for that string
+            if (self.level == 1):
+                fret = 0
+                prefix = ''
+            elif (self.level == 2):
+                fret = random.randrange(5)
+                prefix = ''
+            elif (self.level == 3):
+                fret = random.randrange(13)
+                # Any mode with fret 12 or higher in play needs a high/low prefix to
+                # differentiate between open string and the 12th+ fret
+                if fret >= 12:
+                    prefix = 'high '
+                else:
+                    prefix = 'low '
+            elif (self.level == 4):
+                fret = random.randrange(NUM_FRETS)
+                if fret >= 12:
+                    prefix = 'high '
+                else:
+                    prefix = 'low '
+            else:
+                print("dev made an oops- unknown level:" + str(self.level))
+                return 0
+
+            self.toPlay = STRING_FRET_LIST[string][fret]
+            self.string = string
+            self.fret = fret
+
+        self.goal = STRING_LIST[string] + " string: " + prefix + self.toPlay
+
+    def __init__(self, level = 1, lastNote = ''):
+        self.level = level
+        self.toPlay = lastNote
+        self.ignoreNote = lastNote
+        self.numRight = 0
+        self.numWrong = 0
+        self.rightSound = soundBank.handle(RIGHT_SOUND)
+        self.wrongSound = soundBank.handle(WRONG_SOUND)
+        self.session = sessionInfo(level, self.name)
+        self.string = -1
+        self.fret = -1
+
+        self.secondaryGoal = ''
+        self.setNewGoal()
+        self.status = ''
+
+    def set_volume(self, volume):
+        self.rightSound.set_volume(volume)
+        self.wrongSound.set_volume(volume)
+
+    def getSecondaryGoal(self):
+        return self.secondaryGoal
+
+    def getStatus(self):
+        return self.status
+
+    def getGoal(self):
+        return self.goal
+
+    def evaluateNote(self, playedNote, attack = False):
+        # if this is a note we're ignoring, do nothing.  A fresh attack of the
+        # same note is a new note though.
+        if (playedNote == self.ignoreNote) and not attack:
+            return False
+
+        # if this is a mute note, clear the ignore list and do nothing
+        if playedNote == 'none':
+            self.ignoreNote = playedNote
+            return False
+
+        self.session.addNote(self.toPlay, playedNote,
+            playedNote == self.toPlay, self.string, self.fret)
+        if playedNote == self.toPlay:
+            self.numRight += 1
+            self.ignoreNote = playedNote
+            self.setNewGoal()
+            self.status = ''
+            self.rightSound.play()
+            return True
+        else:
+            self.ignoreNote = playedNote
+            self.numWrong += 1
+
+            self.status = "WRONG!\n"
+            self.status += str("expected " + str(self.toPlay) + ", heard " + str(playedNote))
+            self.wrongSound.play()
+            return True
@@ -0,0 +1,391 @@
+#! /usr/bin/python3
+
+# bassBot without a desktop.  Runs the same exercises as the GUI, prompting
+# and reporting in the terminal, so a practice station can be a small board
+# with a sound card and no display.  Qt is never imported, and pygame only if
+# the output engine can't be used.
+#
+#   ./headless.py                  tuner
+#   ./headless.py -l 2 -e chords   chord shapes, level 2
+#   ./headless.py -l 1 -v          fret finder, printing every note heard
+#   ./headless.py --vv             diagnostic: live view of the input signal
+#   ./headless.py --vv --record station3.diag
+
+import argparse
+import heapq
+from collections import deque
+import signal
+import sys
+import time
+
+from noteDetector import AudioHandler, NoteDetector, REFERENCE_A4, \
+    SAMPLE_RATE, MULTI_RESOLUTION, inputHopSize, openInput
+from audioSource import FileSource
+from exercises import freePlay, nashville, chordFinder, fretFinder, ROBOT
+from soundBank import soundBank, startSoundOutput, HI_CLICK_SOUND, \
+    LO_CLICK_SOUND
+from outputEngine import OutputEngine
+from transport import Transport, TransportClock, ACCENT, BEAT, CHORD
+from latency import NoteTiming, LatencyStats
+from profiler import Profiler, TRACE_FILE, EVALUATE
+from diagnostics import DiagnosticStream, TerminalView
+from sessionStore import SessionStore, DEFAULT_PATH
+
+EXERCISES = {
+    'frets': fretFinder,
+    'chords': chordFinder,
+    'nashville': nashville,
+    'freeplay': freePlay,
+}
+CONFIDENCE_LEVEL = 2
+DEFAULT_BPM = 120
+# The tuner line is redrawn at most this often
+TUNER_INTERVAL = 0.1
+# The diagnostic view is redrawn this often
+DIAGNOSTIC_INTERVAL = 0.1
+# Seconds between looks at the metronome's transport.  In practice it's looked
+# at once a hop, as the loop can't run timers any more often than that.
+TRANSPORT_POLL = 0.005
+
+class EventLoop:
+    """Audio analysis and timers, on one thread.
+
+    run() calls step() over and over (step reads and analyses one hop, which
+    waits for the input to have one ready) and fires any timers that have
+    come due in between.  Timers are only as punctual as a hop, a few tens
+    of milliseconds at worst.
+    """
+
+    def __init__(self, clock = time.monotonic):
+        self.clock = clock
+        # (due, sequence, interval, callback), soonest first
+        self.timers = []
+        self.sequence = 0
+        self.running = False
+
+    # Call callback every interval seconds, the first time after first
+    # seconds (or interval, if first is None)
+    def callEvery(self, interval, callback, first = None):
+        if first is None:
+            first = interval
+        self.sequence += 1
+        heapq.heappush(self.timers, (self.clock() + first, self.sequence,
+            interval, callback))
+
+    def cancelTimers(self):
+        self.timers = []
+
+    def runTimers(self):
+        now = self.clock()
+        while self.timers and self.timers[0][0] <= now:
+            due, sequence, interval, callback = heapq.heappop(self.timers)
+            # Rescheduled off when it was due, not when it ran, so a late hop
+            # doesn't push every later tick back.  If it's more than a whole
+            # interval late, it runs once rather than catching up.
+            due += interval
+            if due <= now:
+                due = now + interval
+            heapq.heappush(self.timers, (due, sequence, interval, callback))
+            callback()
+
+    # Returns once step() returns False or stop() is called
+    def run(self, step):
+        self.running = True
+        while self.running and step():
+            self.runTimers()
+
+    def stop(self):
+        self.running = False
+
+class Terminal:
+    """The headless counterpart of Ui_BassBot: feeds each hop through the
+    detector and prints what the GUI would show"""
+
+    def __init__(self, handler, exercise = None, verbose = False,
+            diagnostic = False, a4 = REFERENCE_A4, outputEngine = None):
+        self.handler = handler
+        self.detector = NoteDetector(CONFIDENCE_LEVEL, a4)
+        self.exercise = exercise
+        self.verbose = verbose
+        self.diagnostic = diagnostic
+        self.hiClickSound = soundBank.handle(HI_CLICK_SOUND)
+        self.loClickSound = soundBank.handle(LO_CLICK_SOUND)
+        self.loop = EventLoop()
+        self.outputEngine = outputEngine
+        self.transportClock = None
+        # Transport events the output engine passes back from its thread
+        self.transportEvents = deque()
+        self.latency = LatencyStats()
+        self.trace = None
+        # Every hop's readings, for the diagnostic view or a recording
+        self.stream = None
+        self.view = None
+        self.lastTunerLine = None
+        self.note = 'none'
+
+    def run(self):
+        if self.exercise is not None and not self.diagnostic:
+            print(self.exercise.getInstructions())
+            self.printGoal()
+        elif not self.diagnostic:
+            print("Play a note, use the tuner")
+        if self.view is not None:
+            self.loop.callEvery(DIAGNOSTIC_INTERVAL, self.drawView, 0)
+        try:
+            self.loop.run(self.step)
+        except KeyboardInterrupt:
+            pass
+        self.handler.source.close()
+        if self.view is not None:
+            self.drawView()
+        if self.stream is not None:
+            self.stream.close()
+        if self.outputEngine is not None:
+            self.outputEngine.close()
+        print()
+        if self.exercise is not None and hasattr(self.exercise, 'numRight'):
+            print("Right: %d, wrong: %d" % (self.exercise.numRight,
+                self.exercise.numWrong))
+        if self.verbose and self.latency.count > 0:
+            print(self.latency.report())
+
+    # Keep every hop's readings, and record them to recordPath if it's given.
+    # In diagnostic mode they're drawn in place of the exercise.
+    def startStream(self, recordPath = None):
+        self.stream = DiagnosticStream(self.handler.source.hopSize,
+            SAMPLE_RATE, recordPath)
+        if self.diagnostic:
+            self.view = TerminalView(self.stream, CONFIDENCE_LEVEL)
+
+    def drawView(self):
+        self.view.draw(self.handler.droppedFrames(), self.handler.hopsBehind())
+
+    # Time every stage of every hop into trace, a profiler.TraceRing
+    def setTrace(self, trace):
+        self.trace = trace
+        self.handler.trace = trace
+        self.detector.trace = trace
+
+    def calibrate(self):
+        calibration = self.handler.calibrate(self.reportCalibrating)
+        if calibration is not None:
+            print(calibration.describe())
+
+    def reportCalibrating(self, stage):
+        if stage == "noise":
+            print("Calibrating: keep the strings quiet...")
+        elif stage == "pluck":
+            print("Calibrating: pluck any open string")
+
+    # Clicks every beat, with the accent on the one.  In free play the chord
+    # moves on every two bars, starting a bar in, as in the GUI.
+    # The output engine plays the clicks itself, on the exact sample, and
+    # only chord changes come back here.  Without it, the transport runs off
+    # the clock and the clicks are played from here.
+    def startMetronome(self, bpm):
+        transport = Transport(bpm=bpm)
+        if self.outputEngine is not None:
+            self.outputEngine.startTransport(transport, {
+                ACCENT: soundBank.sound(HI_CLICK_SOUND),
+                BEAT: soundBank.sound(LO_CLICK_SOUND)},
+                self.transportEvents.append)
+        else:
+            self.transportClock = TransportClock(transport)
+            self.transportClock.start()
+        self.loop.callEvery(TRANSPORT_POLL, self.pollTransport, 0)
+
+    def pollTransport(self):
+        if self.transportClock is not None:
+            self.transportEvents.extend(kind for sample, kind
+                in self.transportClock.poll())
+        while self.transportEvents:
+            kind = self.transportEvents.popleft()
+            if kind == ACCENT:
+                self.hiClickSound.play()
+            elif kind == BEAT:
+                self.loClickSound.play()
+            elif kind == CHORD and isinstance(self.exercise, freePlay):
+                self.exercise.advanceChord()
+                self.printSecondaryGoal()
+
+    # One pass of the event loop, False once the input is done
+    def step(self):
+        result = self.handler.processAudio()
+        if result is None:
+            return False
+        pitch, volume, onset = result
+        name, tune, confirmed, attack = self.detector.addPitch(pitch, onset,
+            self.handler.tunePitch)
+        if self.stream is not None:
+            self.stream.addHop(self.handler, self.detector, pitch, volume,
+                onset, tune, confirmed, attack)
+        if self.diagnostic:
+            return True
+        if confirmed:
+            timing = None
+            if name != "none":
+                timing = NoteTiming(
+                    self.handler.hopCaptureTime(self.detector.runLength() - 1),
+                    self.handler.hopCaptureTime(), self.handler.readTime,
+                    time.monotonic())
+            self.reportNote(name, attack, timing)
+        if self.exercise is None and tune is not None:
+            self.reportTuning(tune)
+        return True
+
+    # Redraws one line in place rather than scrolling
+    def reportTuning(self, offby):
+        now = self.loop.clock()
+        if self.lastTunerLine is not None and \
+                now - self.lastTunerLine < TUNER_INTERVAL:
+            return
+        self.lastTunerLine = now
+        sys.stdout.write("\rNote: %-4s %+6.1f cents " % (self.note, offby * 100))
+        sys.stdout.flush()
+
+    # There's no thread to hand the note over to here, so timing's delivery
+    # stage is always nil
+    def reportNote(self, note, attack = False, timing = None):
+        self.note = note
+        if timing is not None:
+            timing.delivered = timing.evaluated = time.monotonic()
+        if self.exercise is None:
+            sys.stdout.write("\rNote: %-4s              " % note)
+            sys.stdout.flush()
+        else:
+            if self.verbose and note != 'none':
+                print("heard " + note + (" (attack)" if attack else ""))
+            status = self.exercise.getStatus()
+            if self.trace is not None:
+                start = self.trace.clock()
+            changed = self.exercise.evaluateNote(note, attack)
+            if self.trace is not None:
+                self.trace.record(EVALUATE, start)
+            if timing is not None:
+                timing.evaluated = time.monotonic()
+            if changed:
+                self.printGoal()
+            if self.exercise.getStatus() != status and self.exercise.getStatus():
+                print(self.exercise.getStatus())
+        if timing is not None:
+            timing.displayed = time.monotonic()
+            self.latency.add(timing)
+
+    def printGoal(self):
+        print(self.exercise.getGoal())
+        self.printSecondaryGoal()
+
+    def printSecondaryGoal(self):
+        if self.exercise.getSecondaryGoal():
+            print(self.exercise.getSecondaryGoal())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bassBot, in a terminal")
+    parser.add_argument('-l', '--level', type=int, default=0,
+        choices=range(5), help="exercise level, 0 for the tuner")
+    parser.add_argument('-e', '--exercise', default='frets',
+        choices=sorted(EXERCISES), help="exercise to run at levels 1-4")
+    parser.add_argument('-v', action='store_true', dest='verbose',
+        help="print every note heard, and how long notes took on exit")
+    parser.add_argument('--record', default=None, metavar='FILE',
+        help="record every hop's pitch, confidence, level and debounce state "
+        "to FILE, to look at with diagnostics.py")
+    parser.add_argument('--vv', action='store_true', dest='diagnostic',
+        help="ignore the level, show a live view of the input signal: pitch, "
+        "confidence, cents, level and debounce state")
+    parser.add_argument('-b', '--bpm', type=int, default=0,
+        help="run a metronome at this tempo (free play always has one, at "
+        + str(DEFAULT_BPM) + " unless set)")
+    parser.add_argument('--device', type=int, default=None,
+        help="input device index (default: the system input)")
+    parser.add_argument('--file', default=None,
+        help="play a recording in real time instead of listening")
+    parser.add_argument('--a4', type=float, default=REFERENCE_A4,
+        help="reference pitch of A4 in Hz")
+    parser.add_argument('--mute', action='store_true',
+        help="don't open an output, play no sounds")
+    parser.add_argument('--separate-output', action='store_true',
+        help="give sounds an output stream of their own, rather than sharing "
+        "a duplex stream with the input")
+    parser.add_argument('--no-calibrate', action='store_true',
+        help="skip measuring the noise floor and input level")
+    parser.add_argument('--profile', nargs='?', const=TRACE_FILE,
+        metavar='TRACE', help="time every stage of every hop, and write a "
+        "Chrome trace of it on exit (default " + TRACE_FILE + ")")
+    parser.add_argument('--history', default=DEFAULT_PATH, metavar='FILE',
+        help="keep every note the exercise judges in this practice history "
+        "(default " + DEFAULT_PATH + ")")
+    parser.add_argument('--no-history', action='store_true',
+        help="don't keep a practice history")
+    parser.add_argument('--user', default=None,
+        help="whose practice this is, in the history (default: the login "
+        "name)")
+    args = parser.parse_args()
+
+    print(ROBOT)
+    # Sounds share the input's stream where they can: one device open, one
+    # callback, and the lowest latency there is
+    duplex = args.file is None and not args.separate_output
+    engine = None
+    if not args.mute:
+        engine = startSoundOutput(soundBank, OutputEngine(),
+            openStream=not duplex)
+
+    source = None
+    if args.file is not None:
+        source = FileSource(args.file, inputHopSize(MULTI_RESOLUTION),
+            SAMPLE_RATE)
+    elif duplex and engine is not None:
+        try:
+            source = openInput(MULTI_RESOLUTION, args.device, engine)
+        except Exception as e:
+            print("No duplex stream (" + str(e) + "), opening output apart")
+            try:
+                engine.start()
+            except Exception as e:
+                # No output stream of its own either, so the sounds go
+                # through pygame after all
+                print("Not using the output engine (" + str(e) + ")")
+                engine.close()
+                soundBank.stop()
+                engine = startSoundOutput(soundBank)
+    # Stopping the station's service should wind down like Ctrl-C does.  This
+    # comes after any mixer starts, as SDL takes SIGTERM over for itself.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    handler = AudioHandler(source, deviceIndex=args.device)
+
+    exercise = None
+    if args.level > 0 and not args.diagnostic:
+        exercise = EXERCISES[args.exercise](args.level)
+    terminal = Terminal(handler, exercise, args.verbose, args.diagnostic,
+        args.a4, engine)
+    if args.diagnostic or args.record is not None:
+        terminal.startStream(args.record)
+    profiler = None
+    if args.profile is not None:
+        profiler = Profiler()
+        terminal.setTrace(profiler.ring("headless"))
+    if args.file is None and not args.no_calibrate:
+        try:
+            terminal.calibrate()
+        except KeyboardInterrupt:
+            handler.source.close()
+            sys.exit(1)
+
+    bpm = args.bpm
+    if bpm == 0 and isinstance(exercise, freePlay):
+        bpm = DEFAULT_BPM
+    if bpm > 0 and not args.diagnostic:
+        terminal.startMetronome(bpm)
+    store = None
+    if exercise is not None and not args.no_history:
+        store = SessionStore(args.history, args.user)
+        store.startSession(exercise.session)
+    terminal.run()
+    if store is not None:
+        store.endSession(exercise.session)
+        store.close()
+    if profiler is not None:
+        profiler.writeTrace(args.profile)
+        print(profiler.summary())
+        print("Trace written to " + args.profile)
@@ -0,0 +1,96 @@
+#! /usr/bin/python3
+
+# Check the core modules still import quickly, and without dragging the GUI or
+# audio libraries in with them.
+#
+# Each module is imported in a fresh interpreter, a few times over, and the
+# fastest import is held against its budget.  The exit status is non-zero if
+# any module is over budget or loaded something it shouldn't have, so this
+# can guard a build.
+#
+#   ./importBudget.py
+#   ./importBudget.py --runs 10 theory exercises
+#   ./importBudget.py --scale 2      (a slow board: double every budget)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Loaded by the GUI and the audio I/O, never by the core
+GUI_AND_AUDIO = ['PyQt5', 'pygame', 'aubio', 'pyaudio']
+# The theory and exercises don't even need numpy
+NO_NUMPY = GUI_AND_AUDIO + ['numpy']
+
+# Module: (milliseconds, packages it mustn't load).  The DSP modules' budgets
+# are mostly numpy's own import.
+BUDGETS = {
+    'notes':        (10, NO_NUMPY),
+    'theory':       (10, NO_NUMPY),
+    'exercises':    (20, NO_NUMPY),
+    'soundBank':    (10, NO_NUMPY),
+    'publisher':    (10, NO_NUMPY),
+    'sessionStore': (20, NO_NUMPY),
+    'calibration':  (150, GUI_AND_AUDIO),
+    'pitchEngine':  (150, GUI_AND_AUDIO),
+    'audioSource':  (150, GUI_AND_AUDIO),
+    'noteDetector': (200, GUI_AND_AUDIO),
+}
+RUNS = 5
+
+# Run in the child interpreter: time the import, then list which packages
+# ended up loaded
+MEASURE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds,
+    'loaded': sorted(set(name.split('.')[0] for name in sys.modules))}))
+"""
+
+def measureImport(module):
+    """Import module in a new interpreter, returns the seconds it took and
+    the top level packages loaded"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.check_output([sys.executable, '-c', MEASURE, module],
+        cwd=here)
+    result = json.loads(output.decode().splitlines()[-1])
+    return result['seconds'], set(result['loaded'])
+
+def checkBudget(module, runs, scale = 1.0):
+    """Returns (fastest import in ms, budget in ms, forbidden packages that
+    were loaded)"""
+    budgetMs, forbidden = BUDGETS[module]
+    fastest = None
+    loaded = set()
+    for i in range(runs):
+        seconds, loaded = measureImport(module)
+        if fastest is None or seconds < fastest:
+            fastest = seconds
+    return fastest * 1000, budgetMs * scale, sorted(loaded & set(forbidden))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the core modules "
+        "import within their time budgets")
+    parser.add_argument('modules', nargs='*', default=sorted(BUDGETS),
+        help="modules to check (default: all of them)")
+    parser.add_argument('--runs', type=int, default=RUNS,
+        help="imports per module, the fastest counts")
+    parser.add_argument('--scale', type=float, default=1.0,
+        help="multiply every budget by this")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        ms, budget, loaded = checkBudget(module, args.runs, args.scale)
+        verdict = "ok"
+        if ms > budget:
+            verdict = "OVER BUDGET"
+        if loaded:
+            verdict = "LOADED " + ", ".join(loaded)
+        failed = failed or verdict != "ok"
+        print("%-14s %7.1f ms  (budget %5.0f ms)  %s" % (module, ms, budget,
+            verdict))
+    sys.exit(1 if failed else 0)
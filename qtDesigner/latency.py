@@ -0,0 +1,119 @@
+import numpy as num
+
+# The stages a note goes through between the string being plucked and the
+# labels changing, in order.  They follow on from one another, so they add up
+# to "total".
+#   debounce   first hop of the note captured -> the hop that confirmed it
+#              captured (waiting for the confirming hops to arrive)
+#   capture    confirming hop captured -> the worker reading it (buffering)
+#   detection  worker read the hop -> note confirmed (pitch, naming, debounce)
+#   delivery   note confirmed -> the GUI thread picking it up
+#   evaluate   the exercise's evaluateNote
+#   display    updating the labels
+STAGES = ['debounce', 'capture', 'detection', 'delivery', 'evaluate', 'display',
+    'total']
+# Latencies kept per stage.  Older ones drop out, so the figures follow the
+# latest changes to the rig or the settings.
+WINDOW = 500
+# Histogram bin edges in milliseconds
+BIN_EDGES_MS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+# Budgets, in milliseconds, the 95th percentile of a stage should stay under.
+# Stages left out have no budget.
+BUDGET_MS = {
+    'detection': 5,
+    'delivery': 20,
+    'evaluate': 2,
+    'display': 5,
+    'total': 150,
+}
+
+class NoteTiming:
+    """When one note reached each point on its way to the screen.
+
+    Every time is in time.monotonic() seconds.  The worker fills in the
+    first four, the GUI the rest, as the note passes through.
+    """
+    __slots__ = ('pluck', 'captured', 'read', 'confirmed', 'delivered',
+        'evaluated', 'displayed')
+
+    def __init__(self, pluck, captured, read, confirmed):
+        self.pluck = pluck
+        self.captured = captured
+        self.read = read
+        self.confirmed = confirmed
+        self.delivered = None
+        self.evaluated = None
+        self.displayed = None
+
+    def stages(self):
+        """Seconds spent in each of STAGES"""
+        return [self.captured - self.pluck,
+            self.read - self.captured,
+            self.confirmed - self.read,
+            self.delivered - self.confirmed,
+            self.evaluated - self.delivered,
+            self.displayed - self.evaluated,
+            self.displayed - self.pluck]
+
+class LatencyStats:
+    """Rolling latencies, per stage, of the last WINDOW notes"""
+
+    def __init__(self, window = WINDOW, budgets = BUDGET_MS):
+        self.window = window
+        self.budgets = budgets
+        # One row per stage, in milliseconds, filled round and round
+        self.latencies = num.zeros((len(STAGES), window))
+        self.count = 0
+
+    def add(self, timing):
+        column = self.count % self.window
+        self.latencies[:, column] = timing.stages()
+        self.latencies[:, column] *= 1000
+        self.count += 1
+
+    def recent(self):
+        return self.latencies[:, :min(self.count, self.window)]
+
+    def percentiles(self, stage, points = (50, 95, 99)):
+        row = self.recent()[STAGES.index(stage)]
+        if len(row) == 0:
+            return [0.0] * len(points)
+        return list(num.percentile(row, points))
+
+    def histogram(self, stage):
+        """Notes per BIN_EDGES_MS bin, anything over the last edge counted in
+        the last bin"""
+        row = num.minimum(self.recent()[STAGES.index(stage)], BIN_EDGES_MS[-1])
+        return num.histogram(row, BIN_EDGES_MS)[0]
+
+    def overBudget(self):
+        """Stages whose 95th percentile is over budget"""
+        if self.count == 0:
+            return []
+        return [stage for stage in STAGES if stage in self.budgets and
+            self.percentiles(stage, [95])[0] > self.budgets[stage]]
+
+    def report(self):
+        notes = min(self.count, self.window)
+        lines = ["note latency over the last %d notes (ms):" % notes,
+            "  %-10s %7s %7s %7s %7s %7s" % ("stage", "p50", "p95", "p99",
+                "max", "budget")]
+        if notes == 0:
+            return "\n".join(lines)
+        over = self.overBudget()
+        for i, stage in enumerate(STAGES):
+            p50, p95, p99 = self.percentiles(stage)
+            budget = self.budgets.get(stage)
+            line = "  %-10s %7.1f %7.1f %7.1f %7.1f %7s" % (stage, p50, p95,
+                p99, self.recent()[i].max(),
+                "-" if budget is None else "%g" % budget)
+            if stage in over:
+                line += "  OVER"
+            lines.append(line)
+        lines.append("  total, notes per bin:")
+        counts = self.histogram('total')
+        for low, high, n in zip(BIN_EDGES_MS, BIN_EDGES_MS[1:], counts):
+            if n:
+                lines.append("    %4d-%-4d %s %d" % (low, high,
+                    "#" * int(40 * n / counts.max()), n))
+        return "\n".join(lines)
@@ -0,0 +1,578 @@
+import numpy as num
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audioSource import PyAudioSource, SAMPLE_TYPE
+from calibration import Calibrator
+from notes import freq_to_number, getNoteTable
+from pitchEngine import makeEngine
+from profiler import READ, CONVERT, VOLUME, PITCH, ONSET, NAMING, DEBOUNCE
+
+# Some constants for setting the PyAudio capture and aubio note detection
+# parameters
+BUFFER_SIZE             = 4096
+# Pitch engine, any of pitchEngine.engineNames(): the aubio methods ("default"
+# is yinfft) or the NumPy ones.  Run compareEngines.py to see how they trade
+# CPU time against accuracy on a given machine.
+METHOD                  = "default"
+SAMPLE_RATE             = 44100
+HOP_SIZE                = BUFFER_SIZE//2
+PERIOD_SIZE_IN_FRAME    = HOP_SIZE
+# When set, PortAudio pushes frames into a ring buffer from its own callback
+# thread instead of us blocking on mic.read, so slow analysis can't overflow
+# the input.  The ring holds RING_BUFFER_HOPS hops (~0.75s) before dropping.
+USE_CALLBACK_CAPTURE    = True
+RING_BUFFER_HOPS        = 16
+# Multi-resolution analysis.  The 4096 sample window is what resolves low E1
+# (41Hz), but at ~93ms it's wasted latency for notes further up the neck.  In
+# multi-resolution mode a short and a long window both run on every (shorter)
+# hop, and each pitch is taken from the shortest window that resolves it.
+MULTI_RESOLUTION        = True
+SHORT_BUFFER_SIZE       = BUFFER_SIZE//2
+SHORT_HOP_SIZE          = SHORT_BUFFER_SIZE//2
+# Only trust the short window for pitches that fit at least three periods in
+# it (~65Hz, so C2 and up)
+SHORT_WINDOW_MIN_FREQ   = 3.0 * SAMPLE_RATE / SHORT_BUFFER_SIZE
+# The long window's reading is only used once it stays within this many
+# semitones of its reading on the previous hop
+SETTLED_SEMITONES       = 0.25
+# and the short window's only once it's this close to the settled long one
+SHORT_AGREE_SEMITONES   = 0.3
+# Energy gate.  Hops quieter than GATE_DB skip the pitch engines and onset
+# detection entirely and report silence, once the input has been that quiet
+# for GATE_HOLD_MS.  The hold keeps the gate from chopping the tail off a
+# decaying note, and means the engines' windows hold nothing but near silence
+# by the time they stop being fed.
+ENERGY_GATE             = True
+GATE_DB                 = -50
+GATE_HOLD_MS            = 150
+# Capture times of the last HOP_HISTORY hops are kept, so a confirmed note can
+# be timed from the hop it started on
+HOP_HISTORY             = 64
+# Pitch of A4 in Hz that all the note names are tuned to
+REFERENCE_A4            = 440.0
+# A reading must be this many cents past the halfway point between two notes
+# before it stops counting as the note already being tracked
+HYSTERESIS_CENTS        = 15
+# With ADAPTIVE_DEPTH, a hop within BOUNDARY_CENTS of the halfway point needs
+# one more agreeing hop before its note is confirmed
+ADAPTIVE_DEPTH          = True
+BOUNDARY_CENTS          = 15
+# Onset detection.  An attack found by spectral flux restarts the stability
+# tracker, so the new note isn't held up by what was ringing before, and lets
+# a repeated note register again without a gap before it.
+ONSET_DETECTION         = True
+# A hop is an attack when its flux is this many times the recent average
+ONSET_THRESHOLD         = 3.0
+# Number of past hops the average flux is taken over
+ONSET_HISTORY           = 16
+# Flux is only measured below this frequency, where a bass's energy is
+ONSET_MAX_FREQ          = 2000
+# Two attacks closer together than this are taken as one
+ONSET_MIN_INTERVAL_MS   = 50
+# If the stability tracker hasn't confirmed a note this many hops after an attack, the
+# attack is dropped
+ONSET_CONFIRM_HOPS      = 3
+
+class OnsetDetector:
+    """Spectral flux onset detection.
+
+    The flux of a hop is how much the log magnitude spectrum has grown since
+    the previous hop, summed over the bins below ONSET_MAX_FREQ.  Unlike
+    aubio.onset there's no peak picking look-ahead, so an attack is flagged
+    on the hop it lands in rather than a couple of hops later.
+    """
+
+    def __init__(self, hopSize, sampleRate, silence = -50):
+        self.hopSize = hopSize
+        self.silence = silence
+        self.minHops = max(1, int(ONSET_MIN_INTERVAL_MS * sampleRate
+            / (1000.0 * hopSize)))
+        self.frame = num.zeros(2 * hopSize, dtype=SAMPLE_TYPE)
+        # Only the bins a bass's fundamentals and first few harmonics fall in
+        self.numBins = min(hopSize + 1,
+            int(ONSET_MAX_FREQ * 2 * hopSize / sampleRate) + 1)
+        # Those bins of the Hann windowed frame's DFT, as its real and
+        # imaginary parts, are the frame times these.  Working out just the
+        # bins needed into arrays made here means nothing is allocated per
+        # hop, as a full FFT would.
+        size = 2 * hopSize
+        window = num.hanning(size)
+        angles = 2 * num.pi * num.outer(num.arange(self.numBins),
+            num.arange(size)) / size
+        self.cosines = (num.cos(angles) * window).astype(SAMPLE_TYPE)
+        self.sines = (num.sin(angles) * window).astype(SAMPLE_TYPE)
+        self.real = num.zeros(self.numBins, dtype=SAMPLE_TYPE)
+        self.imaginary = num.zeros(self.numBins, dtype=SAMPLE_TYPE)
+        self.spectrum = num.zeros(self.numBins, dtype=SAMPLE_TYPE)
+        self.lastSpectrum = num.zeros(self.numBins, dtype=SAMPLE_TYPE)
+        self.growth = num.zeros(self.numBins, dtype=SAMPLE_TYPE)
+        self.history = num.zeros(ONSET_HISTORY)
+        self.historyIdx = 0
+        self.hopsSinceOnset = self.minHops
+
+    def pushHop(self, samples):
+        self.frame[:-self.hopSize] = self.frame[self.hopSize:]
+        self.frame[-self.hopSize:] = samples
+
+    # Keep the frame current through a hop the energy gate judged silent.
+    # Whatever comes after the silence is measured against an empty spectrum.
+    def skip(self, samples):
+        self.pushHop(samples)
+        self.lastSpectrum[:] = 0
+        self.hopsSinceOnset += 1
+
+    def detect(self, samples, volume):
+        self.pushHop(samples)
+        num.dot(self.cosines, self.frame, out=self.real)
+        num.dot(self.sines, self.frame, out=self.imaginary)
+        num.hypot(self.real, self.imaginary, out=self.spectrum)
+        num.log1p(self.spectrum, out=self.spectrum)
+        num.subtract(self.spectrum, self.lastSpectrum, out=self.growth)
+        num.maximum(self.growth, 0, out=self.growth)
+        flux = self.growth.sum()
+        self.lastSpectrum[:] = self.spectrum
+
+        average = self.history.mean()
+        self.history[self.historyIdx] = flux
+        self.historyIdx = (self.historyIdx + 1) % ONSET_HISTORY
+        self.hopsSinceOnset += 1
+
+        if volume <= 0 or 10 * num.log10(volume) < self.silence:
+            return False
+        if self.hopsSinceOnset < self.minHops:
+            return False
+        if flux > ONSET_THRESHOLD * average:
+            self.hopsSinceOnset = 0
+            return True
+        return False
+
+def inputHopSize(multiResolution):
+    if multiResolution:
+        return SHORT_HOP_SIZE
+    return PERIOD_SIZE_IN_FRAME
+
+# Open a live input (the default system one unless deviceIndex is given) with
+# the hop size the resolution mode wants.  With an output engine, the stream
+# is duplex and plays the engine's output too.
+def openInput(multiResolution = MULTI_RESOLUTION, deviceIndex = None,
+        output = None):
+    return PyAudioSource(inputHopSize(multiResolution), SAMPLE_RATE,
+        USE_CALLBACK_CAPTURE, RING_BUFFER_HOPS, deviceIndex, output)
+
+class AudioHandler:
+    """Pull hops from an audio source, provide freq and vol for each.
+
+    The source and the pitch method can be swapped on the fly with
+    setSource() and configure().  Engines are only rebuilt when the new
+    settings need different ones, so a device switch doesn't pay for
+    setting them up again.
+    """
+
+    def __init__(self, source = None, multiResolution = MULTI_RESOLUTION,
+            method = METHOD, onsetDetection = ONSET_DETECTION,
+            energyGate = ENERGY_GATE, deviceIndex = None):
+        self.multiResolution = multiResolution
+        self.method = method
+        self.onsetDetection = onsetDetection
+        self.energyGate = energyGate
+        # With no source given, listen to the system input.  Opening the
+        # device is slow, so it goes on in the background while the engines
+        # are set up.
+        opening = None
+        if source is None:
+            pool = ThreadPoolExecutor(1)
+            opening = pool.submit(openInput, multiResolution, deviceIndex)
+            pool.shutdown(wait=False)
+            hopSize = inputHopSize(multiResolution)
+        else:
+            hopSize = source.hopSize
+        self.hopCount = 0
+        # When each recent hop was captured (see hopCaptureTime), and when
+        # the last one was read
+        self.hopTimes = num.zeros(HOP_HISTORY)
+        self.readTime = 0.0
+        # A profiler.TraceRing to time each stage of every hop into, when
+        # profiling
+        self.trace = None
+        # Digital gain applied to every hop before analysis, set by
+        # calibrate().  Scaled hops go into their own buffer, as the source's
+        # may be read only.
+        self.gain = 1.0
+        # Frequency under this many dB will be considered as a silence
+        self.silenceDb = GATE_DB
+        self.buildEngines(hopSize)
+        self.resetStream()
+        if opening is not None:
+            source = opening.result()
+        self.source = source
+
+    # Initiating the pitch detection engines, and everything else sized by
+    # the hop
+    def buildEngines(self, hopSize):
+        self.engineHopSize = hopSize
+        self.scaled = num.zeros(hopSize, dtype=SAMPLE_TYPE)
+        self.gateThreshold = 10 ** (self.silenceDb / 10.0)
+        self.gateHoldHops = int(GATE_HOLD_MS * SAMPLE_RATE / (1000.0 * hopSize))
+        self.pDetection = makeEngine(self.method, BUFFER_SIZE, hopSize,
+            SAMPLE_RATE, self.silenceDb)
+        if self.multiResolution:
+            self.shortDetection = makeEngine(self.method, SHORT_BUFFER_SIZE,
+                hopSize, SAMPLE_RATE, self.silenceDb)
+        if self.onsetDetection:
+            self.oDetection = OnsetDetector(hopSize, SAMPLE_RATE,
+                self.silenceDb)
+
+    # Forget what was heard on the previous stream
+    def resetStream(self):
+        # Window size the last reported pitch came from
+        self.lastWindow = BUFFER_SIZE
+        self.lastLongPitch = 0.0
+        # Pitch to tune the last reported note by.  The short window reads
+        # low notes sharp, so this is always the long window's pitch.
+        self.tunePitch = 0.0
+        # Hops of quiet in a row, for the energy gate
+        self.quietHops = 0
+
+    def setSource(self, source):
+        """Switch to reading from source.  The old source is left for the
+        caller to close."""
+        self.source = source
+        self.resetStream()
+        if source.hopSize != self.engineHopSize:
+            self.buildEngines(source.hopSize)
+
+    def configure(self, method = None, multiResolution = None):
+        """Change the pitch method or resolution mode, rebuilding the engines
+        only if something actually changed"""
+        changed = False
+        if method is not None and method != self.method:
+            self.method = method
+            changed = True
+        if multiResolution is not None and multiResolution != self.multiResolution:
+            self.multiResolution = multiResolution
+            changed = True
+        if changed:
+            self.buildEngines(self.source.hopSize)
+            self.resetStream()
+
+    # A window's pitch has settled once it agrees with that window's pitch
+    # from the previous hop.  Right after an attack the long window is still
+    # mostly the tail of whatever came before, and reads off pitch.
+    def settled(self, pitch, lastPitch):
+        if pitch <= 0 or lastPitch <= 0:
+            return False
+        return abs(freq_to_number(pitch) - freq_to_number(lastPitch)) < SETTLED_SEMITONES
+
+    # Decide whether the short window's pitch can be reported, or if the long
+    # window is needed to resolve this note.  On its own the short window
+    # misreads a low note's attack (a harmonic, or the last note's tail) and
+    # drifts sharp as a note is damped, so it's only believed when the long
+    # window has settled on the same note.
+    def shortResolves(self, shortPitch, longPitch):
+        if shortPitch < SHORT_WINDOW_MIN_FREQ:
+            return False
+        if not self.settled(longPitch, self.lastLongPitch):
+            return False
+        interval = freq_to_number(shortPitch) - freq_to_number(longPitch)
+        return abs(interval) < SHORT_AGREE_SEMITONES
+
+    # Every array the per-hop path works in is allocated up front, by
+    # buildEngines() or the source.  This checks it: numHops hops are run
+    # under tracemalloc, and the most any one hop had allocated at once (even
+    # if it was freed again before the hop was over) is returned in bytes.
+    # The few Python objects a hop returns come to a few hundred bytes; an
+    # array allocated per hop shows up as at least a hop's worth of samples,
+    # see allocatesPerHop().  aubio's own C allocations aren't traced.
+    def steadyStateAllocs(self, numHops = 100):
+        import tracemalloc
+        # The first hop can still set things up
+        self.processAudio()
+        tracemalloc.start()
+        worst = 0
+        for i in range(numHops):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            if self.processAudio() is None:
+                break
+            worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+        tracemalloc.stop()
+        return worst
+
+    def allocatesPerHop(self, numHops = 100):
+        hopBytes = self.source.hopSize * num.dtype(SAMPLE_TYPE).itemsize
+        return self.steadyStateAllocs(numHops) >= hopBytes
+
+    # Number of hops captured but not yet analysed.  Anything above 0 means
+    # analysis is running late; a callback source absorbs it up to
+    # RING_BUFFER_HOPS.
+    def hopsBehind(self):
+        return self.source.hopsBehind()
+
+    # Frames lost because analysis fell too far behind
+    def droppedFrames(self):
+        return self.source.droppedFrames()
+
+    # Whether the energy gate silenced the last hop
+    def gated(self):
+        return self.energyGate and self.quietHops > self.gateHoldHops
+
+    # How sure the engine the last pitch came from was of it, 0 to 1
+    def confidence(self):
+        if self.gated():
+            return 0.0
+        if self.multiResolution and self.lastWindow == SHORT_BUFFER_SIZE:
+            return self.shortDetection.getConfidence()
+        return self.pDetection.getConfidence()
+
+    # When the hop hopsAgo before the latest finished being captured, in
+    # time.monotonic() seconds.  Only the last HOP_HISTORY are kept, asking
+    # further back gives the oldest of those.
+    def hopCaptureTime(self, hopsAgo = 0):
+        hopsAgo = max(0, min(hopsAgo, HOP_HISTORY - 1, self.hopCount - 1))
+        return self.hopTimes[(self.hopCount - 1 - hopsAgo) % HOP_HISTORY]
+
+    # Change the level below which hops count as silence, for the gate and
+    # every engine alike
+    def setSilence(self, silenceDb):
+        self.silenceDb = silenceDb
+        self.gateThreshold = 10 ** (silenceDb / 10.0)
+        self.pDetection.setSilence(silenceDb)
+        if self.multiResolution:
+            self.shortDetection.setSilence(silenceDb)
+        if self.onsetDetection:
+            self.oDetection.silence = silenceDb
+
+    def applyCalibration(self, calibration):
+        self.gain = calibration.gain
+        self.setSilence(calibration.silenceDb)
+
+    # Measure the noise floor and a plucked string on the source, and set the
+    # silence threshold and gain from them.  onStage is called with the
+    # Calibrator's stage name each time it changes, so the user can be told
+    # when to pluck.  Returns the calibration.Calibration, or None if the
+    # source stopped before it was done.
+    def calibrate(self, onStage = None):
+        calibrator = Calibrator(self.source.hopSize, SAMPLE_RATE)
+        stage = None
+        while True:
+            if onStage is not None and calibrator.stage != stage:
+                stage = calibrator.stage
+                onStage(stage)
+            samples = self.source.read()
+            if samples is None:
+                # Stopped or run dry part way through, keep the old settings
+                return None
+            if calibrator.addHop(samples):
+                break
+        calibration = calibrator.result()
+        self.applyCalibration(calibration)
+        if onStage is not None:
+            onStage("done")
+        return calibration
+
+    # Returns pitch, volume and whether an attack started in the next hop, or
+    # None once the source is done
+    def processAudio(self):
+        trace = self.trace
+        if trace is not None:
+            start = trace.clock()
+        samples = self.source.read()
+        if samples is None:
+            return None
+        self.readTime = time.monotonic()
+        self.hopTimes[self.hopCount % HOP_HISTORY] = self.source.hopTime()
+        self.hopCount += 1
+        if trace is not None:
+            start = trace.record(READ, start)
+        if self.gain != 1.0:
+            num.multiply(samples, self.gain, out=self.scaled)
+            samples = self.scaled
+            if trace is not None:
+                start = trace.record(CONVERT, start)
+        # Compute the energy (volume) of the current frame.  dot() sums the
+        # squares without building a squared copy of the frame.
+        volume = num.dot(samples, samples)/len(samples)
+        if self.energyGate:
+            if volume < self.gateThreshold:
+                self.quietHops += 1
+            else:
+                self.quietHops = 0
+            if self.quietHops > self.gateHoldHops:
+                # Silent, and has been for a while.  Let the engines that can
+                # keep their windows current do so cheaply, and move on.
+                self.pDetection.skip(samples)
+                if self.multiResolution:
+                    self.shortDetection.skip(samples)
+                    self.lastLongPitch = 0.0
+                if self.onsetDetection:
+                    self.oDetection.skip(samples)
+                self.lastWindow = BUFFER_SIZE
+                self.tunePitch = 0.0
+                if trace is not None:
+                    trace.record(VOLUME, start)
+                return 0.0, volume, False
+        if trace is not None:
+            start = trace.record(VOLUME, start)
+
+        # Finally get the pitch.
+        pitch = self.pDetection.getPitch(samples)
+        self.lastWindow = BUFFER_SIZE
+        self.tunePitch = pitch
+        if self.multiResolution:
+            longPitch = pitch
+            shortPitch = self.shortDetection.getPitch(samples)
+            if self.shortResolves(shortPitch, longPitch):
+                pitch = shortPitch
+                self.lastWindow = SHORT_BUFFER_SIZE
+            elif not self.settled(longPitch, self.lastLongPitch):
+                # Neither window has caught up with the note yet
+                pitch = 0.0
+                self.tunePitch = 0.0
+            self.lastLongPitch = longPitch
+        if trace is not None:
+            start = trace.record(PITCH, start)
+        onset = False
+        if self.onsetDetection:
+            onset = self.oDetection.detect(samples, volume)
+            if trace is not None:
+                trace.record(ONSET, start)
+        return pitch, volume, onset
+
+class StabilityTracker:
+    """Decide when the note numbers heard hop by hop have settled on a note.
+
+    Each hop gives a fractional MIDI note number, or None for silence.  The
+    tracker keeps the note it is currently counting and how many hops in a
+    row have agreed on it, so a hop costs a few integer compares however deep
+    the confidence is.
+
+    Once a note is held, a reading has to get hysteresisCents past the
+    boundary between it and a neighbour before it counts as the neighbour, so
+    a string sitting near a quarter tone out doesn't flip between the two.  With adaptive set, a hop
+    within boundaryCents of a note boundary needs one more agreeing hop
+    behind it than depth before it can confirm.
+
+    Once confirmed, a note is held: it isn't reported again until something
+    else has been confirmed in between, or release() is called.
+    """
+
+    NO_NOTE = -1
+
+    def __init__(self, depth = 2, hysteresisCents = 15, adaptive = True,
+            boundaryCents = 15):
+        self.depth = depth
+        self.hysteresis = 0.5 + hysteresisCents / 100.0
+        self.adaptive = adaptive
+        self.boundary = 0.5 - boundaryCents / 100.0
+        self.release()
+
+    # Forget the current run and the held note, so the next note to settle is
+    # reported even if it's the one that was held
+    def release(self):
+        self.candidate = None
+        self.runLength = 0
+        self.held = None
+
+    # Returns the note this hop counts as, and whether that note has just been
+    # confirmed
+    def update(self, number):
+        if number is None:
+            note = self.NO_NOTE
+            needed = self.depth
+        else:
+            note = int(round(number))
+            # Stick with the held note unless the reading is clearly past the
+            # boundary
+            held = self.held
+            if held is not None and held != self.NO_NOTE and note != held \
+                    and abs(number - held) < self.hysteresis:
+                note = held
+            needed = self.depth
+            if self.adaptive and abs(number - note) > self.boundary:
+                needed += 1
+
+        if note == self.candidate:
+            self.runLength += 1
+        else:
+            self.candidate = note
+            self.runLength = 1
+        if self.runLength >= needed and note != self.held:
+            self.held = note
+            return note, True
+        return note, False
+
+class NoteDetector:
+    """Name the pitch of each hop and decide when a note has been played.
+
+    A StabilityTracker decides when a note is confirmed.  An onset releases
+    it, so hops from before the attack can't hold up the new note, and the
+    note confirmed right after it is flagged as a new attack, even if it's
+    the same note as before.
+    """
+
+    def __init__(self, confidenceLevel = 2, a4 = REFERENCE_A4):
+        self.confidenceLevel = confidenceLevel
+        self.noteTable = getNoteTable(a4)
+        self.tracker = StabilityTracker(confidenceLevel, HYSTERESIS_CENTS,
+            ADAPTIVE_DEPTH, BOUNDARY_CENTS)
+        # Hops left for the tracker to confirm the last attack
+        self.armedHops = 0
+        # A profiler.TraceRing, when profiling
+        self.trace = None
+
+    # Returns the note heard this hop (a shared notes.Note, or "none" for
+    # silence), how far off that note it was (-0.5 to 0.5 or a little past
+    # with hysteresis, None for silence), whether that note has just been
+    # confirmed, and whether it was confirmed as a new attack.  The note is
+    # named from pitch, but how far off it is is measured from tunePitch when
+    # that's given (the handler's tunePitch), so a window that is quick but
+    # reads sharp can still pick the note.
+    def addPitch(self, pitch, onset = False, tunePitch = None):
+        trace = self.trace
+        if trace is not None:
+            start = trace.clock()
+        if (pitch == 0.0):
+            n = None
+            t = None
+        else:
+            n = self.noteTable.number(pitch)
+            if tunePitch:
+                t = self.noteTable.number(tunePitch)
+            else:
+                t = n
+        if trace is not None:
+            start = trace.record(NAMING, start)
+
+        if onset:
+            # The window still straddles the attack, so this hop's pitch
+            # doesn't count.  Start counting again from the next hop.
+            self.armedHops = ONSET_CONFIRM_HOPS
+            self.tracker.release()
+            if n is None:
+                return "none", None, False, False
+            n0 = int(round(n))
+            return self.noteTable.note(n0), t - n0, False, False
+
+        number, confirmed = self.tracker.update(n)
+        if number == StabilityTracker.NO_NOTE:
+            name = "none"
+            tune = None
+        else:
+            name = self.noteTable.note(number)
+            tune = t - number
+
+        # The first note confirmed soon enough after an onset is a new attack
+        attack = confirmed and self.armedHops > 0 and name != "none"
+        if confirmed:
+            self.armedHops = 0
+        elif self.armedHops > 0:
+            self.armedHops -= 1
+        if trace is not None:
+            trace.record(DEBOUNCE, start)
+        return name, tune, confirmed, attack
+
+    # Hops in a row, up to and including the last one, that have agreed on
+    # the current note
+    def runLength(self):
+        return self.tracker.runLength
@@ -0,0 +1,122 @@
+import math
+
+NOTE_NAMES = 'C C# D D# E F F# G G# A A# B'.split()
+NUM_NOTES = 12
+
+# Track all the notes on a per-fret basis. <n>_NOTES will give you the note by
+# fret.  0 is open, 1 is first fret, etc.
+# ok, so there are more than 18 frets, but who's actually meedly meedlying up
+# in the stratosphere with the 24th fret?
+NUM_FRETS = 18
+G_NOTES = 'G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3 E3 F3 F#3 G3 G#3 A3 A#3 B3 C4 C#4'.split()
+D_NOTES = 'D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3 E3 F3 F#3 G3 G#3'.split()
+A_NOTES = 'A1 A#1 B1 C2 C#2 D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2 B2 C3 C#3 D3 D#3'.split()
+E_NOTES = 'E1 F1 F#1 G1 G#1 A1 A#1 B1 C2 C#2 D2 D#2 E2 F2 F#2 G2 G#2 A2 A#2'.split()
+B_NOTES = 'B0 C1 C#1 D1 D#1 E1 F1 F#1 G1 G#1 A1 A#1 B1 C2 C#2 D2 D#2 E2 F2'.split()
+# String is mostly used to convert string number to name
+STRING_LIST = 'E A D G'.split()
+# String fret list is used to generate a random note on a random fret.
+# so [0][3] will give you the E string, fret 3, or an G1
+STRING_FRET_LIST = [E_NOTES, A_NOTES, D_NOTES, G_NOTES]
+
+# some functions I found from a ukelele tuner app, all of which are based on
+# https://newt.phys.unsw.edu.au/jw/notes.html
+# These are used to convert frequencies to midi numbers and note names.
+# freq_to_number takes arrays too, so it loads numpy, but only when called:
+# the rest of this module is imported by tools that never touch audio.
+def freq_to_number(f, a4 = 440.0):
+    import numpy as num
+    return 69 + 12*num.log2(f/a4)
+def number_to_freq(n, a4 = 440.0): return a4 * 2.0**((n-69)/12.0)
+def note_name(n): return NOTE_NAMES[n % 12] + str(int(n/12 - 1))
+# Inverse of note_name, ex "E1" gives 28
+def name_to_number(name): return NOTE_NAMES.index(name[:-1]) + 12*(int(name[-1]) + 1)
+
+# Range the note table covers: the B0 to C#4 of a five string bass, plus an
+# octave's margin either side for readings that are a bit off
+TABLE_LOWEST = 12
+TABLE_HIGHEST = 73
+
+class Note(str):
+    """A note name that also knows its MIDI number and frequencies.
+
+    Being a str, a Note compares equal to its plain name ("A2") and can go
+    anywhere a name could.  Notes come out of a NoteTable and are shared, so
+    the same objects get handed to the exercises and the tuner every hop
+    instead of names being formatted afresh, and they can't be changed.
+    """
+
+    def __new__(cls, number, a4 = 440.0):
+        self = str.__new__(cls, note_name(number))
+        self.__dict__.update(
+            number = number,
+            a4 = a4,
+            pitchClass = NOTE_NAMES[number % 12],
+            freq = number_to_freq(number, a4),
+            # Where readings stop counting as this note and count as its
+            # neighbours instead
+            lower = number_to_freq(number - 0.5, a4),
+            upper = number_to_freq(number + 0.5, a4))
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Note is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Note is immutable")
+
+    # Unpickle as the shared note from the table, so notes survive being sent
+    # between processes
+    def __reduce__(self):
+        return (noteFromNumber, (self.number, self.a4))
+
+class NoteTable:
+    """Every note from TABLE_LOWEST to TABLE_HIGHEST for a reference A4.
+
+    number() turns a frequency into a MIDI number with a single log, and
+    note() that into its Note with an index into the table, so naming a
+    pitch builds no strings along the way.
+    """
+
+    def __init__(self, a4 = 440.0):
+        self.a4 = a4
+        self.logA4 = math.log2(a4)
+        self.notes = tuple(Note(n, a4) for n in range(TABLE_LOWEST,
+            TABLE_HIGHEST + 1))
+        self.byName = dict((str(note), note) for note in self.notes)
+
+    # MIDI number of freq, with the fraction left on
+    def number(self, freq):
+        return 69 + 12 * (math.log2(freq) - self.logA4)
+
+    # The Note for a MIDI number.  Numbers outside the table get a Note of
+    # their own rather than a shared one.
+    def note(self, number):
+        idx = number - TABLE_LOWEST
+        if 0 <= idx < len(self.notes):
+            return self.notes[idx]
+        return Note(number, self.a4)
+
+    def noteNamed(self, name):
+        if name in self.byName:
+            return self.byName[name]
+        return self.note(name_to_number(name))
+
+# One table per reference pitch, shared by everything that asks for it
+noteTables = {}
+
+def getNoteTable(a4 = 440.0):
+    if a4 not in noteTables:
+        noteTables[a4] = NoteTable(a4)
+    return noteTables[a4]
+
+def noteFromNumber(number, a4 = 440.0):
+    return getNoteTable(a4).note(number)
+
+# Swap the names in the fret tables for the shared Notes, so what the exercises
+# pick is the very same object the detector hands back
+for frets in STRING_FRET_LIST:
+    frets[:] = [getNoteTable().noteNamed(name) for name in frets]
+
+# Every note that can be fretted on a four string bass, lowest first
+BASS_NOTES = sorted(set(sum(STRING_FRET_LIST, [])), key=lambda n: name_to_number(n))
@@ -0,0 +1,137 @@
+import numpy as num
+from collections import deque
+
+from audioSource import importPyaudio, SAMPLE_TYPE
+
+SAMPLE_RATE = 44100
+# Frames per output callback.  Small, so a sound asked for now is heard within
+# a few milliseconds: 256 frames is under 6 ms at 44.1 kHz.
+OUTPUT_FRAMES = 256
+# Sounds that can play at once.  Past this the oldest is cut off.
+MAX_VOICES = 16
+
+class OutputEngine:
+    """Mixes the sound effects and the metronome into a PortAudio output stream.
+
+    Decoded samples go in through play() from any thread, and are mixed in
+    by render() on the next callback.  A running Transport is advanced by
+    render() too, by exactly the frames it puts out, so every click starts
+    on the sample the transport gave it.  Other transport events (chord
+    changes) go to the listener, which is called on the audio thread and so
+    should only hand them on (a queued Qt signal's emit, say).
+
+    start() gives the engine an output stream of its own.  Alternatively
+    pass the engine as the output of a PyAudioSource, which then opens one
+    duplex stream and has render() fill its output side.
+    """
+
+    def __init__(self, sampleRate = SAMPLE_RATE, framesPerBuffer = OUTPUT_FRAMES,
+            deviceIndex = None):
+        self.sampleRate = sampleRate
+        self.framesPerBuffer = framesPerBuffer
+        self.deviceIndex = deviceIndex
+        self.mix = num.zeros(framesPerBuffer, dtype=SAMPLE_TYPE)
+        self.scratch = num.zeros(framesPerBuffer, dtype=SAMPLE_TYPE)
+        # [samples, next sample to play, volume, frames to wait first]
+        self.voices = []
+        # Sounds waiting for the next callback, and functions to run on the
+        # audio thread before it mixes anything.  deque's append and popleft
+        # are atomic, so neither side takes a lock.
+        self.triggers = deque()
+        self.commands = deque()
+        self.transport = None
+        self.clicks = {}
+        self.clickVolume = 1.0
+        self.listener = None
+        self.framesRendered = 0
+        self.pA = None
+        self.stream = None
+
+    def start(self):
+        pyaudio = importPyaudio()
+        if pyaudio is None:
+            raise RuntimeError("pyaudio is needed for audio output")
+        self.pyaudio = pyaudio
+        self.pA = pyaudio.PyAudio()
+        self.stream = self.pA.open(format=pyaudio.paFloat32, channels=1,
+            rate=self.sampleRate, output=True,
+            output_device_index=self.deviceIndex,
+            frames_per_buffer=self.framesPerBuffer,
+            stream_callback=self.outputCallback)
+
+    def outputCallback(self, inData, frameCount, timeInfo, statusFlags):
+        return (self.render(frameCount), self.pyaudio.paContinue)
+
+    def close(self):
+        if self.stream is None:
+            return
+        self.stream.stop_stream()
+        self.stream.close()
+        self.pA.terminate()
+        self.stream = None
+
+    # Safe from any thread
+    def play(self, samples, volume = 1.0):
+        self.triggers.append((samples, volume))
+
+    # Run fn on the audio thread, before the next callback mixes anything
+    def call(self, fn):
+        self.commands.append(fn)
+
+    def startTransport(self, transport, clicks, listener = None):
+        """Start transport from its first beat.  clicks maps the event kinds
+        to play (transport.ACCENT, transport.BEAT) to their samples."""
+        def begin():
+            transport.reset()
+            self.clicks = clicks
+            self.listener = listener
+            self.transport = transport
+        self.call(begin)
+
+    def stopTransport(self):
+        def end():
+            self.transport = None
+        self.call(end)
+
+    def setBpm(self, transport, bpm):
+        self.call(lambda: transport.setBpm(bpm))
+
+    def addVoice(self, samples, volume, delay):
+        if len(self.voices) >= MAX_VOICES:
+            self.voices.pop(0)
+        self.voices.append([samples, 0, volume, delay])
+
+    def render(self, frameCount):
+        """Mix the next frameCount frames, returns them as float32 bytes"""
+        if frameCount > len(self.mix):
+            self.mix = num.zeros(frameCount, dtype=SAMPLE_TYPE)
+            self.scratch = num.zeros(frameCount, dtype=SAMPLE_TYPE)
+        while self.commands:
+            self.commands.popleft()()
+        while self.triggers:
+            samples, volume = self.triggers.popleft()
+            self.addVoice(samples, volume, 0)
+        if self.transport is not None:
+            bufferStart = self.transport.position
+            for sample, kind in self.transport.advance(frameCount):
+                if kind in self.clicks:
+                    self.addVoice(self.clicks[kind], self.clickVolume,
+                        sample - bufferStart)
+                elif self.listener is not None:
+                    self.listener(kind)
+
+        mix = self.mix[:frameCount]
+        mix.fill(0)
+        for voice in self.voices:
+            samples, pos, volume, delay = voice
+            n = min(frameCount - delay, len(samples) - pos)
+            if n > 0:
+                scratch = self.scratch[:n]
+                num.multiply(samples[pos:pos + n], volume, out=scratch)
+                mix[delay:delay + n] += scratch
+            voice[1] = pos + max(n, 0)
+            voice[3] = max(0, delay - frameCount)
+        self.voices = [v for v in self.voices if v[1] < len(v[0])]
+        num.clip(mix, -1.0, 1.0, out=mix)
+        self.framesRendered += frameCount
+        return mix.tobytes()
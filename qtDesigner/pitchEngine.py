@@ -0,0 +1,225 @@
+import numpy as num
+
+# Every method aubio.pitch knows about.  "default" is yinfft.
+AUBIO_METHODS = ['default', 'yin', 'yinfft', 'yinfast', 'mcomb', 'schmitt',
+    'fcomb', 'specacf']
+
+# Range the NumPy engines search.  A bit of margin either side of the E1 (41Hz)
+# to C#4 (277Hz) a four string bass can fret.
+MIN_FREQ = 30.0
+MAX_FREQ = 400.0
+# Hops quieter than this many dB are reported as silence, as with aubio's
+# set_silence
+SILENCE_DB = -50
+
+class PitchEngine:
+    """Turn hops of samples into a pitch in Hz, 0.0 when nothing is heard.
+
+    An engine looks at the last bufferSize samples it has been given, and each
+    getPitch call hands it the next hopSize of them.
+    """
+    name = ''
+
+    def __init__(self, bufferSize, hopSize, sampleRate, silence = SILENCE_DB):
+        self.bufferSize = bufferSize
+        self.hopSize = hopSize
+        self.sampleRate = sampleRate
+        self.silence = silence
+        self.confidence = 0.0
+
+    def getPitch(self, samples):
+        raise NotImplementedError
+
+    def setSilence(self, silence):
+        self.silence = silence
+
+    # Called in place of getPitch for hops that are known to be silent.
+    # Engines that can cheaply keep their window current should; the rest
+    # just miss the hop.
+    def skip(self, samples):
+        pass
+
+    # How sure the engine was of its last pitch, 0 to 1.  Not every method
+    # gives a meaningful value (aubio's yinfft always reports 0).
+    def getConfidence(self):
+        return self.confidence
+
+class AubioEngine(PitchEngine):
+    """Any of aubio's pitch methods"""
+
+    def __init__(self, method, bufferSize, hopSize, sampleRate,
+            silence = SILENCE_DB):
+        PitchEngine.__init__(self, bufferSize, hopSize, sampleRate, silence)
+        import aubio
+        self.name = method
+        self.detector = aubio.pitch(method, bufferSize, hopSize, sampleRate)
+        self.detector.set_unit("Hz")
+        self.detector.set_silence(silence)
+
+    def getPitch(self, samples):
+        return float(self.detector(samples)[0])
+
+    def setSilence(self, silence):
+        PitchEngine.setSilence(self, silence)
+        self.detector.set_silence(silence)
+
+    def getConfidence(self):
+        return self.detector.get_confidence()
+
+class NumpyEngine(PitchEngine):
+    """Frame and silence handling shared by the engines written in NumPy"""
+
+    def __init__(self, bufferSize, hopSize, sampleRate, silence = SILENCE_DB):
+        PitchEngine.__init__(self, bufferSize, hopSize, sampleRate, silence)
+        self.frame = num.zeros(bufferSize, dtype=num.float32)
+
+    # Slide the analysis frame along by one hop
+    def pushHop(self, samples):
+        hop = len(samples)
+        self.frame[:-hop] = self.frame[hop:]
+        self.frame[-hop:] = samples
+
+    def skip(self, samples):
+        self.pushHop(samples)
+
+    def isSilent(self, samples):
+        energy = num.dot(samples, samples) / len(samples)
+        return energy <= 0 or 10 * num.log10(energy) < self.silence
+
+    # Fractional offset of the true extremum from index i of values, from a
+    # parabola through i and its neighbours
+    def interpolate(self, values, i):
+        if i <= 0 or i >= len(values) - 1:
+            return 0.0
+        a, b, c = values[i - 1], values[i], values[i + 1]
+        denom = a - 2 * b + c
+        if denom == 0:
+            return 0.0
+        return 0.5 * (a - c) / denom
+
+class YinEngine(NumpyEngine):
+    """YIN (de Cheveigne & Kawahara 2002), difference function via FFT"""
+    name = 'numpy-yin'
+
+    def __init__(self, bufferSize, hopSize, sampleRate, silence = SILENCE_DB,
+            threshold = 0.15):
+        NumpyEngine.__init__(self, bufferSize, hopSize, sampleRate, silence)
+        self.threshold = threshold
+        # Half the frame is compared against lagged copies of itself
+        self.window = bufferSize // 2
+        self.minLag = max(2, int(sampleRate / MAX_FREQ))
+        self.maxLag = min(self.window, int(sampleRate / MIN_FREQ) + 2)
+        # Big enough that the circular correlation never wraps
+        self.fftSize = 1
+        while self.fftSize < bufferSize + self.window:
+            self.fftSize *= 2
+        self.squares = num.zeros(bufferSize, dtype=num.float64)
+        self.cumEnergy = num.zeros(bufferSize + 1, dtype=num.float64)
+        self.diff = num.zeros(self.maxLag, dtype=num.float64)
+        self.cmnd = num.ones(self.maxLag, dtype=num.float64)
+        self.lags = num.arange(self.maxLag, dtype=num.float64)
+
+    def getPitch(self, samples):
+        self.pushHop(samples)
+        if self.isSilent(samples):
+            self.confidence = 0.0
+            return 0.0
+        frame = self.frame
+        w = self.window
+        lags = self.maxLag
+
+        # d(t) = sum((x[j] - x[j+t])^2) = E(0) + E(t) - 2r(t), with r the
+        # autocorrelation of the first half of the frame against all of it
+        spectrum = num.fft.rfft(frame, self.fftSize)
+        spectrum *= num.conj(num.fft.rfft(frame[:w], self.fftSize))
+        corr = num.fft.irfft(spectrum, self.fftSize)[:lags]
+        num.multiply(frame, frame, out=self.squares)
+        num.cumsum(self.squares, out=self.cumEnergy[1:])
+        diff = self.diff
+        num.subtract(self.cumEnergy[w:w + lags], self.cumEnergy[:lags], out=diff)
+        diff += self.cumEnergy[w]
+        diff -= 2 * corr
+
+        # Cumulative mean normalised difference, d'(0) = 1
+        cmnd = self.cmnd
+        running = num.cumsum(diff[1:])
+        running[running == 0] = 1
+        num.multiply(diff[1:], self.lags[1:], out=cmnd[1:])
+        cmnd[1:] /= running
+
+        # First dip under the threshold, followed down to its minimum.  If
+        # nothing dips that far, settle for the deepest point.
+        search = cmnd[self.minLag:]
+        below = num.flatnonzero(search < self.threshold)
+        if len(below):
+            lag = self.minLag + below[0]
+            while lag + 1 < lags and cmnd[lag + 1] < cmnd[lag]:
+                lag += 1
+        else:
+            lag = self.minLag + int(num.argmin(search))
+        self.confidence = max(0.0, 1.0 - float(cmnd[lag]))
+        period = lag + self.interpolate(cmnd, lag)
+        return self.sampleRate / period
+
+class HpsEngine(NumpyEngine):
+    """Harmonic product spectrum.
+
+    The spectrum is multiplied by copies of itself squashed by 2, 3, ... so
+    that the fundamental is the one bin where every harmonic lines up.
+    """
+    name = 'numpy-hps'
+
+    def __init__(self, bufferSize, hopSize, sampleRate, silence = SILENCE_DB,
+            harmonics = 3, zeroPad = 8):
+        NumpyEngine.__init__(self, bufferSize, hopSize, sampleRate, silence)
+        self.harmonics = harmonics
+        self.fftSize = bufferSize * zeroPad
+        self.binHz = sampleRate / self.fftSize
+        self.minBin = int(MIN_FREQ / self.binHz)
+        self.maxBin = int(MAX_FREQ / self.binHz) + 2
+        # The window is computed once and the windowed frame reused every hop
+        self.hann = num.hanning(bufferSize).astype(num.float32)
+        self.windowed = num.zeros(bufferSize, dtype=num.float32)
+        self.product = num.zeros(self.maxBin, dtype=num.float64)
+
+    def getPitch(self, samples):
+        self.pushHop(samples)
+        if self.isSilent(samples):
+            self.confidence = 0.0
+            return 0.0
+        num.multiply(self.frame, self.hann, out=self.windowed)
+        spectrum = num.abs(num.fft.rfft(self.windowed, self.fftSize))
+        product = self.product
+        product[:] = spectrum[:self.maxBin]
+        for h in range(2, self.harmonics + 1):
+            product *= spectrum[:self.maxBin * h:h]
+
+        peak = self.minBin + int(num.argmax(product[self.minBin:]))
+        # HPS tends to land an octave high when the fundamental is weak next
+        # to its second harmonic.  Prefer the octave below if it's nearly as
+        # strong.
+        half = peak // 2
+        if half >= self.minBin:
+            lower = half - 1 + int(num.argmax(product[half - 1:half + 2]))
+            if product[lower] > 0.2 * product[peak]:
+                peak = lower
+        total = product[self.minBin:].sum()
+        self.confidence = float(product[peak] / total) if total > 0 else 0.0
+        logProduct = num.log(product[peak - 1:peak + 2] + 1e-30)
+        return (peak + self.interpolate(logProduct, 1)) * self.binHz
+
+NUMPY_ENGINES = {
+    YinEngine.name: YinEngine,
+    HpsEngine.name: HpsEngine,
+}
+
+def engineNames():
+    return AUBIO_METHODS + list(NUMPY_ENGINES)
+
+def makeEngine(name, bufferSize, hopSize, sampleRate, silence = SILENCE_DB):
+    """Build the pitch engine called name, one of engineNames()"""
+    if name in NUMPY_ENGINES:
+        return NUMPY_ENGINES[name](bufferSize, hopSize, sampleRate, silence)
+    if name in AUBIO_METHODS:
+        return AubioEngine(name, bufferSize, hopSize, sampleRate, silence)
+    raise ValueError("unknown pitch engine: " + str(name))
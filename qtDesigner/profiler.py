@@ -0,0 +1,119 @@
+import json
+import time
+from threading import Lock
+
+import numpy as num
+
+# What gets timed.  The worker thread's stages, hop by hop:
+#   mic.read   waiting for and reading the next hop from the source
+#   convert    applying the input gain
+#   volume     the hop's energy, and the energy gate
+#   pitch      the pitch engines
+#   onset      onset detection
+#   naming     pitch to note number
+#   debounce   deciding whether the note is confirmed
+#   emit       publishing the tuner reading or note to the GUI
+# and the GUI thread's:
+#   drain      collecting what the worker published
+#   evaluate   the exercise's evaluateNote
+#   labels     updating the note and exercise labels
+#   tuner      updating the tuner
+STAGES = ['mic.read', 'convert', 'volume', 'pitch', 'onset', 'naming',
+    'debounce', 'emit', 'drain', 'evaluate', 'labels', 'tuner']
+(READ, CONVERT, VOLUME, PITCH, ONSET, NAMING, DEBOUNCE, EMIT, DRAIN, EVALUATE,
+    LABELS, TUNER) = range(len(STAGES))
+
+# Spans each thread's ring holds.  Past this the oldest are overwritten, so a
+# long session keeps its last few minutes.
+CAPACITY = 1 << 17
+# Where --profile writes the trace unless told otherwise
+TRACE_FILE = "bassbot-trace.json"
+
+class TraceRing:
+    """Timed spans from one thread, in arrays allocated up front.
+
+    Only the thread the ring was made for may record into it, so recording
+    takes no lock.  Time a stage by taking start = clock() before it and
+    calling record(stage, start) after.  record() returns the time it
+    stopped the span at, ready to start the next stage from.
+    """
+
+    def __init__(self, threadId, name, capacity = CAPACITY,
+            clock = time.perf_counter):
+        self.threadId = threadId
+        self.name = name
+        self.capacity = capacity
+        self.clock = clock
+        self.stages = num.zeros(capacity, dtype=num.int16)
+        self.starts = num.zeros(capacity)
+        self.ends = num.zeros(capacity)
+        self.count = 0
+
+    def record(self, stage, start):
+        end = self.clock()
+        i = self.count % self.capacity
+        self.stages[i] = stage
+        self.starts[i] = start
+        self.ends[i] = end
+        self.count += 1
+        return end
+
+    # Indices of the spans still held, oldest first
+    def held(self):
+        if self.count <= self.capacity:
+            return num.arange(self.count)
+        return num.roll(num.arange(self.capacity), -(self.count % self.capacity))
+
+class Profiler:
+    """The rings of every thread being profiled, written out together as a
+    Chrome trace (load it in chrome://tracing or ui.perfetto.dev) so the
+    worker and the GUI can be seen side by side"""
+
+    def __init__(self, capacity = CAPACITY, clock = time.perf_counter):
+        self.capacity = capacity
+        self.clock = clock
+        self.start = clock()
+        self.lock = Lock()
+        self.rings = []
+
+    def ring(self, name):
+        """A new ring for one thread to record into"""
+        with self.lock:
+            ring = TraceRing(len(self.rings) + 1, name, self.capacity,
+                self.clock)
+            self.rings.append(ring)
+        return ring
+
+    def traceEvents(self):
+        events = []
+        for ring in self.rings:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1,
+                'tid': ring.threadId, 'args': {'name': ring.name}})
+            for i in ring.held():
+                start = (ring.starts[i] - self.start) * 1e6
+                events.append({'name': STAGES[ring.stages[i]], 'ph': 'X',
+                    'pid': 1, 'tid': ring.threadId, 'ts': round(start, 1),
+                    'dur': round((ring.ends[i] - ring.starts[i]) * 1e6, 1)})
+        return events
+
+    def writeTrace(self, path = TRACE_FILE):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.traceEvents(),
+                'displayTimeUnit': 'ms'}, f)
+
+    def summary(self):
+        """Mean, 95th percentile and total time per stage, in ms"""
+        lines = ["%-10s %-10s %8s %8s %8s %10s" % ("thread", "stage", "spans",
+            "mean", "p95", "total")]
+        for ring in self.rings:
+            held = ring.held()
+            stages = ring.stages[held]
+            durations = (ring.ends[held] - ring.starts[held]) * 1000
+            for stage, name in enumerate(STAGES):
+                times = durations[stages == stage]
+                if len(times) == 0:
+                    continue
+                lines.append("%-10s %-10s %8d %8.3f %8.3f %10.1f" % (ring.name,
+                    name, len(times), times.mean(), num.percentile(times, 95),
+                    times.sum()))
+        return "\n".join(lines)
@@ -0,0 +1,103 @@
+import time
+from collections import deque
+from threading import Lock
+
+# The GUI can't show tuner readings faster than the screen refreshes, so there
+# is no point waking it up more often than this
+DISPLAY_RATE = 60
+
+class Publisher:
+    """Hand tuner readings and note events from the worker to the GUI thread.
+
+    The worker publishes from its own thread and the GUI collects everything
+    outstanding with drain().  Tuner readings are coalesced: only the latest
+    one waiting is delivered.  Note events are queued, so every one arrives,
+    in order.  notify (a queued Qt signal's emit, say) is called to wake the
+    GUI, at most once per drain() and, for tuner readings, at most maxRate
+    times a second.  A note event wakes it straight away.
+
+    Counters, for working out whether the GUI is keeping up:
+      emitted    times the GUI was woken
+      coalesced  tuner readings replaced by a newer one before delivery
+      dropped    tuner readings thrown away because silence was confirmed
+                 after them, so they would only have been stale
+    """
+
+    def __init__(self, notify, maxRate = DISPLAY_RATE, clock = time.monotonic):
+        self.notify = notify
+        self.minInterval = 1.0 / maxRate
+        self.clock = clock
+        self.lock = Lock()
+        self.tuning = None
+        self.notes = deque()
+        self.pending = False
+        self.lastNotify = None
+        self.tuningPublished = 0
+        self.notesPublished = 0
+        self.emitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def publishTuning(self, tune):
+        with self.lock:
+            self.tuningPublished += 1
+            if self.tuning is not None:
+                self.coalesced += 1
+            self.tuning = tune
+            wake = self.shouldWake(False)
+        if wake:
+            self.notify()
+
+    # timing is a latency.NoteTiming for the GUI to finish filling in, or None
+    def publishNote(self, name, attack = False, timing = None):
+        with self.lock:
+            self.notesPublished += 1
+            if name == "none" and self.tuning is not None:
+                self.tuning = None
+                self.dropped += 1
+            self.notes.append((name, attack, timing))
+            wake = self.shouldWake(True)
+        if wake:
+            self.notify()
+
+    # Called with the lock held
+    def shouldWake(self, urgent):
+        if self.pending:
+            # The GUI is already due to pick this up
+            return False
+        now = self.clock()
+        if not urgent and self.lastNotify is not None and \
+                now - self.lastNotify < self.minInterval:
+            # Left for the next reading or note to deliver
+            return False
+        self.pending = True
+        self.lastNotify = now
+        self.emitted += 1
+        return True
+
+    def drain(self):
+        """Returns the latest tuner reading (None if there's no new one) and
+        the list of (name, attack, timing) note events since the last drain"""
+        with self.lock:
+            tune = self.tuning
+            self.tuning = None
+            notes = list(self.notes)
+            self.notes.clear()
+            self.pending = False
+        return tune, notes
+
+    def counters(self):
+        with self.lock:
+            return {
+                'tuningPublished': self.tuningPublished,
+                'notesPublished': self.notesPublished,
+                'emitted': self.emitted,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+            }
+
+    # The counters as a line to go under the latency report
+    def report(self):
+        return ("handed to the GUI: %(notesPublished)d notes, "
+            "%(tuningPublished)d tuner readings (%(coalesced)d coalesced, "
+            "%(dropped)d dropped), %(emitted)d wakeups" % self.counters())
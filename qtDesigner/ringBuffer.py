@@ -0,0 +1,92 @@
+import numpy as num
+from threading import Event
+
+class RingBuffer:
+    """Single producer, single consumer ring of audio frames.
+
+    The producer (the PortAudio callback thread) only ever advances writeCount
+    and the consumer (the analysis thread) only ever advances readCount, so
+    neither side has to take a lock to move data.  Both counters grow forever;
+    the position in the backing array is the counter modulo the capacity.
+    """
+
+    def __init__(self, hopSize, numHops = 16, dtype = num.float32):
+        self.hopSize = hopSize
+        self.capacity = hopSize * numHops
+        self.data = num.zeros(self.capacity, dtype=dtype)
+        self.writeCount = 0
+        # Set ahead of writeCount while a write is being copied in
+        self.claimCount = 0
+        self.readCount = 0
+        # Number of frames the reader never saw because the writer lapped it
+        self.overrunFrames = 0
+        self.dataReady = Event()
+
+    def write(self, frames):
+        n = len(frames)
+        if n > self.capacity:
+            # Only the newest capacity frames can survive anyway
+            self.writeCount += n - self.capacity
+            frames = frames[n - self.capacity:]
+            n = self.capacity
+        self.claimCount = self.writeCount + n
+        start = self.writeCount % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self.data[start:end] = frames
+        else:
+            split = self.capacity - start
+            self.data[start:] = frames[:split]
+            self.data[:n - split] = frames[split:]
+        # Publish the frames only once they have been copied in
+        self.writeCount += n
+        self.dataReady.set()
+
+    def available(self):
+        return self.writeCount - self.readCount
+
+    def hopsBehind(self):
+        # How many whole hops are waiting beyond the one being analysed
+        return max(0, self.available() // self.hopSize - 1)
+
+    def waitFor(self, numFrames, timeout = None):
+        while self.available() < numFrames:
+            self.dataReady.clear()
+            # The writer may have published between the check and the clear
+            if self.available() >= numFrames:
+                break
+            if not self.dataReady.wait(timeout):
+                return False
+        return True
+
+    def read(self, out):
+        """Copy the oldest len(out) unread frames into out.
+
+        Returns False, leaving out untouched, if there aren't enough frames
+        buffered yet.
+        """
+        n = len(out)
+        while True:
+            avail = self.writeCount - self.readCount
+            if avail < n:
+                return False
+            if avail > self.capacity:
+                # The writer lapped us, skip to the oldest intact frame
+                skipped = avail - self.capacity
+                self.overrunFrames += skipped
+                self.readCount += skipped
+            start = self.readCount % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                out[:] = self.data[start:end]
+            else:
+                split = self.capacity - start
+                out[:split] = self.data[start:]
+                out[split:] = self.data[:n - split]
+            # If the writer wrapped onto the region while we were copying it,
+            # the copy may be torn.  Go around again, which will count the
+            # overwritten frames as an overrun.
+            if self.claimCount - self.readCount > self.capacity:
+                continue
+            self.readCount += n
+            return True
@@ -0,0 +1,149 @@
+import datetime
+import os
+import queue
+import sqlite3
+import time
+import uuid
+from threading import Thread
+
+# Where practice history is kept unless told otherwise
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".bassbot", "history.db")
+# The writer commits whatever has queued up at least this often
+FLUSH_INTERVAL = 1.0
+# and in transactions of at most this many rows
+BATCH_ROWS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    numRight INTEGER NOT NULL DEFAULT 0,
+    numWrong INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    time REAL NOT NULL,
+    day TEXT NOT NULL,
+    target TEXT NOT NULL,
+    played TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    responseMs REAL NOT NULL,
+    string INTEGER NOT NULL,
+    fret INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notesByExercise ON notes (user, exercise, time);
+CREATE INDEX IF NOT EXISTS notesByDay ON notes (user, day);
+CREATE INDEX IF NOT EXISTS notesBySession ON notes (session);
+CREATE INDEX IF NOT EXISTS sessionsByUser ON sessions (user, exercise, started);
+"""
+
+NOTE_COLUMNS = ('session', 'user', 'exercise', 'level', 'time', 'day',
+    'target', 'played', 'correct', 'responseMs', 'string', 'fret')
+INSERT_NOTE = "INSERT INTO notes (%s) VALUES (%s)" % (", ".join(NOTE_COLUMNS),
+    ", ".join("?" * len(NOTE_COLUMNS)))
+INSERT_SESSION = "INSERT INTO sessions (id, user, exercise, level, started) " \
+    "VALUES (?, ?, ?, ?, ?)"
+END_SESSION = "UPDATE sessions SET ended = ?, numRight = ?, numWrong = ? " \
+    "WHERE id = ?"
+
+def connect(path):
+    """Open the history at path, creating it if need be.  It's kept in WAL
+    mode, so the report can read while a session is being written."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode this is still safe against a crash, just not a power cut
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+class SessionStore:
+    """Every note an exercise judges, kept for good in a SQLite database.
+
+    Sessions and notes are only queued on the calling thread.  A writer
+    thread of its own opens the database and puts them in it in batches, so
+    the GUI never waits on the disk.  Nothing is ever updated except a
+    session's row, once it ends.  If the database can't be opened, that's
+    printed and practice goes on unrecorded.
+    """
+
+    def __init__(self, path = DEFAULT_PATH, user = None):
+        self.path = path
+        self.user = user if user is not None else defaultUser()
+        self.queue = queue.Queue()
+        self.writer = Thread(target=self.write, name="session writer",
+            daemon=True)
+        self.writer.start()
+
+    def startSession(self, session):
+        """Start storing session (an exercises.sessionInfo): every note it's
+        told about from now on is queued for the database"""
+        session.id = uuid.uuid4().hex
+        session.user = self.user
+        session.store = self
+        self.queue.put((INSERT_SESSION, (session.id, self.user,
+            session.exercise, session.level, time.time())))
+
+    def endSession(self, session):
+        if session.store is not self:
+            return
+        self.queue.put((END_SESSION, (time.time(), session.numRight,
+            session.numWrong, session.id)))
+        session.store = None
+
+    def logNote(self, session, target, played, correct, responseMs,
+            string = -1, fret = -1):
+        now = time.time()
+        self.queue.put((INSERT_NOTE, (session.id, self.user, session.exercise,
+            session.level, now, datetime.date.fromtimestamp(now).isoformat(),
+            str(target), str(played), int(correct), responseMs, string,
+            fret)))
+
+    # The writer thread.  Waits for something to write, then takes whatever
+    # else has queued up along with it, and commits the lot at once.
+    def write(self):
+        try:
+            db = connect(self.path)
+        except Exception as e:
+            print("Not saving practice history (" + str(e) + ")")
+            db = None
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_ROWS and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(
+                        timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if db is not None:
+                with db:
+                    for item in batch:
+                        if item is not None:
+                            db.execute(*item)
+            if batch[-1] is None:
+                break
+        if db is not None:
+            db.close()
+
+    # Waits for everything queued to be written
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+def defaultUser():
+    try:
+        import getpass
+        return getpass.getuser()
+    except Exception:
+        return "bassist"
@@ -0,0 +1,160 @@
+from threading import Lock
+
+# Sounds the GUI, the metronome and the exercises play
+WRONG_SOUND = 'custWrong.ogg'
+RIGHT_SOUND = 'custRight.ogg'
+CLICK_SOUND = 'click.wav'
+HI_CLICK_SOUND = 'hiClick.ogg'
+LO_CLICK_SOUND = 'loClick.ogg'
+
+# What preload() decodes unless told otherwise: everything above
+MANIFEST = [CLICK_SOUND, HI_CLICK_SOUND, LO_CLICK_SOUND, RIGHT_SOUND,
+    WRONG_SOUND]
+
+class SilentSound:
+    """Stands in for a mixer.Sound when there's no audio output"""
+
+    def play(self):
+        return None
+
+    def set_volume(self, volume):
+        pass
+
+SILENCE = SilentSound()
+
+class SoundHandle:
+    """One consumer's way to play a sound out of the bank.
+
+    Handles to the same file share the one decoded Sound, but each has a
+    volume of its own, set on the channel it plays on, so turning the
+    exercises down leaves the metronome alone.  The Sound is only looked up
+    on play(), which means a handle can be made before the mixer is running
+    (it plays nothing until then).
+    """
+
+    def __init__(self, bank, path, volume = 1.0):
+        self.bank = bank
+        self.path = path
+        self.volume = volume
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def play(self):
+        return self.bank.play(self.path, self.volume)
+
+class SoundBank:
+    """Every sound the program plays, each decoded once and then shared.
+
+    Sounds play through an outputEngine.OutputEngine, as arrays of samples,
+    or failing that through pygame's mixer, as mixer.Sounds.  Until start()
+    or startMixer() has been called (or if both failed), sound() hands back
+    silence, so a station with no audio output runs all the same.  decodes
+    counts the files actually read, for checking nothing is decoded twice.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.sounds = {}
+        self.engine = None
+        self.mixer = None
+        self.decodes = 0
+
+    def start(self, engine, manifest = MANIFEST):
+        """Play through engine, decoding everything in manifest for it now.
+        Raises, leaving the bank as it was, if any of them can't be decoded
+        (aubio without libsndfile only reads WAV, say)."""
+        from audioSource import loadAudioFile
+        sounds = dict((path, loadAudioFile(path, engine.sampleRate))
+            for path in manifest)
+        with self.lock:
+            self.sounds = sounds
+            self.decodes += len(sounds)
+            self.engine = engine
+
+    # Stop playing through the engine, dropping everything decoded for it,
+    # so the bank is silent until started again (or the mixer takes over)
+    def stop(self):
+        with self.lock:
+            self.sounds = {}
+            self.engine = None
+
+    # Play through pygame's mixer instead, which is also the first time
+    # pygame gets imported.  Safe to call again once running.  Raises
+    # whatever the mixer raises if there's no output to be had.
+    def startMixer(self):
+        from pygame import mixer
+        if mixer.get_init() is None:
+            mixer.init()
+        self.mixer = mixer
+
+    def running(self):
+        return self.engine is not None or self.mixer is not None
+
+    def sound(self, path):
+        with self.lock:
+            if path in self.sounds:
+                return self.sounds[path]
+            if self.engine is not None:
+                from audioSource import loadAudioFile
+                sound = loadAudioFile(path, self.engine.sampleRate)
+            elif self.mixer is not None:
+                sound = self.mixer.Sound(path)
+            else:
+                return SILENCE
+            self.decodes += 1
+            self.sounds[path] = sound
+            return sound
+
+    # Returns the pygame Channel it's playing on, if it's playing on one
+    def play(self, path, volume = 1.0):
+        sound = self.sound(path)
+        if sound is SILENCE:
+            return None
+        if self.engine is not None:
+            self.engine.play(sound, volume)
+            return None
+        channel = sound.play()
+        if channel is not None:
+            channel.set_volume(volume)
+        return channel
+
+    # Decode everything in manifest now, so nothing is read from disk when
+    # it's first played.  Returns how many sounds the bank holds.  start()
+    # has already done this for the engine.
+    def preload(self, manifest = MANIFEST):
+        for path in manifest:
+            self.sound(path)
+        return len(self.sounds)
+
+    def handle(self, path, volume = 1.0):
+        return SoundHandle(self, path, volume)
+
+# The one bank everything shares
+soundBank = SoundBank()
+
+def startSoundOutput(bank = soundBank, engine = None, openStream = True):
+    """Get bank playing: through engine if it's given, its stream opens and
+    every sound decodes for it, otherwise through pygame's mixer.  Leave
+    openStream False if the engine is to share a duplex stream with capture.
+    Returns the engine if it's in use, else None.  Prints why, and leaves
+    the bank silent, if neither works."""
+    if engine is not None:
+        try:
+            if openStream:
+                engine.start()
+            bank.start(engine)
+            return engine
+        except Exception as e:
+            engine.close()
+            print("Not using the output engine (" + str(e) + ")")
+    try:
+        bank.startMixer()
+    except Exception as e:
+        print("No audio output (" + str(e) + "), running silently")
+        return None
+    bank.preload()
+    return None
@@ -0,0 +1,67 @@
+import time
+from threading import Event, Thread
+
+class StartupProfile:
+    """Milestones of application startup, and the slow jobs run alongside it.
+
+    mark() notes the first time each milestone is reached, in seconds since
+    the profile was made.  runInBackground() starts a job on its own thread
+    and marks it once done, so jobs that don't depend on each other (opening
+    the audio device, starting the mixer, loading sounds) overlap instead of
+    queueing up in front of the window.
+    """
+
+    def __init__(self, clock = time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.marks = []
+        self.done = {}
+        self.results = {}
+        self.errors = {}
+
+    def mark(self, name):
+        if name not in self.done:
+            self.done[name] = Event()
+        if not any(mark == name for mark, seconds in self.marks):
+            self.marks.append((name, self.clock() - self.start))
+        self.done[name].set()
+
+    def since(self, name):
+        for mark, seconds in self.marks:
+            if mark == name:
+                return seconds
+        return None
+
+    def runInBackground(self, name, job, onDone = None):
+        """Run job() on a new thread.  Its return value (or the exception it
+        raised) is kept in results (or errors) under name, then name is
+        marked and onDone(name) is called, from that thread."""
+        self.done.setdefault(name, Event())
+
+        def runJob():
+            try:
+                self.results[name] = job()
+            except Exception as e:
+                self.errors[name] = e
+            self.mark(name)
+            if onDone is not None:
+                onDone(name)
+
+        thread = Thread(target=runJob, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    # Block until name has been marked, or timeout seconds have gone by.
+    # Returns whether it was marked.
+    def waitFor(self, name, timeout = None):
+        self.done.setdefault(name, Event())
+        return self.done[name].wait(timeout)
+
+    def report(self):
+        lines = ["startup profile (seconds since launch):"]
+        for name, seconds in sorted(self.marks, key=lambda m: m[1]):
+            line = "  %-20s %7.3f" % (name, seconds)
+            if name in self.errors:
+                line += "  failed: " + str(self.errors[name])
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,66 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from analytics import PracticeStats
+from sessionStore import connect, INSERT_NOTE
+
+class MixedExercises(unittest.TestCase):
+    """Summing a day's notes in more than one update, with exercise names of
+    different lengths, counts every note once under its own name"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "history.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def addNotes(self, exercise, count, correct):
+        now = time.time()
+        db = connect(self.path)
+        with db:
+            db.executemany(INSERT_NOTE, [("s-" + exercise, "me", exercise, 1,
+                now + i, "2026-10-18", "E1", "E1", correct, 500.0, 0, i)
+                for i in range(count)])
+        db.close()
+
+    def checkTotals(self, stats):
+        self.assertEqual(stats.totals(stats.select())[0], 8)
+        self.assertEqual(stats.totals(stats.select('nashville'))[:2], (5, 1.0))
+        self.assertEqual(stats.totals(stats.select('frets'))[:2], (3, 0.0))
+        self.assertEqual(sorted(set(stats.stats['exercise'])),
+            ['frets', 'nashville'])
+
+    def testLongNameThenShort(self):
+        stats = PracticeStats(self.path, "me")
+        self.addNotes("nashville", 5, 1)
+        self.assertEqual(stats.update(), 5)
+        self.addNotes("frets", 3, 0)
+        self.assertEqual(stats.update(), 3)
+        self.checkTotals(stats)
+        stats.close()
+        # and the same again from what was stored
+        stats = PracticeStats(self.path, "me")
+        self.assertEqual(stats.update(), 0)
+        self.checkTotals(stats)
+        stats.close()
+
+    def testShortNameThenLong(self):
+        stats = PracticeStats(self.path, "me")
+        self.addNotes("frets", 3, 0)
+        stats.update()
+        self.addNotes("nashville", 5, 1)
+        stats.update()
+        self.checkTotals(stats)
+        stats.close()
+        stats = PracticeStats(self.path, "me")
+        self.checkTotals(stats)
+        stats.close()
+
+if __name__ == "__main__":
+    unittest.main()
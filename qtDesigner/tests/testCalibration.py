@@ -0,0 +1,46 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import unittest
+
+import numpy as num
+
+from calibration import Calibration, Calibrator, MIN_NOISE_DB, \
+    NOISE_MARGIN_DB
+
+HOP_SIZE = 1024
+SAMPLE_RATE = 44100
+
+class SilentInput(unittest.TestCase):
+    """A digitally silent input mustn't put the silence threshold out of
+    reach"""
+
+    def testNoPluck(self):
+        calibrator = Calibrator(HOP_SIZE, SAMPLE_RATE)
+        silence = num.zeros(HOP_SIZE, dtype=num.float32)
+        while not calibrator.addHop(silence):
+            pass
+        calibration = calibrator.result()
+        self.assertEqual(calibration.noiseDb, MIN_NOISE_DB)
+        self.assertIsNone(calibration.pluckDb)
+        self.assertEqual(calibration.gain, 1.0)
+        self.assertAlmostEqual(calibration.silenceDb,
+            MIN_NOISE_DB + NOISE_MARGIN_DB)
+
+    def testPluck(self):
+        calibrator = Calibrator(HOP_SIZE, SAMPLE_RATE)
+        silence = num.zeros(HOP_SIZE, dtype=num.float32)
+        pluck = (0.1 * num.sin(2 * num.pi * 41.2 * num.arange(HOP_SIZE)
+            / SAMPLE_RATE)).astype(num.float32)
+        while calibrator.stage == "noise":
+            calibrator.addHop(silence)
+        while not calibrator.addHop(pluck):
+            pass
+        calibration = calibrator.result()
+        self.assertEqual(calibration.noiseDb, MIN_NOISE_DB)
+        self.assertGreater(calibration.silenceDb, -90)
+
+    def testDirect(self):
+        self.assertEqual(Calibration(-200.0, None).noiseDb, MIN_NOISE_DB)
+
+if __name__ == "__main__":
+    unittest.main()
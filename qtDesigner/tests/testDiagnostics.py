@@ -0,0 +1,120 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as num
+
+from diagnostics import DiagnosticStream, loadRecording, summarise, \
+    HOP_RECORD, RING_HOPS, BLOCK_HOPS, CONFIRMED, GATED
+from noteDetector import NoteDetector
+
+HOP_SIZE = 1024
+SAMPLE_RATE = 44100
+# More than the ring holds, and not a whole number of blocks
+NUM_HOPS = 2 * RING_HOPS + BLOCK_HOPS // 2 + 3
+
+class FakeHandler:
+    """The bits of an AudioHandler a DiagnosticStream reads"""
+
+    def __init__(self):
+        self.hop = 0
+
+    def gated(self):
+        return self.hop % 10 == 0
+
+    def hopCaptureTime(self):
+        return self.hop * HOP_SIZE / float(SAMPLE_RATE)
+
+    def confidence(self):
+        return 0.5
+
+def pitchOf(hop):
+    return 41.2 + hop
+
+def feed(stream, numHops):
+    handler = FakeHandler()
+    detector = NoteDetector()
+    for hop in range(numHops):
+        handler.hop = hop
+        pitch = pitchOf(hop)
+        name, tune, confirmed, attack = detector.addPitch(pitch)
+        stream.addHop(handler, detector, pitch, 0.01, False, tune,
+            confirmed, attack)
+
+class RoundTrip(unittest.TestCase):
+    """Every hop added comes back out of a recording, in order, as it went
+    in, though the ring only ever holds the latest"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "station.diag")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testRecording(self):
+        stream = DiagnosticStream(HOP_SIZE, SAMPLE_RATE, self.path)
+        feed(stream, NUM_HOPS)
+        stream.close()
+        header, hops = loadRecording(self.path)
+        self.assertEqual(header['hopSize'], HOP_SIZE)
+        self.assertEqual(header['sampleRate'], SAMPLE_RATE)
+        self.assertEqual(hops.dtype, HOP_RECORD)
+        self.assertEqual(len(hops), NUM_HOPS)
+        expected = num.arange(NUM_HOPS)
+        num.testing.assert_allclose(hops['pitch'], pitchOf(expected),
+            rtol=1e-6)
+        num.testing.assert_allclose(hops['time'],
+            expected * HOP_SIZE / float(SAMPLE_RATE))
+        num.testing.assert_array_equal((hops['flags'] & GATED) != 0,
+            expected % 10 == 0)
+        self.assertTrue(num.all(hops['db'] == hops['db'][0]))
+        self.assertIn("%d hops" % NUM_HOPS, summarise(hops))
+
+    def testNothingRecorded(self):
+        stream = DiagnosticStream(HOP_SIZE, SAMPLE_RATE, self.path)
+        stream.close()
+        header, hops = loadRecording(self.path)
+        self.assertEqual(len(hops), 0)
+        self.assertEqual(summarise(hops), "0 hops over 0.0 s")
+
+    def testNotARecording(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"RIFF....WAVEfmt ")
+        self.assertRaises(ValueError, loadRecording, self.path)
+
+class Ring(unittest.TestCase):
+    """recent() hands back the latest hops, oldest first, across the end of
+    the ring, each with the debounce's state as it was on that hop"""
+
+    def testRecent(self):
+        stream = DiagnosticStream(HOP_SIZE, SAMPLE_RATE)
+        feed(stream, NUM_HOPS)
+        recent = stream.recent(RING_HOPS // 2)
+        num.testing.assert_allclose(recent['pitch'],
+            pitchOf(num.arange(NUM_HOPS - RING_HOPS // 2, NUM_HOPS)),
+            rtol=1e-6)
+        self.assertEqual(len(stream.recent(10 * RING_HOPS)), RING_HOPS)
+
+    def testDebounceState(self):
+        stream = DiagnosticStream(HOP_SIZE, SAMPLE_RATE)
+        handler = FakeHandler()
+        detector = NoteDetector(2)
+        for hop in range(1, 5):
+            handler.hop = hop
+            # A2, a few cents sharp
+            name, tune, confirmed, attack = detector.addPitch(110.2)
+            stream.addHop(handler, detector, 110.2, 0.01, False, tune,
+                confirmed, attack)
+        recent = stream.recent(4)
+        self.assertEqual(list(recent['note']), [45] * 4)
+        self.assertEqual(list(recent['run']), [1, 2, 3, 4])
+        self.assertEqual(list(recent['held']), [-1, 45, 45, 45])
+        self.assertEqual(list(recent['flags'] & CONFIRMED), [0, 1, 0, 0])
+        num.testing.assert_allclose(recent['cents'], 3.15, atol=0.05)
+
+if __name__ == '__main__':
+    unittest.main()
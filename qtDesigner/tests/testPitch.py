@@ -0,0 +1,73 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import unittest
+
+import numpy as num
+
+from audioSource import ArraySource, SAMPLE_TYPE
+from noteDetector import AudioHandler, NoteDetector, SAMPLE_RATE, \
+    SHORT_BUFFER_SIZE, inputHopSize
+from notes import name_to_number, number_to_freq
+
+CONFIDENCE_LEVEL = 2
+SECONDS = 2.0
+# Relative levels of the fundamental and overtones of the test tone.  yinfft
+# reads a bare sine this low sharp whatever the window (E2 by ~40 cents), so
+# the tone has a string's overtones.
+HARMONICS = (1.0, 0.7, 0.45, 0.3, 0.2, 0.1)
+# Furthest an in-tune note may read off, in cents
+MAX_CENTS = 10
+
+def tone(freq):
+    t = num.arange(int(SECONDS * SAMPLE_RATE)) / float(SAMPLE_RATE)
+    signal = num.zeros(len(t))
+    for h, level in enumerate(HARMONICS, 1):
+        signal += level * num.sin(2 * num.pi * freq * h * t)
+    return (0.3 * signal / sum(HARMONICS)).astype(SAMPLE_TYPE)
+
+def readNote(note, multiResolution):
+    """Every tune the detector reported for a steady, in-tune note, with
+    the windows the pitch came from"""
+    signal = tone(number_to_freq(name_to_number(note)))
+    handler = AudioHandler(ArraySource(signal, inputHopSize(multiResolution),
+        SAMPLE_RATE), multiResolution)
+    detector = NoteDetector(CONFIDENCE_LEVEL)
+    names = set()
+    tunes = []
+    windows = set()
+    while True:
+        result = handler.processAudio()
+        if result is None:
+            break
+        pitch, volume, onset = result
+        name, tune, confirmed, attack = detector.addPitch(pitch, onset,
+            handler.tunePitch)
+        if tune is not None and not onset:
+            names.add(str(name))
+            tunes.append(tune * 100)
+            windows.add(handler.lastWindow)
+    return names, num.array(tunes), windows
+
+class InTune(unittest.TestCase):
+    """An in-tune low note must read in tune, whichever window named it"""
+
+    def check(self, note, multiResolution):
+        names, cents, windows = readNote(note, multiResolution)
+        self.assertEqual(names, {note})
+        self.assertLess(abs(num.median(cents)), MAX_CENTS)
+        return windows
+
+    def testE2(self):
+        # The short window reads E2 sharp, so it may name the note but
+        # mustn't tune it
+        self.assertIn(SHORT_BUFFER_SIZE, self.check("E2", True))
+
+    def testA2(self):
+        self.check("A2", True)
+
+    def testSingleResolution(self):
+        self.check("E2", False)
+        self.check("A2", False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import unittest
+
+import numpy as num
+
+from ringBuffer import RingBuffer
+
+HOP_SIZE = 4
+NUM_HOPS = 4
+
+def frames(start, count):
+    return num.arange(start, start + count, dtype=num.float32)
+
+class Wraparound(unittest.TestCase):
+    """Frames come out in the order they went in, across the end of the
+    backing array"""
+
+    def testSplitWriteAndRead(self):
+        ring = RingBuffer(HOP_SIZE, NUM_HOPS)
+        out = num.zeros(HOP_SIZE, dtype=num.float32)
+        # Leave the positions two frames short of the end
+        ring.write(frames(0, 14))
+        for start in range(0, 12, HOP_SIZE):
+            self.assertTrue(ring.read(out))
+            num.testing.assert_array_equal(out, frames(start, HOP_SIZE))
+        # This write and the reads after it go over the end of the array
+        ring.write(frames(14, 6))
+        self.assertTrue(ring.read(out))
+        num.testing.assert_array_equal(out, frames(12, HOP_SIZE))
+        self.assertTrue(ring.read(out))
+        num.testing.assert_array_equal(out, frames(16, HOP_SIZE))
+        self.assertEqual(ring.overrunFrames, 0)
+
+    def testNotEnoughFrames(self):
+        ring = RingBuffer(HOP_SIZE, NUM_HOPS)
+        out = num.full(HOP_SIZE, -1, dtype=num.float32)
+        ring.write(frames(0, HOP_SIZE - 1))
+        self.assertFalse(ring.read(out))
+        num.testing.assert_array_equal(out, -1)
+        self.assertFalse(ring.waitFor(HOP_SIZE, timeout=0.01))
+
+class Overrun(unittest.TestCase):
+    """A reader that falls more than the capacity behind loses the oldest
+    frames, and they're counted"""
+
+    def testLapped(self):
+        ring = RingBuffer(HOP_SIZE, NUM_HOPS)
+        out = num.zeros(HOP_SIZE, dtype=num.float32)
+        capacity = HOP_SIZE * NUM_HOPS
+        for start in range(0, capacity + 6, 2):
+            ring.write(frames(start, 2))
+        self.assertTrue(ring.read(out))
+        self.assertEqual(ring.overrunFrames, 6)
+        num.testing.assert_array_equal(out, frames(6, HOP_SIZE))
+
+    def testWriteBiggerThanRing(self):
+        ring = RingBuffer(HOP_SIZE, NUM_HOPS)
+        out = num.zeros(HOP_SIZE, dtype=num.float32)
+        capacity = HOP_SIZE * NUM_HOPS
+        ring.write(frames(0, capacity + 3))
+        self.assertTrue(ring.read(out))
+        self.assertEqual(ring.overrunFrames, 3)
+        num.testing.assert_array_equal(out, frames(3, HOP_SIZE))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from exercises import sessionInfo
+from sessionStore import SessionStore, connect, BATCH_ROWS, FLUSH_INTERVAL
+
+class WriterThread(unittest.TestCase):
+    """Notes are queued on the caller's thread and written by the store's
+    own, in batches, without being asked"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "history.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def count(self, sql):
+        db = connect(self.path)
+        try:
+            return db.execute(sql).fetchone()[0]
+        finally:
+            db.close()
+
+    def testEverythingWritten(self):
+        store = SessionStore(self.path, "me")
+        session = sessionInfo(2, "frets")
+        store.startSession(session)
+        notes = 2 * BATCH_ROWS + 7
+        for i in range(notes):
+            right = i % 3 != 0
+            session.addNote("E1", "E1" if right else "F1", right, 0, i % 5)
+        store.endSession(session)
+        store.close()
+        self.assertFalse(store.writer.is_alive())
+        self.assertEqual(self.count("SELECT COUNT(*) FROM notes"), notes)
+        self.assertEqual(self.count("SELECT SUM(correct) FROM notes"),
+            session.numRight)
+        db = connect(self.path)
+        row = db.execute("SELECT user, exercise, level, ended, numRight, "
+            "numWrong FROM sessions WHERE id = ?", (session.id,)).fetchone()
+        db.close()
+        self.assertEqual(row[:3], ("me", "frets", 2))
+        self.assertIsNotNone(row[3])
+        self.assertEqual(row[4:], (session.numRight, session.numWrong))
+
+    def testWrittenWithoutClosing(self):
+        store = SessionStore(self.path, "me")
+        session = sessionInfo(1, "chords")
+        store.startSession(session)
+        session.addNote("C2", "C2", True)
+        # Committed within a flush interval or so, while still open
+        deadline = time.monotonic() + 5 * FLUSH_INTERVAL
+        written = 0
+        while written == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            written = self.count("SELECT COUNT(*) FROM notes")
+        self.assertEqual(written, 1)
+        store.close()
+
+    def testOtherStoresSession(self):
+        store = SessionStore(self.path, "me")
+        session = sessionInfo(1, "frets")
+        store.endSession(session)
+        store.close()
+        self.assertEqual(self.count("SELECT COUNT(*) FROM sessions"), 0)
+
+    def testCantOpen(self):
+        # A file where the database's directory should be
+        blocker = os.path.join(self.directory, "blocker")
+        open(blocker, 'w').close()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            store = SessionStore(os.path.join(blocker, "history.db"), "me")
+            session = sessionInfo(1, "frets")
+            store.startSession(session)
+            session.addNote("E1", "E1", True)
+            store.endSession(session)
+            store.close()
+        self.assertIn("Not saving practice history", out.getvalue())
+        self.assertEqual(session.numRight, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+
+import numpy as num
+
+from soundBank import SoundBank
+
+SAMPLE_RATE = 44100
+
+class RecordingEngine:
+    """Stands in for an OutputEngine, keeping what it was asked to play"""
+
+    def __init__(self):
+        self.sampleRate = SAMPLE_RATE
+        self.played = []
+
+    def play(self, samples, volume = 1.0):
+        self.played.append((samples, volume))
+
+def writeWav(path, seconds = 0.1):
+    samples = (0.5 * num.sin(2 * num.pi * 440 * num.arange(int(seconds
+        * SAMPLE_RATE)) / SAMPLE_RATE) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+class Handles(unittest.TestCase):
+    """Handles to one file share its one decoded sound, each playing it at
+    a volume of its own"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.click = os.path.join(self.directory, "click.wav")
+        self.beep = os.path.join(self.directory, "beep.wav")
+        writeWav(self.click)
+        writeWav(self.beep, 0.2)
+        self.bank = SoundBank()
+        self.engine = RecordingEngine()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testShared(self):
+        self.bank.start(self.engine, [self.click, self.beep])
+        quiet = self.bank.handle(self.click, 0.25)
+        loud = self.bank.handle(self.click)
+        quiet.play()
+        loud.play()
+        quiet.play()
+        self.assertEqual(self.bank.decodes, 2)
+        (first, v1), (second, v2), (third, v3) = self.engine.played
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+        self.assertEqual((v1, v2, v3), (0.25, 1.0, 0.25))
+
+    def testOwnVolume(self):
+        self.bank.start(self.engine, [self.click])
+        metronome = self.bank.handle(self.click)
+        exercise = self.bank.handle(self.click)
+        exercise.set_volume(0.1)
+        metronome.play()
+        exercise.play()
+        self.assertEqual([v for s, v in self.engine.played], [1.0, 0.1])
+        self.assertEqual(metronome.get_volume(), 1.0)
+
+    def testHandleBeforeStart(self):
+        handle = self.bank.handle(self.click, 0.5)
+        self.assertIsNone(handle.play())
+        self.assertEqual(self.bank.decodes, 0)
+        self.bank.start(self.engine, [self.click])
+        handle.play()
+        self.assertEqual(self.engine.played[-1][1], 0.5)
+
+    def testDecodedOnce(self):
+        self.bank.start(self.engine, [self.click])
+        # Not in the manifest, so decoded when first played, then kept
+        beep = self.bank.handle(self.beep)
+        for i in range(3):
+            beep.play()
+        self.assertEqual(self.bank.preload([self.click, self.beep]), 2)
+        self.assertEqual(self.bank.decodes, 2)
+
+    def testStop(self):
+        self.bank.start(self.engine, [self.click])
+        handle = self.bank.handle(self.click)
+        self.bank.stop()
+        self.assertFalse(self.bank.running())
+        self.assertIsNone(handle.play())
+        self.assertEqual(self.engine.played, [])
+
+if __name__ == '__main__':
+    unittest.main()
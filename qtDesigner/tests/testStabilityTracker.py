@@ -0,0 +1,83 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import unittest
+
+from noteDetector import StabilityTracker
+
+E2 = 40
+NO_NOTE = StabilityTracker.NO_NOTE
+
+class Confirming(unittest.TestCase):
+    """A note is confirmed once, after depth agreeing hops"""
+
+    def testDepth(self):
+        tracker = StabilityTracker(depth=2)
+        self.assertEqual(tracker.update(E2), (E2, False))
+        self.assertEqual(tracker.update(E2 + 0.1), (E2, True))
+        self.assertEqual(tracker.runLength, 2)
+
+    def testHeldNote(self):
+        tracker = StabilityTracker(depth=2)
+        tracker.update(E2)
+        tracker.update(E2)
+        # Still ringing, but already reported
+        for i in range(5):
+            self.assertEqual(tracker.update(E2), (E2, False))
+        self.assertEqual(tracker.held, E2)
+
+    def testAgainAfterSilence(self):
+        tracker = StabilityTracker(depth=2)
+        tracker.update(E2)
+        tracker.update(E2)
+        tracker.update(None)
+        self.assertEqual(tracker.update(None), (NO_NOTE, True))
+        tracker.update(E2)
+        self.assertEqual(tracker.update(E2), (E2, True))
+
+    def testRelease(self):
+        tracker = StabilityTracker(depth=2)
+        tracker.update(E2)
+        tracker.update(E2)
+        tracker.release()
+        self.assertIsNone(tracker.held)
+        tracker.update(E2)
+        self.assertEqual(tracker.update(E2), (E2, True))
+
+class Hysteresis(unittest.TestCase):
+    """Once a note is held, a reading has to be clearly past the halfway
+    point to count as its neighbour"""
+
+    def setUp(self):
+        self.tracker = StabilityTracker(depth=2, hysteresisCents=15)
+        self.tracker.update(E2)
+        self.tracker.update(E2)
+
+    def testWithinHysteresis(self):
+        # Rounds to F2, but isn't 15 cents past the halfway point
+        for i in range(5):
+            self.assertEqual(self.tracker.update(E2 + 0.6), (E2, False))
+
+    def testPastHysteresis(self):
+        self.assertEqual(self.tracker.update(E2 + 0.7), (E2 + 1, False))
+        self.assertEqual(self.tracker.update(E2 + 0.7), (E2 + 1, True))
+
+    def testNoHysteresisWithoutHeldNote(self):
+        tracker = StabilityTracker(depth=2, adaptive=False)
+        self.assertEqual(tracker.update(E2 + 0.6), (E2 + 1, False))
+
+class AdaptiveDepth(unittest.TestCase):
+    """A reading near the halfway point needs one more agreeing hop"""
+
+    def testNearBoundary(self):
+        tracker = StabilityTracker(depth=2, boundaryCents=15)
+        self.assertEqual(tracker.update(E2 + 0.4), (E2, False))
+        self.assertEqual(tracker.update(E2 + 0.4), (E2, False))
+        self.assertEqual(tracker.update(E2 + 0.4), (E2, True))
+
+    def testNotAdaptive(self):
+        tracker = StabilityTracker(depth=2, adaptive=False)
+        tracker.update(E2 + 0.4)
+        self.assertEqual(tracker.update(E2 + 0.4), (E2, True))
+
+if __name__ == '__main__':
+    unittest.main()
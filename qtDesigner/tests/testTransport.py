@@ -0,0 +1,94 @@
+# Run from the qtDesigner directory:  python -m unittest discover tests
+
+import unittest
+
+from transport import Transport, TransportClock, ACCENT, BEAT, CHORD
+
+SAMPLE_RATE = 44100
+# A tempo whose beats don't land on whole samples (23415.9 samples a beat)
+BPM = 113
+BLOCK = 512
+
+def beats(events):
+    return [sample for sample, kind in events if kind != CHORD]
+
+class SampleCounted(unittest.TestCase):
+    """Beats land on the sample they belong at, however the output is
+    chunked, and never drift"""
+
+    def testNoDrift(self):
+        transport = Transport(SAMPLE_RATE, BPM)
+        perBeat = SAMPLE_RATE * 60.0 / BPM
+        events = []
+        while len(beats(events)) < 1000:
+            events += transport.advance(BLOCK)
+        for n, sample in enumerate(beats(events)[:1000]):
+            self.assertEqual(sample, int(round(n * perBeat)))
+
+    def testBlockSizeDoesntMatter(self):
+        end = SAMPLE_RATE * 30
+        whole = Transport(SAMPLE_RATE, BPM).advanceTo(end)
+        transport = Transport(SAMPLE_RATE, BPM)
+        chunked = []
+        for size in [1, 511, 4096, 64, 1000] * 1000:
+            if transport.position + size > end:
+                break
+            chunked += transport.advance(size)
+        chunked += transport.advanceTo(end)
+        self.assertEqual(chunked, whole)
+
+    def testEventsBeforeEndOnly(self):
+        transport = Transport(SAMPLE_RATE, 60)
+        self.assertEqual(transport.advanceTo(1), [(0, ACCENT)])
+        self.assertEqual(transport.advanceTo(SAMPLE_RATE), [])
+        self.assertEqual(transport.samplesUntilNext(), 0)
+        self.assertEqual(transport.advanceTo(SAMPLE_RATE + 1),
+            [(SAMPLE_RATE, BEAT)])
+
+    def testChordsOnTheBar(self):
+        transport = Transport(SAMPLE_RATE, 120, beatsPerBar=4,
+            barsPerChord=2, countInBars=1)
+        perBeat = SAMPLE_RATE // 2
+        events = transport.advanceTo(perBeat * 24)
+        self.assertEqual([s // perBeat for s, kind in events if kind == CHORD],
+            [4, 12, 20])
+        self.assertEqual([s // perBeat for s, kind in events
+            if kind == ACCENT], [0, 4, 8, 12, 16, 20])
+
+    def testTempoChangeKeepsLastBeat(self):
+        transport = Transport(SAMPLE_RATE, 60)
+        transport.advanceTo(2 * SAMPLE_RATE + 1)
+        transport.setBpm(120)
+        self.assertEqual(beats(transport.advanceTo(4 * SAMPLE_RATE)),
+            [int(2.5 * SAMPLE_RATE), 3 * SAMPLE_RATE, int(3.5 * SAMPLE_RATE)])
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class Clocked(unittest.TestCase):
+    """TransportClock works the position out from the clock on every poll,
+    so a late poll doesn't push later beats back"""
+
+    def testLatePoll(self):
+        clock = FakeClock()
+        transportClock = TransportClock(Transport(SAMPLE_RATE, 60), clock)
+        transportClock.start()
+        self.assertEqual(transportClock.poll(), [(0, ACCENT)])
+        self.assertEqual(transportClock.msUntilNext(), 1000)
+        # Woken 300ms late, which only makes beat 1 late
+        clock.now += 1.3
+        self.assertEqual(transportClock.poll(), [(SAMPLE_RATE, BEAT)])
+        self.assertEqual(transportClock.msUntilNext(), 700)
+
+    def testStopped(self):
+        transportClock = TransportClock(Transport(SAMPLE_RATE, 60),
+            FakeClock())
+        self.assertFalse(transportClock.running())
+        self.assertEqual(transportClock.poll(), [])
+
+if __name__ == '__main__':
+    unittest.main()
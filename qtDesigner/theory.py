@@ -0,0 +1,80 @@
+from notes import NOTE_NAMES
+
+# Scales, chord shapes and the arithmetic on note names the exercises are
+# built from.  Imports nothing heavier than notes.py, so tools can use it
+# without loading the audio or GUI libraries.
+
+SHAPE_NAMES = ['major 7', 'dom 7', 'minor 7', 'm7 flat 5']
+
+# The chord shape will give an offset from the root chord in [string][fret]
+# format.  For example, a C major 7 will contain the root note (C), then a note
+# one string up and one fret down (E) [1][-1], then a note one string up and
+# two strings down from the root (G): [1][2], then a note two strings up and
+# one string down (B): [2][1], and ending on a note two strings up and two
+# strings down (C): [2][2]
+
+MAJOR7_SHAPE = [[1,-1], [1,2], [2,1], [2,2]]
+DOM7_SHAPE = [[1,-1], [1,2], [2,0], [2,2]]
+MINOR7_SHAPE = [[1,-2], [1,2], [2,0], [2,2]]
+MINOR7FLAT5_SHAPE = [[1,-2], [1,1], [2,0], [2,2]]
+SHAPE_LIST = [MAJOR7_SHAPE, DOM7_SHAPE, MINOR7_SHAPE, MINOR7FLAT5_SHAPE]
+#I hate the way I did the above, so trying something new for Nashville
+
+# For major: 2 2 1 2 2 2 1
+#     minor: 2 1 2 2 1 2 2
+#     dim:   1 2 1 2 1 2 1
+MAJOR_SCALE_IDX = [2, 2, 1, 2, 2, 2, 1]
+MINOR_SCALE_IDX = [2, 1, 2, 2, 1, 2, 2]
+DIM_SCALE_IDX = [1, 2, 1, 2, 1, 2, 1]
+
+#whole whole half whole whole whole half
+SCALE_IDX = [2, 2, 1, 2, 2, 2, 1]
+#major, minor, minor, major, major, minor, dimninished, major
+NASH_SHAPE_IDX = ['major 7',
+                  'minor 7',
+                  'minor 7',
+                  'major 7',
+                  'major 7',
+                  'minor 7',
+                  'dom 7',
+                  'major 7']
+
+# Given a note, ex "C", return its idx in NOTE_NAMES
+def getNoteIdx(note):
+    return NOTE_NAMES.index(note)
+
+# Takes in note index from NOTE_NAME, adds toAdd, and wraps around if
+# result is more than 11
+def addNotes(note, toAdd):
+    return (note + toAdd) % 12
+
+# Given a root, ex "C", a note, ex 3, and a scale list, ex MAJOR_SCALE_IDX,
+# return the note, ex "E" found at position <note> of that scale
+def getNoteOfScale(root, note, scaleList):
+    rootIdx = getNoteIdx(root)
+    offset = sum(scaleList[0:(note - 1)])
+    offset = addNotes(rootIdx, offset)
+    return NOTE_NAMES[offset]
+
+# Given a root, ex "C", and a scale list, ex MAJOR_SCALE_IDX, return a list of
+# strings representing the 1-3-5 arpeggio
+def getArpeggio(note, scaleList, arpList):
+    retVal = []
+    for index in arpList:
+        retVal.append(getNoteOfScale(note, index, scaleList))
+    return retVal
+
+# Given a key, ex "C", and a Nashville number, get the arpeggio
+def getArpeggioFromScale(key, number, arpList = [1,3,5,3,1]):
+    chordType = NASH_SHAPE_IDX[number - 1]
+    root = getNoteOfScale(key, number, MAJOR_SCALE_IDX)
+    print("  " + root + " " + chordType)
+    if chordType == 'major 7':
+        return getArpeggio(root, MAJOR_SCALE_IDX, arpList)
+    elif chordType == 'minor 7':
+        return getArpeggio(root, MINOR_SCALE_IDX, arpList)
+    elif chordType == 'dom 7':
+        return getArpeggio(root, DIM_SCALE_IDX, arpList)
+    else:
+        print("unknown chord type: " + chordType)
+        return ['']
@@ -0,0 +1,145 @@
+#! /usr/bin/python3
+
+# Turn recorded practice takes into lists of timestamped notes, offline.
+#
+# Each file goes through the same pitch detection, note naming and
+# confidence logic the live worker uses, but as fast as the CPU allows and
+# spread over a pool of processes.  Long files are cut into chunks so they
+# can be shared out too.
+#
+#   ./transcribe.py takes/*.ogg
+#   ./transcribe.py -j 8 --chunk 30 --json take1.wav > take1.json
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from audioSource import ArraySource, loadAudioFile
+from noteDetector import AudioHandler, NoteDetector, SAMPLE_RATE, \
+    MULTI_RESOLUTION, METHOD, REFERENCE_A4, inputHopSize
+
+# Each chunk starts this early so the detector's window and debounce are
+# warmed up by the time the chunk proper begins.  Notes confirmed in the
+# lead-in belong to the previous chunk and are thrown away.
+CHUNK_LEAD_IN = 0.5
+CONFIDENCE_LEVEL = 2
+
+# Decoded audio, kept per worker process so the chunks of one file handed to
+# the same worker only decode it once
+decodedFiles = {}
+
+def getSignal(path):
+    if path not in decodedFiles:
+        decodedFiles.clear()
+        decodedFiles[path] = loadAudioFile(path, SAMPLE_RATE)
+    return decodedFiles[path]
+
+def fileDuration(path):
+    import aubio
+    src = aubio.source(path, 0)
+    duration = src.duration / float(src.samplerate)
+    src.close()
+    return duration
+
+# Run one chunk, start to end seconds, of a file through the detector.
+# Returns the confirmed notes as (seconds, name, attack) tuples.
+def transcribeChunk(task):
+    path, start, end, method, multiResolution, confidenceLevel, a4 = task
+    signal = getSignal(path)
+    first = max(0, int((start - CHUNK_LEAD_IN) * SAMPLE_RATE))
+    last = min(len(signal), int(end * SAMPLE_RATE))
+    if last <= first:
+        return []
+
+    # Use the hop size the live worker would for this resolution mode
+    handler = AudioHandler(ArraySource(signal[first:last],
+        inputHopSize(multiResolution), SAMPLE_RATE), multiResolution, method)
+    detector = NoteDetector(confidenceLevel, a4)
+    events = []
+    hopSeconds = handler.source.hopSize / float(SAMPLE_RATE)
+    while True:
+        result = handler.processAudio()
+        if result is None:
+            break
+        name, tune, confirmed, attack = detector.addPitch(result[0], result[2],
+            handler.tunePitch)
+        if not confirmed:
+            continue
+        # Stamp the note with the start of the run of hops that confirmed it
+        hop = handler.hopCount - detector.tracker.runLength
+        seconds = first / float(SAMPLE_RATE) + hop * hopSeconds
+        if seconds >= start:
+            events.append((seconds, name, attack))
+    return events
+
+# Collapse the stream of confirmed names into notes with a start and end.
+# "none" marks the gaps, and an attack always starts a new note, so repeated
+# notes stay separate.
+def eventsToNotes(events, duration):
+    notes = []
+    current = None
+    for seconds, name, attack in sorted(events):
+        if current is not None and current['note'] == name and not attack:
+            continue
+        if current is not None:
+            current['end'] = round(seconds, 3)
+            notes.append(current)
+        current = {'start': round(seconds, 3), 'end': None, 'note': name}
+    if current is not None:
+        current['end'] = round(duration, 3)
+        notes.append(current)
+    return [n for n in notes if n['note'] != 'none']
+
+def transcribeFiles(paths, jobs, chunkSeconds, method = METHOD,
+        multiResolution = MULTI_RESOLUTION, confidenceLevel = CONFIDENCE_LEVEL,
+        a4 = REFERENCE_A4):
+    """Transcribe every file in paths, returns {path: [note, ...]}"""
+    durations = {}
+    tasks = []
+    for path in paths:
+        durations[path] = fileDuration(path)
+        start = 0.0
+        while start < durations[path]:
+            end = min(start + chunkSeconds, durations[path])
+            tasks.append((path, start, end, method, multiResolution,
+                confidenceLevel, a4))
+            start = end
+
+    events = dict((path, []) for path in paths)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for task, chunkEvents in zip(tasks, pool.map(transcribeChunk, tasks)):
+            events[task[0]] += chunkEvents
+    return dict((path, eventsToNotes(events[path], durations[path]))
+        for path in paths)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe recorded takes "
+        "into timestamped notes")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+        help="worker processes (default: one per CPU)")
+    parser.add_argument('--chunk', type=float, default=60.0,
+        help="split files into chunks of this many seconds")
+    parser.add_argument('--method', default=METHOD,
+        help="pitch engine, see pitchEngine.engineNames()")
+    parser.add_argument('--single', action='store_true',
+        help="only use the long analysis window")
+    parser.add_argument('--a4', type=float, default=REFERENCE_A4,
+        help="reference pitch of A4 in Hz")
+    parser.add_argument('--json', action='store_true',
+        help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = transcribeFiles(args.files, args.jobs, args.chunk, args.method,
+        not args.single, CONFIDENCE_LEVEL, args.a4)
+    if args.json:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    else:
+        for path in args.files:
+            print(path)
+            for note in results[path]:
+                print("  %8.3f %8.3f  %s" % (note['start'], note['end'],
+                    note['note']))
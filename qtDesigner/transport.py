@@ -0,0 +1,121 @@
+import math
+import time
+
+# Kinds of event a Transport hands back.  Each beat is either an ACCENT (the
+# first of its bar) or a plain BEAT, and a CHORD follows the accent of every
+# bar the chord changes on.
+ACCENT = "accent"
+BEAT = "beat"
+CHORD = "chord"
+
+# Output rate the transport counts in when nothing says otherwise
+SAMPLE_RATE = 44100
+
+class Transport:
+    """The metronome's clock, counted in samples of audio output.
+
+    Whatever owns the output says how far it has got with advanceTo() (or
+    advance()), and gets back every event due before then as (sample, kind)
+    pairs, sample being the exact position the event belongs at.  Beat n is
+    always placed from n itself (anchor + n beats, rounded to a sample) rather
+    than by adding up beat lengths, so rounding never builds up into drift
+    however long it runs, and clicks and chord changes can't wander apart.
+
+    Chords change on the first beat of a bar: after countInBars bars, then
+    every barsPerChord bars.
+    """
+
+    def __init__(self, sampleRate = SAMPLE_RATE, bpm = 120, beatsPerBar = 4,
+            barsPerChord = 2, countInBars = 1):
+        self.sampleRate = sampleRate
+        self.bpm = float(bpm)
+        self.beatsPerBar = beatsPerBar
+        self.barsPerChord = barsPerChord
+        self.countInBars = countInBars
+        self.reset()
+
+    # Back to sample 0, with the first beat due straight away
+    def reset(self):
+        self.position = 0
+        self.nextBeat = 0
+        self.anchorBeat = 0
+        self.anchorSample = 0
+
+    def samplesPerBeat(self):
+        return self.sampleRate * 60.0 / self.bpm
+
+    def beatPosition(self, beat):
+        return self.anchorSample + int(round((beat - self.anchorBeat)
+            * self.samplesPerBeat()))
+
+    # A new tempo counts from the last beat played, so the beats already
+    # gone stay where they were and the next one is one new beat after it
+    def setBpm(self, bpm):
+        if self.nextBeat > 0:
+            self.anchorSample = self.beatPosition(self.nextBeat - 1)
+            self.anchorBeat = self.nextBeat - 1
+        self.bpm = float(bpm)
+
+    # Samples from the current position to the next event
+    def samplesUntilNext(self):
+        return max(0, self.beatPosition(self.nextBeat) - self.position)
+
+    def advance(self, frames):
+        return self.advanceTo(self.position + frames)
+
+    def advanceTo(self, end):
+        """Move the position on to end, returns the events due before it"""
+        events = []
+        while True:
+            sample = self.beatPosition(self.nextBeat)
+            if sample >= end:
+                break
+            beat = self.nextBeat
+            self.nextBeat += 1
+            if beat % self.beatsPerBar != 0:
+                events.append((sample, BEAT))
+                continue
+            events.append((sample, ACCENT))
+            bar = beat // self.beatsPerBar - self.countInBars
+            if bar >= 0 and bar % self.barsPerChord == 0:
+                events.append((sample, CHORD))
+        self.position = max(self.position, end)
+        return events
+
+class TransportClock:
+    """Drives a Transport from a clock in seconds, for output that doesn't
+    report its own sample position (pygame's mixer doesn't).
+
+    The position is worked out afresh from the clock on every poll(), so a
+    late poll only makes its events late, it doesn't push later ones back.
+    """
+
+    def __init__(self, transport, clock = time.monotonic):
+        self.transport = transport
+        self.clock = clock
+        self.startTime = None
+
+    def start(self):
+        self.transport.reset()
+        self.startTime = self.clock()
+
+    def running(self):
+        return self.startTime is not None
+
+    def stop(self):
+        self.startTime = None
+
+    def position(self):
+        return int((self.clock() - self.startTime) * self.transport.sampleRate)
+
+    # Events up to and including the current sample
+    def poll(self):
+        if self.startTime is None:
+            return []
+        return self.transport.advanceTo(self.position() + 1)
+
+    # Milliseconds until the next event is due, rounded up, for a one shot
+    # timer to wake up on
+    def msUntilNext(self):
+        samples = self.transport.samplesUntilNext()
+        return int(math.ceil(samples * 1000.0 / self.transport.sampleRate))